@@ -1,51 +1,96 @@
 # backend/app/ai_models.py - REVISED FOR CLASSIFICATION MODEL
 import numpy as np
-import tensorflow as tf
 from PIL import Image
 import io
+from threading import Lock
+from .config import MODEL_BACKEND, MODEL_PATH
+from .frames import MODEL_INPUT_SIZE
+from .metrics import span
+from .model_backends import load_backend
 
 class HibiscusClassifier:
-    def __init__(self, model_path='backend/app/hibiscus_disease_classifier.h5'):
+    def __init__(self, model_path=MODEL_PATH, backend=MODEL_BACKEND):
         self.model = None
         # IMPORTANT: The order of this list MUST match the order printed by Colab
         self.class_names = ['diseased', 'fresh'] 
         try:
-            # Load the Keras model
-            self.model = tf.keras.models.load_model(model_path)
-            print("✅ Successfully loaded custom-trained classification model.")
+            # Keras, TFLite float16 or TFLite int8 - see model_backends.py
+            self.model = load_backend(backend, model_path)
+            print(f"✅ Successfully loaded custom-trained classification model ({self.model.name}).")
         except Exception as e:
             print(f"❌ ERROR: Could not load classification model: {e}")
 
     def classify_image(self, image_bytes: bytes):
+        """Decode JPEG bytes and classify. Prefer classify_array when raw pixels are available."""
         if not self.model:
             return "Error", 0.0
 
         try:
-            # Prepare the image for the model
-            img = Image.open(io.BytesIO(image_bytes)).resize((180, 180))
-            img_array = tf.keras.utils.img_to_array(img)
-            img_array = tf.expand_dims(img_array, 0) # Create a batch of 1
+            with span("classify_decode"):
+                img = Image.open(io.BytesIO(image_bytes)).convert('RGB').resize(MODEL_INPUT_SIZE)
+        except Exception as e:
+            print(f"Error decoding image for inference: {e}")
+            return "Error", 0.0
+        return self.classify_array(np.asarray(img))
+
+    def classify_array(self, image: np.ndarray):
+        """Classify an RGB uint8 array already resized to MODEL_INPUT_SIZE (see Frame.model_input)."""
+        return self.classify_batch(np.expand_dims(image, 0))[0] # Create a batch of 1
 
-            # Make a prediction
-            predictions = self.model.predict(img_array, verbose=0)
-            score = tf.nn.softmax(predictions[0])
+    def classify_batch(self, images: np.ndarray):
+        """Classify an (N, H, W, 3) batch with one forward pass; returns N (class, confidence) pairs."""
+        if not self.model:
+            return [("Error", 0.0)] * len(images)
 
-            # Get the top prediction and its confidence
-            predicted_class = self.class_names[np.argmax(score)]
-            confidence = 100 * np.max(score)
+        try:
+            with span("model_predict"):
+                scores = _softmax(self.model.predict(images))
 
-            return predicted_class, round(confidence, 2)
+            # Get the top prediction and its confidence for each frame
+            return [
+                (self.class_names[int(np.argmax(score))], round(float(100 * np.max(score)), 2))
+                for score in scores
+            ]
         except Exception as e:
             print(f"Error during model inference: {e}")
-            return "Error", 0.0
+            return [("Error", 0.0)] * len(images)
 
-# Create one instance for the entire application
-hibiscus_classifier = HibiscusClassifier()
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+# One instance per process, loaded on first use (or by warm_up) rather than at import:
+# loading TensorFlow and the model takes tens of seconds on the Pi.
+_classifier = None
+_classifier_lock = Lock()
+
+def get_classifier() -> HibiscusClassifier:
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = HibiscusClassifier()
+    return _classifier
+
+def warm_up() -> str:
+    """Load the model and push one dummy frame through it, so the first real frame doesn't pay for tracing."""
+    classifier = get_classifier()
+    if not classifier.model:
+        raise RuntimeError("classification model could not be loaded")
+    classifier.classify_batch(np.zeros((1, MODEL_INPUT_SIZE[1], MODEL_INPUT_SIZE[0], 3), dtype=np.uint8))
+    return classifier.model.name
 
 class DiseaseDetector:
-    def detect_disease(self, frame_bytes: bytes):
-        predicted_class, confidence = hibiscus_classifier.classify_image(frame_bytes)
+    def detect_disease(self, frame):
+        """`frame` is a preprocessed model-input array, or JPEG bytes on the legacy path."""
+        if isinstance(frame, np.ndarray):
+            return self.report(*get_classifier().classify_array(frame))
+        return self.report(*get_classifier().classify_image(frame))
 
+    def detect_disease_batch(self, frames: np.ndarray):
+        return [self.report(*result) for result in get_classifier().classify_batch(frames)]
+
+    def report(self, predicted_class, confidence):
         diseases = []
         if predicted_class == 'diseased':
             diseases.append({
@@ -54,13 +99,31 @@ class DiseaseDetector:
                 'recommended_action': 'Inspect plant for specific pests or fungal spots.'
             })
 
-        return { 'diseases_detected': diseases, 'overall_health': predicted_class }
+        # Confidence of the top class either way, so callers can tell a clear "fresh" from a borderline one
+        return { 'diseases_detected': diseases, 'overall_health': predicted_class, 'confidence': confidence }
 
 # Pest and Growth monitors can remain as placeholders for now
 class PestIdentifier:
-    def identify_pest(self, frame_bytes: bytes):
+    def identify_pest(self, frame):
         return { 'pests_detected': [], 'infestation_level': 'none' }
 
 class GrowthMonitor:
-    def measure_growth(self, frame_bytes: bytes):
-        return { 'canopy_coverage_percent': 0, 'growth_stage': 'unknown' }
\ No newline at end of file
+    def measure_growth(self, frame):
+        return { 'canopy_coverage_percent': 0, 'growth_stage': 'unknown' }
+
+def analyze_batch(model_inputs: np.ndarray) -> list:
+    """Run every analyzer on a batch of preprocessed frames. Module-level so the inference process pool can pickle it."""
+    disease_reports = DiseaseDetector().detect_disease_batch(model_inputs)
+    pest_identifier, growth_monitor = PestIdentifier(), GrowthMonitor()
+    return [
+        {
+            "disease_analysis": disease_report,
+            "pest_analysis": pest_identifier.identify_pest(model_input),
+            "growth_metrics": growth_monitor.measure_growth(model_input),
+        }
+        for model_input, disease_report in zip(model_inputs, disease_reports)
+    ]
+
+def analyze_frame(model_input: np.ndarray) -> dict:
+    """Single-frame convenience wrapper around analyze_batch."""
+    return analyze_batch(np.expand_dims(model_input, 0))[0]
@@ -0,0 +1,276 @@
+# backend/app/alert_engine.py
+# Stateful alerting: rules are data, compiled once, evaluated in bulk; only state transitions are emitted.
+
+import operator
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from .config import ALERT_CLEAR_AFTER
+
+# --- Rule table ---
+# "threshold" rules compare one metric against a THRESHOLDS entry. They open once the condition has held for
+# min_duration_s and only resolve after the value has come back past the threshold by exit_band (hysteresis).
+# "detection" rules open one alert per item the AI reports (keyed by instance_key) and resolve once it has been
+# missing from clear_after analyses in a row (a tick with no analysis at all, e.g. inference skipped, doesn't count).
+# "state" rules open while a field equals a value; with quiet_only they only fire when nothing else is open.
+# evidence="frame": the frame behind the alert is kept (see frame_store.py) and the alert carries its frame_id.
+DEFAULT_RULES = [
+    {"id": "yield_threat", "kind": "threshold", "metric": "temperature_internal", "op": ">",
+     "threshold": ("temperature_internal", "yield_stress_point"), "exit_band": 1.0, "min_duration_s": 0,
+     "level": "critical", "title": "Yield Threat: Heat Stress",
+     "description": "Internal temp is {value}°C, exceeding the critical yield stress point.",
+     "optimal_range": "18-28°C",
+     "impact": "Sustained heat stress will slow fruit growth and reduce yield forecast by 5-10% per day.",
+     "solutions": [{"priority": 1, "action": "Activate cooling systems (fans/misters) to lower temperature."}]},
+    {"id": "disease_risk_hum", "kind": "threshold", "metric": "humidity", "op": ">",
+     "threshold": ("humidity", "disease_risk_point"), "exit_band": 3.0, "min_duration_s": 30,
+     "level": "warning", "title": "Disease Risk: High Humidity",
+     "description": "Humidity is {value}%, creating ideal conditions for fungal growth.",
+     "optimal_range": "55-75%",
+     "impact": "High probability of powdery mildew or blight, impacting crop quality and market value.",
+     "solutions": [{"priority": 1, "action": "Increase ventilation and air circulation immediately."}]},
+    {"id": "yield_threat_hum", "kind": "threshold", "metric": "humidity", "op": "<",
+     "threshold": ("humidity", "stress_point"), "exit_band": 3.0, "min_duration_s": 30,
+     "level": "warning", "title": "Yield Threat: Transpiration Stress",
+     "description": "Humidity is {value}%, causing plants to lose water too quickly.",
+     "optimal_range": "55-75%",
+     "impact": "Stunts growth and reduces fruit size, lowering overall yield.",
+     "solutions": [{"priority": 1, "action": "Activate misting or fogging systems to raise humidity."}]},
+    {"id": "yield_threat_moisture", "kind": "threshold", "metric": "soil_moisture", "op": "<",
+     "threshold": ("soil_moisture", "critical_min"), "exit_band": 5.0, "min_duration_s": 0,
+     "level": "critical", "title": "Yield Threat: Dehydration Stress",
+     "description": "Soil moisture has dropped to {value}%, below the critical threshold.",
+     "optimal_range": "50-80%",
+     "impact": "Impairs nutrient uptake, stunts growth, and can lead to irreversible wilting. Reduces yield forecast.",
+     "solutions": [{"priority": 1, "action": "Activate irrigation system immediately to restore soil moisture."}]},
+    {"id": "disease_risk_moisture", "kind": "threshold", "metric": "soil_moisture", "op": ">",
+     "threshold": ("soil_moisture", "critical_max"), "exit_band": 5.0, "min_duration_s": 30,
+     "level": "warning", "title": "Disease Risk: Waterlogged Soil",
+     "description": "Soil moisture is at {value}%, creating anaerobic conditions.",
+     "optimal_range": "50-80%",
+     "impact": "Promotes root rot and fungal diseases. High risk of crop loss if not addressed.",
+     "solutions": [{"priority": 1, "action": "Disable all irrigation and check for drainage issues."}]},
+    {"id": "disease", "kind": "detection", "path": ("disease_analysis", "diseases_detected"),
+     "instance_key": "name", "value_key": "confidence", "evidence": "frame",
+     "level": "warning", "title": "AI Detected Disease: {label}",
+     "description": "AI analysis has detected signs of {name} with {confidence}% confidence.",
+     "optimal_range": "0% symptoms",
+     "impact": "Immediate action required to prevent 15-25% crop loss, impacting market delivery schedules.",
+     "solutions": [{"priority": 1, "action": "Apply targeted {recommended_action}."}],
+     "defaults": {"name": "Unknown", "confidence": 0, "recommended_action": "treatment"}},
+    {"id": "pest", "kind": "detection", "path": ("pest_analysis", "pests_detected"),
+     "instance_key": "pest_type", "value_key": "count", "evidence": "frame",
+     "level": "warning", "title": "AI Detected Pests: {label}",
+     "description": "AI analysis has identified an infestation of {pest_type} with an estimated population of {count}.",
+     "optimal_range": "0 pests",
+     "impact": "Pest infestations can rapidly damage crops, reducing marketable yield and increasing labor costs.",
+     "solutions": [{"priority": 1, "action": "Deploy biological controls or apply appropriate pesticides immediately."}],
+     "defaults": {"pest_type": "Unknown", "count": None}},
+    # Fed by trend_analyzer.py: a metric heading for one of the thresholds above, and sensors that look broken
+    {"id": "forecast", "kind": "detection", "path": ("trend_analysis", "forecasts"),
+     "instance_key": "metric", "value_key": "eta_h",
+     "level": "warning", "title": "Forecast: {label} Trending Toward Limit",
+     "description": "{label} will cross {threshold:g}{unit} in ~{eta_text} at the current rate of {rate_text}/h.",
+     "optimal_range": "Stable within limits",
+     "impact": "Acting before the limit is reached avoids the stress the threshold alert would report.",
+     "solutions": [{"priority": 1, "action": "Check the equipment that controls {label} before the limit is reached."}]},
+    {"id": "sensor_fault", "kind": "detection", "path": ("trend_analysis", "faults"),
+     "instance_key": "fault_id", "value_key": "value",
+     "level": "advisory", "title": "Sensor Fault: {label}",
+     "description": "{detail}",
+     "optimal_range": "Live, varying readings",
+     "impact": "Alerts and trends for this metric are unreliable until the sensor is fixed.",
+     "solutions": [{"priority": 1, "action": "Check the {sensor} sensor's wiring and power, then restart it."}]},
+    {"id": "harvest_window", "kind": "state", "path": ("growth_metrics", "growth_stage"), "equals": "fruiting",
+     "value_path": ("growth_metrics", "canopy_coverage_percent"), "quiet_only": True,
+     "level": "advisory", "title": "Optimal Harvest Window Approaching",
+     "description": "Plants are in the mature fruiting stage and environmental conditions are optimal.",
+     "optimal_range": "Fruiting Stage",
+     "impact": "Planning now ensures maximum yield quality and optimal market timing.",
+     "solutions": [{"priority": 1, "action": "Schedule labor and logistics for harvest in the next 7-10 days."}]},
+]
+
+OPS = {">": operator.gt, "<": operator.lt}
+
+# Alert lifecycle. PENDING is internal (condition seen, min_duration not yet met) and never emitted.
+PENDING, OPEN, ACKNOWLEDGED, RESOLVED = "pending", "open", "acknowledged", "resolved"
+
+class Rule:
+    """One compiled rule: thresholds resolved to numbers, templates ready to format."""
+
+    def __init__(self, spec: dict, thresholds: dict):
+        self.spec = spec
+        self.id = spec["id"]
+        self.kind = spec["kind"]
+        self.min_duration_s = spec.get("min_duration_s", 0)
+        self.clear_after = spec.get("clear_after", ALERT_CLEAR_AFTER)
+        if self.kind == "threshold":
+            self.metric = spec["metric"]
+            self.op = OPS[spec["op"]]
+            section, key = spec["threshold"]
+            self.enter = float(thresholds[section][key])
+            band = spec.get("exit_band", 0.0)
+            # For '>' the alert clears once value <= enter - band; for '<' once value >= enter + band
+            self.exit = self.enter - band if spec["op"] == ">" else self.enter + band
+
+    def render(self, alert_id: str, value, context: dict) -> dict:
+        spec = self.spec
+        fields = {**spec.get("defaults", {}), **{k: v for k, v in context.items() if v is not None}, "value": value}
+        fields["label"] = str(fields.get(spec.get("instance_key"), "")).replace('_', ' ').title()
+        return {
+            "id": alert_id, "rule": self.id, "level": spec["level"],
+            "title": spec["title"].format(**fields), "description": spec["description"].format(**fields),
+            "current_value": value, "optimal_range": spec["optimal_range"], "impact": spec["impact"],
+            "solutions": [{**s, "action": s["action"].format(**fields)} for s in spec["solutions"]],
+        }
+
+def compile_rules(specs: List[dict], thresholds: dict) -> List[Rule]:
+    return [Rule(spec, thresholds) for spec in specs]
+
+def _get_path(data: dict, path):
+    for key in path:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+class AlertEngine:
+    """Tracks pending/open/acknowledged state per (greenhouse, rule instance) and emits only transitions."""
+
+    def __init__(self, rules: List[Rule]):
+        self.rules = rules
+        self.threshold_rules = [r for r in rules if r.kind == "threshold"]
+        self.metrics = sorted({r.metric for r in self.threshold_rules})
+        self.states: Dict[str, dict] = {}  # alert id -> state record
+        self.by_source: Dict[str, set] = {}
+
+    # --- Stateless view (what is breached right now, no hysteresis or durations) ---
+    def evaluate_snapshot(self, data: dict, source: str = None) -> List[dict]:
+        source = source or data.get("greenhouse_id", "default")
+        return [rule.render(alert_id, value, context) for rule, alert_id, value, context in self._conditions([data], [source])]
+
+    # --- Stateful bulk update ---
+    def update(self, snapshots: Dict[str, dict], now: float = None):
+        """Feed the latest snapshot of each greenhouse. Returns (active alerts per source, transition events)."""
+        now = now if now is not None else time.time()
+        sources, datas = list(snapshots), list(snapshots.values())
+        events = []
+        seen = set()
+        for rule, alert_id, value, context in self._conditions(datas, sources):
+            seen.add(alert_id)
+            record = self.states.get(alert_id)
+            if record is None:
+                record = self.states[alert_id] = {"state": PENDING, "since": now, "rule": rule, "source": context["greenhouse_id"]}
+                self.by_source.setdefault(record["source"], set()).add(alert_id)
+            record["alert"] = rule.render(alert_id, value, context)
+            record["clean"] = 0
+            if record["state"] == PENDING and now - record["since"] >= rule.min_duration_s:
+                record["state"] = OPEN
+                record["opened_at"] = now
+                events.append(self._event(record, OPEN, now))
+
+        # Anything tracked for these sources whose condition is no longer held either lapses or resolves
+        for source in sources:
+            for alert_id in list(self.by_source.get(source, ())):
+                if alert_id in seen:
+                    continue
+                record = self.states[alert_id]
+                if record["state"] != PENDING and not self._cleared(record, snapshots[source]):
+                    if record["rule"].kind == "threshold":
+                        # Inside the hysteresis band: stay open, just track the latest reading
+                        record["alert"]["current_value"] = snapshots[source].get(record["rule"].metric)
+                    continue
+                del self.states[alert_id]
+                self.by_source[source].discard(alert_id)
+                if record["state"] != PENDING:
+                    events.append(self._event(record, RESOLVED, now))
+
+        return {source: self.active(source) for source in sources}, events
+
+    def acknowledge(self, alert_id: str, now: float = None):
+        record = self.states.get(alert_id)
+        if not record or record["state"] != OPEN:
+            return None
+        record["state"] = ACKNOWLEDGED
+        record["acknowledged_at"] = now if now is not None else time.time()
+        return self._event(record, ACKNOWLEDGED, record["acknowledged_at"])
+
+    def needs_frame(self, events: List[dict]) -> Dict[str, List[str]]:
+        """Newly opened alerts whose rule keeps the frame as evidence, per source."""
+        wanted = {}
+        for e in events:
+            record = self.states.get(e["alert"]["id"])
+            if e["event"] == OPEN and record and record["rule"].spec.get("evidence") == "frame" and "evidence" not in record:
+                wanted.setdefault(record["source"], []).append(e["alert"]["id"])
+        return wanted
+
+    def attach(self, alert_id: str, **evidence):
+        """Add fields (e.g. frame_id) that stay on the alert for the rest of its life, resolved event included."""
+        record = self.states.get(alert_id)
+        if record:
+            record.setdefault("evidence", {}).update(evidence)
+
+    def active(self, source: str = None) -> List[dict]:
+        ids = self.by_source.get(source, ()) if source is not None else self.states
+        return [self._public(self.states[i]) for i in sorted(ids) if self.states[i]["state"] in (OPEN, ACKNOWLEDGED)]
+
+    # --- Internals ---
+    def _cleared(self, record: dict, data: dict) -> bool:
+        rule = record["rule"]
+        if rule.kind != "threshold":
+            # No analysis this tick (inference busy, timed out or still loading) is no evidence either way
+            if _get_path(data, rule.spec["path"][:1]) is None:
+                return False
+            record["clean"] += 1
+            return record["clean"] >= rule.clear_after
+        value = data.get(rule.metric)
+        if value is None:
+            return False  # Missing reading is not evidence the problem went away
+        return not rule.op(value, rule.exit)
+
+    def _conditions(self, datas: List[dict], sources: List[str]):
+        """Yield (rule, alert_id, value, context) for every rule condition currently met, across all sources."""
+        # Threshold rules: one vectorised comparison per rule over every source's reading
+        if self.threshold_rules and datas:
+            values = np.array([[_as_float(d.get(m)) for m in self.metrics] for d in datas], dtype=float)
+            columns = {m: values[:, i] for i, m in enumerate(self.metrics)}
+            with np.errstate(invalid="ignore"):
+                for rule in self.threshold_rules:
+                    column = columns[rule.metric]
+                    # Matches the original truthiness checks: missing or zero readings never alert
+                    hits = np.flatnonzero(rule.op(column, rule.enter) & (column != 0))
+                    for i in hits:
+                        yield rule, f"{rule.id}:{sources[i]}", datas[i][rule.metric], {"greenhouse_id": sources[i]}
+
+        for data, source in zip(datas, sources):
+            fired = False
+            for rule in self.rules:
+                if rule.kind == "detection":
+                    for item in _get_path(data, rule.spec["path"]) or []:
+                        instance = item.get(rule.spec["instance_key"])
+                        fired = True
+                        yield (rule, f"{rule.id}:{instance}:{source}", item.get(rule.spec["value_key"]),
+                               {**item, "greenhouse_id": source})
+            for rule in self.rules:
+                if rule.kind != "state" or _get_path(data, rule.spec["path"]) != rule.spec["equals"]:
+                    continue
+                if rule.spec.get("quiet_only") and (fired or self._breaches_any(data)):
+                    continue
+                yield rule, f"{rule.id}:{source}", _get_path(data, rule.spec["value_path"]) or 0, {"greenhouse_id": source}
+
+    def _breaches_any(self, data: dict) -> bool:
+        return any(data.get(r.metric) and r.op(data[r.metric], r.enter) for r in self.threshold_rules)
+
+    def _public(self, record: dict) -> dict:
+        alert = {**record["alert"], **record.get("evidence", {}), "state": record["state"], "greenhouse_id": record["source"]}
+        for key in ("opened_at", "acknowledged_at"):
+            if key in record: alert[key] = record[key]
+        return alert
+
+    def _event(self, record: dict, state: str, now: float) -> dict:
+        return {"event": state, "at": now, "alert": {**self._public(record), "state": state}}
+
+def _as_float(value) -> float:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else np.nan
@@ -0,0 +1,59 @@
+# backend/app/cadence.py
+# Adaptive telemetry rate: sample fast while something is happening, back off while it's quiet.
+
+import math
+
+from .config import TELEMETRY_BASE_INTERVAL_S, TELEMETRY_MIN_INTERVAL_S, TELEMETRY_MAX_INTERVAL_S
+
+# Rolling standard deviation above which a metric counts as "moving" (set above normal sensor noise)
+DEFAULT_VOLATILITY_BANDS = {"temperature_internal": 1.5, "humidity": 4.0, "soil_moisture": 3.0}
+URGENT_LEVELS = ("critical", "warning")
+
+class AdaptiveCadence:
+    """Chooses the next tick interval. Active critical/warning alerts or a volatile metric snap the interval to
+    `min_interval_s`; otherwise it grows by `backoff` per tick up to `max_interval_s`."""
+
+    def __init__(self, base_interval_s: float = TELEMETRY_BASE_INTERVAL_S, min_interval_s: float = TELEMETRY_MIN_INTERVAL_S,
+                 max_interval_s: float = TELEMETRY_MAX_INTERVAL_S, backoff: float = 1.5, alpha: float = 0.3,
+                 volatility_bands: dict = None):
+        self.min_interval_s = min_interval_s
+        self.max_interval_s = max_interval_s
+        self.backoff = backoff
+        self.alpha = alpha
+        self.bands = volatility_bands or DEFAULT_VOLATILITY_BANDS
+        self.interval_s = min(max(base_interval_s, min_interval_s), max_interval_s)
+        self.mean = {}
+        self.var = {}
+        self.reason = "startup"
+
+    def _update_stats(self, data: dict) -> list:
+        volatile = []
+        for metric, band in self.bands.items():
+            value = data.get(metric)
+            if not isinstance(value, (int, float)):
+                continue
+            if metric not in self.mean:
+                self.mean[metric], self.var[metric] = float(value), 0.0
+                continue
+            # Exponentially weighted mean and variance (West's incremental form)
+            delta = value - self.mean[metric]
+            self.mean[metric] += self.alpha * delta
+            self.var[metric] = (1 - self.alpha) * (self.var[metric] + self.alpha * delta * delta)
+            if math.sqrt(self.var[metric]) > band:
+                volatile.append(metric)
+        return volatile
+
+    def observe(self, data: dict, alerts: list) -> float:
+        """Feed one snapshot and its active alerts; returns the interval to wait before the next tick."""
+        volatile = self._update_stats(data)
+        urgent = [a.get("id") for a in alerts if a.get("level") in URGENT_LEVELS]
+        if urgent or volatile:
+            self.interval_s = self.min_interval_s
+            self.reason = f"alerts: {', '.join(urgent)}" if urgent else f"volatile: {', '.join(volatile)}"
+        else:
+            self.interval_s = min(self.interval_s * self.backoff, self.max_interval_s)
+            self.reason = "steady"
+        return self.interval_s
+
+    def state(self) -> dict:
+        return {"interval_s": round(self.interval_s, 2), "rate_hz": round(1 / self.interval_s, 4), "reason": self.reason}
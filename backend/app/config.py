@@ -1,4 +1,5 @@
 # backend/app/config.py
+import os
 import sys
 
 def is_raspberry_pi():
@@ -19,4 +20,101 @@ if IS_RPI:
     print("✅ Platform: Raspberry Pi detected.")
 else:
     print("🖥️  Platform: Non-Raspberry Pi (PC/Windows) detected.")
-print("-" * 50)
\ No newline at end of file
+print("-" * 50)
+
+# --- Pipeline executor settings (override with environment variables) ---
+IO_WORKERS = int(os.getenv("POLYHOUSE_IO_WORKERS", "2"))
+IO_QUEUE_SIZE = int(os.getenv("POLYHOUSE_IO_QUEUE_SIZE", "4"))
+IO_TIMEOUT_S = float(os.getenv("POLYHOUSE_IO_TIMEOUT_S", "5"))
+INFERENCE_WORKERS = int(os.getenv("POLYHOUSE_INFERENCE_WORKERS", "1"))
+INFERENCE_QUEUE_SIZE = int(os.getenv("POLYHOUSE_INFERENCE_QUEUE_SIZE", "2"))
+INFERENCE_TIMEOUT_S = float(os.getenv("POLYHOUSE_INFERENCE_TIMEOUT_S", "30"))
+INFERENCE_MAX_BATCH = int(os.getenv("POLYHOUSE_INFERENCE_MAX_BATCH", "8"))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("POLYHOUSE_INFERENCE_MAX_WAIT_MS", "50"))
+
+# --- Classifier backend: "keras", "tflite-fp16" or "tflite-int8" (MODEL_PATH defaults per backend) ---
+MODEL_BACKEND = os.getenv("POLYHOUSE_MODEL_BACKEND", "keras")
+MODEL_PATH = os.getenv("POLYHOUSE_MODEL_PATH") or None
+
+# --- Per-client send queue (telemetry messages; frames always keep only the latest) ---
+CLIENT_QUEUE_SIZE = int(os.getenv("POLYHOUSE_CLIENT_QUEUE_SIZE", "8"))
+
+# --- Sensor history (SQLite file, in-memory ring per metric, raw-row retention; rollups are kept forever) ---
+HISTORY_DB_PATH = os.getenv("POLYHOUSE_HISTORY_DB", "polyhouse_history.db")
+HISTORY_RING_SIZE = int(os.getenv("POLYHOUSE_HISTORY_RING_SIZE", "4096"))
+HISTORY_RAW_RETENTION_DAYS = float(os.getenv("POLYHOUSE_HISTORY_RAW_RETENTION_DAYS", "7"))
+
+# --- Frame-change gate: reuse analysis for frames within N bits (of 64) of a cached hash, refresh after N seconds ---
+FRAME_GATE_MAX_DISTANCE = int(os.getenv("POLYHOUSE_FRAME_GATE_MAX_DISTANCE", "4"))
+FRAME_GATE_CACHE_SIZE = int(os.getenv("POLYHOUSE_FRAME_GATE_CACHE_SIZE", "32"))
+FRAME_GATE_REFRESH_S = float(os.getenv("POLYHOUSE_FRAME_GATE_REFRESH_S", "60"))
+
+# --- Video simulator: "on_demand" decodes only requested frames, "threaded" decodes continuously at 30 FPS ---
+VIDEO_SIMULATOR_MODE = os.getenv("POLYHOUSE_VIDEO_MODE", "on_demand")
+
+# --- Per-sensor sampling periods (seconds) for the Raspberry Pi scheduler ---
+DHT22_PERIOD_S = float(os.getenv("POLYHOUSE_DHT22_PERIOD_S", "10"))          # 0.1 Hz; the DHT22 can't go much faster
+ULTRASONIC_PERIOD_S = float(os.getenv("POLYHOUSE_ULTRASONIC_PERIOD_S", "0.05"))  # 20 Hz for obstacle sensing
+CAMERA_PERIOD_S = float(os.getenv("POLYHOUSE_CAMERA_PERIOD_S", "1"))
+
+# --- Adaptive telemetry cadence (seconds between ticks) ---
+TELEMETRY_BASE_INTERVAL_S = float(os.getenv("POLYHOUSE_TELEMETRY_INTERVAL_S", "10"))
+TELEMETRY_MIN_INTERVAL_S = float(os.getenv("POLYHOUSE_TELEMETRY_MIN_INTERVAL_S", "2"))
+TELEMETRY_MAX_INTERVAL_S = float(os.getenv("POLYHOUSE_TELEMETRY_MAX_INTERVAL_S", "30"))
+
+# --- Ingestion hub for remote greenhouses/rovers ---
+HUB_TICK_S = float(os.getenv("POLYHOUSE_HUB_TICK_S", "1"))              # alerts + dashboard fan-out, batched per tick
+HUB_MAX_SOURCES = int(os.getenv("POLYHOUSE_HUB_MAX_SOURCES", "1000"))
+HUB_MAX_BATCH = int(os.getenv("POLYHOUSE_HUB_MAX_BATCH", "1000"))        # readings per ingest request/message
+HUB_STALE_AFTER_S = float(os.getenv("POLYHOUSE_HUB_STALE_AFTER_S", "60"))
+
+# --- Fleet simulator (scale testing through the ingestion hub; 0 disables it) ---
+FLEET_SIZE = int(os.getenv("POLYHOUSE_FLEET_SIZE", "0"))
+FLEET_SEED = int(os.environ["POLYHOUSE_FLEET_SEED"]) if os.getenv("POLYHOUSE_FLEET_SEED") else None
+FLEET_TICK_S = float(os.getenv("POLYHOUSE_FLEET_TICK_S", "1"))
+FLEET_TIME_SCALE = float(os.getenv("POLYHOUSE_FLEET_TIME_SCALE", "1"))  # 1440 = one simulated day per minute
+
+# --- Session record/replay (see session_recorder.py) ---
+SESSIONS_DIR = os.getenv("POLYHOUSE_SESSIONS_DIR", "sessions")
+RECORD_SESSION = os.getenv("POLYHOUSE_RECORD_SESSION")       # record the local producer from startup under this name
+REPLAY_SESSION = os.getenv("POLYHOUSE_REPLAY_SESSION")       # play this session back instead of the live sensors
+REPLAY_SPEED = os.getenv("POLYHOUSE_REPLAY_SPEED", "1")      # 1, 10, ... or "max"
+
+# --- Tiled disease detection: "full" (one label per frame), "tiled" (every frame) or "coarse_to_fine" ---
+DISEASE_MODE = os.getenv("POLYHOUSE_DISEASE_MODE", "full")
+TILE_SIZE_PX = int(os.getenv("POLYHOUSE_TILE_SIZE_PX", "240"))               # square tiles, in frame pixels
+TILE_OVERLAP = float(os.getenv("POLYHOUSE_TILE_OVERLAP", "0.25"))            # fraction shared with the neighbour
+TILE_MIN_CONFIDENCE = float(os.getenv("POLYHOUSE_TILE_MIN_CONFIDENCE", "60"))  # % for a tile to count as diseased
+TILE_AMBIGUOUS_BELOW = float(os.getenv("POLYHOUSE_TILE_AMBIGUOUS_BELOW", "80"))  # coarse_to_fine tiles when the full-frame confidence is under this
+
+# --- Manual-override control channel (/ws/control) ---
+CONTROL_DEADMAN_S = float(os.getenv("POLYHOUSE_CONTROL_DEADMAN_S", "0.5"))    # motors stop this long after the last command/heartbeat
+CONTROL_PING_S = float(os.getenv("POLYHOUSE_CONTROL_PING_S", "1"))            # server -> client ping, for round-trip latency
+CONTROL_REST_HOLD_S = float(os.getenv("POLYHOUSE_CONTROL_REST_HOLD_S", "0"))  # deadman for /api/motors/control; 0 = run until stopped
+
+# --- Alert engine: detection/state alerts resolve only after this many analysed ticks without them ---
+ALERT_CLEAR_AFTER = int(os.getenv("POLYHOUSE_ALERT_CLEAR_AFTER", "3"))     # ticks with no analysis at all don't count
+
+# --- Streaming trend/anomaly analysis (per greenhouse and metric, see trend_analyzer.py) ---
+TREND_METRICS = tuple(os.getenv("POLYHOUSE_TREND_METRICS", "temperature_internal,humidity,soil_moisture,water_level_cm").split(","))
+TREND_WINDOWS_S = tuple(float(w) for w in os.getenv("POLYHOUSE_TREND_WINDOWS_S", "600,3600").split(","))  # EWMA uses the first, forecasts the last
+TREND_FORECAST_HORIZON_S = float(os.getenv("POLYHOUSE_TREND_FORECAST_HORIZON_S", str(6 * 3600)))
+TREND_SPIKE_Z = float(os.getenv("POLYHOUSE_TREND_SPIKE_Z", "6"))                  # robust z-score of an outlier
+TREND_STUCK_METRICS = tuple(os.getenv("POLYHOUSE_TREND_STUCK_METRICS", "temperature_internal,humidity").split(","))
+TREND_STUCK_AFTER_S = float(os.getenv("POLYHOUSE_TREND_STUCK_AFTER_S", "900"))  # identical readings for this long = stuck sensor
+
+# --- Rover uplink: push the local telemetry to a central server in the packed format (see telemetry_codec.py) ---
+UPLINK_URL = os.getenv("POLYHOUSE_UPLINK_URL")                           # e.g. http://hub:8000; unset = no uplink
+UPLINK_GREENHOUSE_ID = os.getenv("POLYHOUSE_UPLINK_GREENHOUSE_ID")       # defaults to the readings' greenhouse_id
+UPLINK_BATCH = int(os.getenv("POLYHOUSE_UPLINK_BATCH", "10"))            # samples per message on a healthy link
+UPLINK_MAX_BACKLOG = int(os.getenv("POLYHOUSE_UPLINK_MAX_BACKLOG", "3600"))  # samples kept while the link is down
+UPLINK_COMPRESS = os.getenv("POLYHOUSE_UPLINK_COMPRESS", "auto")         # auto (only while the link is poor), always, never
+UPLINK_TIMEOUT_S = float(os.getenv("POLYHOUSE_UPLINK_TIMEOUT_S", "5"))
+
+# --- Alert evidence: recent JPEG frames in a fixed-size, memory-mapped ring file (see frame_store.py) ---
+FRAME_STORE_MODE = os.getenv("POLYHOUSE_FRAME_STORE_MODE", "alerts")     # alerts (only at alert time), changes (also changed scenes), off
+FRAME_STORE_PATH = os.getenv("POLYHOUSE_FRAME_STORE_PATH", "frames.ring")
+FRAME_STORE_MB = int(os.getenv("POLYHOUSE_FRAME_STORE_MB", "64"))        # preallocated once; older frames are overwritten in place
+FRAME_STORE_SLOTS = int(os.getenv("POLYHOUSE_FRAME_STORE_SLOTS", "4096"))  # index entries (frames) kept at most
+FRAME_STORE_RETENTION_S = float(os.getenv("POLYHOUSE_FRAME_STORE_RETENTION_S", str(7 * 86400)))
+FRAME_STORE_MIN_INTERVAL_S = float(os.getenv("POLYHOUSE_FRAME_STORE_MIN_INTERVAL_S", "60"))  # "changes" mode: at most one write per interval
@@ -0,0 +1,157 @@
+# backend/app/connections.py
+# WebSocket fan-out with per-client backpressure: a slow dashboard only ever delays itself.
+
+import asyncio
+import itertools
+import json
+from typing import Dict, List
+
+from fastapi import WebSocket
+
+from .config import CLIENT_QUEUE_SIZE
+from .metrics import metrics, span
+
+TELEMETRY_TOPIC = "telemetry"
+
+# How a client wants camera frames delivered
+FRAMES_BINARY = "binary"   # JPEG bytes as a separate binary WebSocket message after each JSON update
+FRAMES_BASE64 = "base64"   # legacy: base64 JPEG embedded in the JSON as data.camera_frame_base64
+FRAMES_NONE = "none"       # telemetry only
+FRAME_MODES = (FRAMES_BINARY, FRAMES_BASE64, FRAMES_NONE)
+
+# Survives disconnects, unlike the per-session counters
+dropped_total = metrics.counter("polyhouse_client_dropped_total", "Messages/frames dropped for slow clients.", label="kind")
+
+class ClientSession:
+    """One subscriber. Telemetry goes through a bounded queue (oldest dropped when full);
+    frames use a single latest-wins slot, so a slow link skips frames instead of building a backlog."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, ws: WebSocket, topic: str, frame_mode: str, queue_size: int = CLIENT_QUEUE_SIZE):
+        self.id = next(self._ids)
+        self.ws = ws
+        self.topic = topic
+        self.frame_mode = frame_mode
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.pending_frame = None
+        self.wakeup = asyncio.Event()
+        self.task = None
+        self.sent_messages = self.sent_frames = self.bytes_sent = 0
+        self.dropped_messages = self.dropped_frames = 0
+
+    def offer(self, text: str, frame: bytes = None):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped_messages += 1
+            dropped_total.inc(1, "message")
+        self.queue.put_nowait(text)
+        if frame is not None:
+            if self.pending_frame is not None:
+                self.dropped_frames += 1
+                dropped_total.inc(1, "frame")
+            self.pending_frame = frame
+        self.wakeup.set()
+
+    async def run(self):
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            while not self.queue.empty():
+                text = self.queue.get_nowait()
+                with span("client_send"):
+                    await self.ws.send_text(text)
+                self.sent_messages += 1
+                self.bytes_sent += len(text)
+            if self.pending_frame is not None:
+                frame, self.pending_frame = self.pending_frame, None
+                with span("client_send_frame"):
+                    await self.ws.send_bytes(frame)
+                self.sent_frames += 1
+                self.bytes_sent += len(frame)
+
+    def stats(self) -> dict:
+        client = self.ws.client
+        return {
+            "id": self.id, "topic": self.topic, "frame_mode": self.frame_mode,
+            "remote": f"{client.host}:{client.port}" if client else None,
+            "queue_depth": self.queue.qsize(), "frame_pending": self.pending_frame is not None,
+            "sent_messages": self.sent_messages, "sent_frames": self.sent_frames, "bytes_sent": self.bytes_sent,
+            "dropped_messages": self.dropped_messages, "dropped_frames": self.dropped_frames,
+        }
+
+class ConnectionManager:
+    """Topic based pub/sub: each message is serialized once per topic and handed to every subscriber's own sender."""
+    def __init__(self):
+        self.topics: Dict[str, List[ClientSession]] = {}
+        self.latest: Dict[str, tuple] = {}
+        self.dropped_clients = 0
+
+    async def connect(self, ws: WebSocket, topic: str = TELEMETRY_TOPIC, frame_mode: str = FRAMES_BINARY) -> ClientSession:
+        await ws.accept()
+        session = ClientSession(ws, topic, frame_mode)
+        session.task = asyncio.create_task(self._drain(session))
+        self.topics.setdefault(topic, []).append(session)
+        # Late joiners get the last snapshot right away instead of waiting a full tick
+        if topic in self.latest:
+            session.offer(*self._payload_for(session, *self.latest[topic]))
+        return session
+
+    async def _drain(self, session: ClientSession):
+        try:
+            await session.run()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.dropped_clients += 1
+            self._remove(session)
+
+    def _remove(self, session: ClientSession):
+        subscribers = self.topics.get(session.topic, [])
+        if session in subscribers: subscribers.remove(session)
+
+    def disconnect(self, ws: WebSocket):
+        for subscribers in self.topics.values():
+            for session in [s for s in subscribers if s.ws is ws]:
+                subscribers.remove(session)
+                session.task.cancel()
+
+    def subscriber_count(self, topic: str = TELEMETRY_TOPIC) -> int:
+        return len(self.topics.get(topic, []))
+
+    def frame_modes(self, topic: str = TELEMETRY_TOPIC) -> set:
+        """Which frame encodings the current subscribers need, so the producer only encodes those."""
+        return {s.frame_mode for s in self.topics.get(topic, [])} - {FRAMES_NONE}
+
+    def _payload_for(self, session: ClientSession, msg: dict, texts: dict, frame):
+        if session.frame_mode == FRAMES_BINARY and frame is not None:
+            return texts["plain"], frame.jpeg()
+        if session.frame_mode == FRAMES_BASE64 and frame is not None:
+            # Serialized at most once per message, and only if a legacy client is actually listening
+            if "base64" not in texts:
+                texts["base64"] = json.dumps({**msg, "data": {**msg["data"], "camera_frame_base64": frame.base64()}}, default=str)
+            return texts["base64"], None
+        return texts["plain"], None
+
+    async def publish(self, topic: str, msg: dict, frame=None, retain: bool = True):
+        """Send `msg` (and optionally a Frame) to every subscriber of `topic` without awaiting any of them.
+        Retained messages are replayed to clients that join later."""
+        with span("serialize"):
+            texts = {"plain": json.dumps(msg, default=str)}
+        if retain:
+            self.latest[topic] = (msg, texts, frame)
+        for session in self.topics.get(topic, []):
+            session.offer(*self._payload_for(session, msg, texts, frame))
+
+    def retain(self, topic: str, msg: dict):
+        """Set what late joiners of `topic` receive, without sending anything now."""
+        self.latest[topic] = (msg, {"plain": json.dumps(msg, default=str)}, None)
+
+    async def broadcast(self, msg: dict):
+        await self.publish(TELEMETRY_TOPIC, msg)
+
+    def stats(self) -> dict:
+        return {
+            "dropped_clients": self.dropped_clients,
+            "clients": [s.stats() for subscribers in self.topics.values() for s in subscribers],
+        }
@@ -0,0 +1,72 @@
+# backend/app/convert_model.py
+# Offline converter: Keras .h5 -> TFLite float16 / int8 for the Raspberry Pi.
+#
+# Usage (from the repository root):
+#   python -m backend.app.convert_model --quantize float16
+#   python -m backend.app.convert_model --quantize int8 --calibration-dir data/hibiscus/train
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from .frames import MODEL_INPUT_SIZE
+from .model_backends import DEFAULT_MODEL_PATHS
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp"}
+
+def load_image(path: Path) -> np.ndarray:
+    """Same preprocessing the live pipeline uses: RGB, resized to the model input size."""
+    return np.asarray(Image.open(path).convert('RGB').resize(MODEL_INPUT_SIZE), dtype=np.uint8)
+
+def find_images(folder: str):
+    return sorted(p for p in Path(folder).rglob("*") if p.suffix.lower() in IMAGE_SUFFIXES)
+
+def representative_dataset(folder: str, limit: int):
+    """Calibration samples for int8 quantization - use real polyhouse frames, not random noise."""
+    paths = find_images(folder)
+    if not paths:
+        raise SystemExit(f"❌ No calibration images found in {folder}")
+    rng = np.random.default_rng(0)
+    for path in rng.permutation(paths)[:limit]:
+        yield [load_image(path)[np.newaxis].astype(np.float32)]
+
+def convert(keras_path: str, quantize: str, output: str, calibration_dir: str = None, calibration_samples: int = 200):
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(keras_path)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    if quantize == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantize == "int8":
+        if not calibration_dir:
+            raise SystemExit("❌ int8 quantization needs --calibration-dir with representative images")
+        converter.representative_dataset = lambda: representative_dataset(calibration_dir, calibration_samples)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        # Frames are already uint8 RGB, so the Pi can feed them without a float conversion
+        converter.inference_input_type = tf.uint8
+        converter.inference_output_type = tf.float32
+    else:
+        raise SystemExit(f"❌ Unknown quantization mode '{quantize}'")
+
+    tflite_model = converter.convert()
+    Path(output).write_bytes(tflite_model)
+    print(f"✅ Wrote {quantize} model to {output} ({len(tflite_model) / 1024:.0f} KB)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the hibiscus classifier to TFLite.")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATHS["keras"], help="Keras .h5 model to convert")
+    parser.add_argument("--quantize", choices=["float16", "int8"], required=True)
+    parser.add_argument("--output", help="Output .tflite path (defaults next to the Keras model)")
+    parser.add_argument("--calibration-dir", help="Folder of representative images (required for int8)")
+    parser.add_argument("--calibration-samples", type=int, default=200)
+    args = parser.parse_args()
+
+    output = args.output or DEFAULT_MODEL_PATHS["tflite-fp16" if args.quantize == "float16" else "tflite-int8"]
+    convert(args.model, args.quantize, output, args.calibration_dir, args.calibration_samples)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# backend/app/executors.py
+# Keeps blocking device I/O and model inference off the asyncio event loop.
+
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+
+from .config import (
+    IO_WORKERS, IO_QUEUE_SIZE, IO_TIMEOUT_S,
+    INFERENCE_WORKERS, INFERENCE_QUEUE_SIZE, INFERENCE_TIMEOUT_S,
+)
+from .metrics import call_with_timings, stage_seconds
+
+class StageBusy(Exception):
+    """Raised when a stage already has its maximum number of jobs queued or running."""
+
+class PipelineStage:
+    """A bounded, timed wrapper around one executor."""
+
+    def __init__(self, name: str, executor: Executor, max_pending: int, timeout: float):
+        self.name = name
+        self.executor = executor
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def _release(self, _future=None):
+        self.pending -= 1
+
+    async def run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise StageBusy(f"{self.name} stage is full ({self.pending}/{self.max_pending})")
+
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        job = self.executor.submit(fn, *args)
+        # The slot is freed when the worker actually finishes, not when we stop waiting,
+        # so timed-out jobs still count against the bound until they drain.
+        job.add_done_callback(lambda f: loop.call_soon_threadsafe(self._release, f))
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(job), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        self.completed += 1
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending, "max_pending": self.max_pending, "timeout_s": self.timeout,
+            "completed": self.completed, "rejected": self.rejected, "timeouts": self.timeouts,
+        }
+
+class PipelineExecutor:
+    """Thread pool for device I/O, process pool for inference (so the GIL doesn't serialize it)."""
+
+    def __init__(self):
+        self.io = None
+        self.inference = None
+
+    def start(self):
+        if self.io:
+            return
+        self.io = PipelineStage(
+            "io", ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="sensor-io"),
+            IO_QUEUE_SIZE, IO_TIMEOUT_S,
+        )
+        # TensorFlow is not fork-safe, so inference workers are always spawned fresh
+        self.inference = PipelineStage(
+            "inference",
+            ProcessPoolExecutor(max_workers=INFERENCE_WORKERS, mp_context=multiprocessing.get_context("spawn")),
+            INFERENCE_QUEUE_SIZE, INFERENCE_TIMEOUT_S,
+        )
+        print(f"⚙️  Pipeline executor started ({IO_WORKERS} I/O threads, {INFERENCE_WORKERS} inference processes)")
+
+    def shutdown(self):
+        for stage in (self.io, self.inference):
+            if stage:
+                stage.executor.shutdown(wait=False, cancel_futures=True)
+        self.io = self.inference = None
+
+    async def run_io(self, fn, *args):
+        return await self.io.run(fn, *args)
+
+    async def run_inference(self, fn, *args):
+        # Stage timings recorded inside the worker process (e.g. model_predict) ride back with the result
+        result, timings = await self.inference.run(call_with_timings, fn, *args)
+        stage_seconds.merge(timings)
+        return result
+
+    async def warm_up(self, fn):
+        """Run `fn` once per inference worker, outside the stage's bound and timeout (a cold model load is slow).
+        Concurrent submissions make the pool spawn each of its workers."""
+        jobs = [asyncio.wrap_future(self.inference.executor.submit(call_with_timings, fn)) for _ in range(INFERENCE_WORKERS)]
+        results = await asyncio.gather(*jobs)
+        for _, timings in results:
+            stage_seconds.merge(timings)
+        return results[0][0]
+
+    def stats(self) -> dict:
+        return {stage.name: stage.stats() for stage in (self.io, self.inference) if stage}
+
+pipeline = PipelineExecutor()
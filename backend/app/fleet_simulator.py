@@ -0,0 +1,147 @@
+# backend/app/fleet_simulator.py
+# Telemetry for N virtual greenhouses per tick, computed as NumPy arrays, for scale-testing the ingest path.
+
+import time
+from datetime import datetime
+
+import numpy as np
+
+from .sensor_simulator import DEMO_DISEASE_ANALYSIS, DEMO_PEST_ANALYSIS
+
+# Same scenario names as MockSensorData.trigger_problem; index 0 means "no problem"
+PROBLEMS = (None, "high_temperature", "high_humidity", "low_humidity", "low_soil_moisture",
+            "high_soil_moisture", "detect_disease", "detect_pest")
+# Output offsets per problem: (temperature, humidity, soil moisture)
+PROBLEM_OFFSETS = np.array([
+    (0, 0, 0), (10, 0, 0), (0, 20, 0), (0, -25, 0), (0, 0, -30), (0, 0, 20), (0, 0, 0), (0, 0, 0),
+], dtype=float)
+
+DAY_S = 86400.0
+IRRIGATION_START, IRRIGATION_STOP = 55.0, 80.0   # soil moisture % hysteresis for the drip controller
+TANK_CAPACITY_CM = 40.0
+
+class FleetSimulator:
+    """Every field is one array over the fleet, so a tick costs the same handful of NumPy ops for 10 or 10,000
+    greenhouses. Readings are correlated the way a real house is: temperature follows the sun (plus an AR(1)
+    weather term), humidity moves against temperature, soil moisture dries faster when hot and bright and is
+    topped up by a hysteresis irrigation controller that draws down the water tank.
+    `time_scale` > 1 runs the simulated clock faster than wall time (e.g. 1440 = a day per minute)."""
+
+    def __init__(self, size: int, seed: int = None, time_scale: float = 1.0, start_time: float = None, prefix: str = "SIM"):
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.time_scale = time_scale
+        self.sim_time = start_time if start_time is not None else time.time()
+        self.ids = [f"{prefix}{i:04d}" for i in range(size)]
+        self.index = {greenhouse_id: i for i, greenhouse_id in enumerate(self.ids)}
+        rng, n = self.rng, size
+
+        # Per-greenhouse character, fixed for the run
+        self.base_temp = rng.normal(24.0, 1.5, n)
+        self.temp_amplitude = rng.uniform(3.0, 6.0, n)
+        self.phase_h = rng.uniform(-1.0, 1.0, n)          # longitude / orientation
+        self.base_humidity = rng.normal(65.0, 4.0, n)
+        self.humidity_per_degree = rng.uniform(1.5, 3.0, n)
+        self.dry_rate = rng.uniform(0.8, 1.6, n) / 3600   # % per second at noon, 24 C
+        self.irrigation_rate = rng.uniform(0.2, 0.4, n)    # % per second while the drip is on
+        self.base_ph = rng.normal(6.2, 0.15, n)
+        self.base_ec = rng.normal(1.8, 0.1, n)
+
+        # Evolving state
+        self.weather = np.zeros(n)                         # AR(1) temperature anomaly, C
+        self.cloud = rng.uniform(0.7, 1.0, n)              # fraction of sunlight getting through
+        self.soil_temp = self.base_temp - 2.0
+        self.soil_moisture = rng.uniform(60.0, 80.0, n)
+        self.irrigating = np.zeros(n, dtype=bool)
+        self.tank_cm = rng.uniform(25.0, TANK_CAPACITY_CM, n)
+        self.ph = self.base_ph.copy()
+        self.ec = self.base_ec.copy()
+        self.problems = np.zeros(n, dtype=np.int8)
+
+    # --- Scenarios ---
+    def trigger_problem(self, greenhouse_id: str, problem_type: str):
+        if problem_type not in PROBLEMS[1:]:
+            raise ValueError(f"Unknown problem '{problem_type}'. Choose from: {', '.join(PROBLEMS[1:])}")
+        self.problems[self._index(greenhouse_id)] = PROBLEMS.index(problem_type)
+        print(f"🎭 Fleet: Triggered problem '{problem_type}' in {greenhouse_id}")
+
+    def clear_problem(self, greenhouse_id: str = None):
+        if greenhouse_id is None:
+            self.problems[:] = 0
+        else:
+            self.problems[self._index(greenhouse_id)] = 0
+
+    def _index(self, greenhouse_id: str) -> int:
+        if greenhouse_id not in self.index:
+            raise ValueError(f"Unknown simulated greenhouse '{greenhouse_id}'")
+        return self.index[greenhouse_id]
+
+    # --- Simulation ---
+    def step(self, dt: float) -> dict:
+        """Advance the fleet by `dt` wall-clock seconds and return the new readings as {field: array}."""
+        rng, n = self.rng, self.size
+        sim_dt = dt * self.time_scale
+        self.sim_time += sim_dt
+        hour = (self.sim_time % DAY_S) / 3600 + self.phase_h
+        sun = np.clip(np.sin(2 * np.pi * (hour - 6) / 24), 0, None)
+
+        # Weather and cloud drift slowly (AR(1)), so neighbouring ticks stay correlated
+        keep = np.exp(-sim_dt / 3600)
+        self.weather = keep * self.weather + np.sqrt(1 - keep ** 2) * rng.normal(0, 1.2, n)
+        self.cloud = np.clip(keep * self.cloud + (1 - keep) * 0.85 + rng.normal(0, 0.02, n), 0.2, 1.0)
+
+        temp = self.base_temp + self.temp_amplitude * np.sin(2 * np.pi * (hour - 9) / 24) + self.weather
+        self.soil_temp += (temp - 2.0 - self.soil_temp) * (1 - np.exp(-sim_dt / (3 * 3600)))
+        humidity = self.base_humidity - self.humidity_per_degree * (temp - self.base_temp) + rng.normal(0, 1.0, n)
+        light = 1200 * sun * self.cloud
+
+        # Soil dries with heat and light; the drip controller switches on/off with hysteresis
+        drying = self.dry_rate * (0.3 + sun) * np.clip(1 + (temp - 24) / 20, 0.2, None) * sim_dt
+        self.irrigating = (self.soil_moisture < IRRIGATION_START) | (self.irrigating & (self.soil_moisture < IRRIGATION_STOP))
+        self.irrigating &= self.tank_cm > 1.0
+        # Capped at the stop level so a large (time-scaled) step can't overshoot it
+        needed = np.clip(IRRIGATION_STOP - self.soil_moisture + drying, 0, None)
+        watering = np.where(self.irrigating, np.minimum(self.irrigation_rate * sim_dt, needed), 0.0)
+        self.soil_moisture = np.clip(self.soil_moisture - drying + watering, 0, 100)
+        self.tank_cm = np.clip(self.tank_cm - watering * 0.05 + 0.002 * sim_dt, 0, TANK_CAPACITY_CM)
+
+        self.ph = self.base_ph + 0.98 * (self.ph - self.base_ph) + rng.normal(0, 0.01, n)
+        self.ec = self.base_ec + 0.98 * (self.ec - self.base_ec) + rng.normal(0, 0.005, n)
+        co2 = 420 + 60 * (1 - sun) - 40 * sun * self.cloud + rng.normal(0, 5, n)
+
+        offsets = PROBLEM_OFFSETS[self.problems]
+        return {
+            "temperature_internal": np.round(temp + offsets[:, 0], 1),
+            "temperature_external": np.round(temp - 3 - 2 * sun + rng.normal(0, 0.5, n), 1),
+            "temperature_soil": np.round(self.soil_temp, 1),
+            "humidity": np.round(np.clip(humidity + offsets[:, 1], 0, 100), 1),
+            "soil_moisture": np.round(np.clip(self.soil_moisture + offsets[:, 2], 0, 100), 1),
+            "water_level_cm": np.round(self.tank_cm, 1),
+            "motion_detected": rng.random(n) < 0.02,
+            "light_par": np.round(light, 1),
+            "co2_level": np.round(co2, 1),
+            "soil_ph": np.round(self.ph, 1),
+            "soil_ec": np.round(self.ec, 2),
+            "irrigating": self.irrigating.copy(),
+        }
+
+    def records(self, columns: dict) -> list:
+        """Columns from step() -> one reading dict per greenhouse, shaped like MockSensorData.get_all_data()."""
+        # Stamped with wall time: the simulated clock only drives the diurnal cycle (and may run fast)
+        timestamp = datetime.now().isoformat()
+        names = list(columns)
+        rows = zip(*(columns[name].tolist() for name in names))
+        records = []
+        for greenhouse_id, row, problem in zip(self.ids, rows, self.problems.tolist()):
+            record = dict(zip(names, row))
+            record["timestamp"] = timestamp
+            record["greenhouse_id"] = greenhouse_id
+            if PROBLEMS[problem] == "detect_disease":
+                record["disease_analysis"] = DEMO_DISEASE_ANALYSIS
+            elif PROBLEMS[problem] == "detect_pest":
+                record["pest_analysis"] = DEMO_PEST_ANALYSIS
+            records.append(record)
+        return records
+
+    def tick(self, dt: float) -> list:
+        return self.records(self.step(dt))
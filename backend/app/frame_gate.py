@@ -0,0 +1,75 @@
+# backend/app/frame_gate.py
+# Skips inference on frames that look the same as one we've already analysed (parked rover, static scene).
+
+import time
+from collections import OrderedDict
+from threading import Lock
+
+import cv2
+import numpy as np
+
+from .config import FRAME_GATE_CACHE_SIZE, FRAME_GATE_MAX_DISTANCE, FRAME_GATE_REFRESH_S
+
+def dhash(image: np.ndarray, size: int = 8) -> int:
+    """64-bit difference hash: sign of horizontal gradients on a (size+1) x size grayscale thumbnail."""
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY) if image.ndim == 3 else image
+    thumb = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (thumb[:, 1:] > thumb[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def prepare_frame(frame):
+    """Frame -> (model input, its dHash). Decode/resize happens once; every analyzer consumes the same input."""
+    model_input = frame.model_input()
+    return model_input, dhash(model_input)
+
+class FrameChangeGate:
+    """LRU of analysis results keyed by perceptual hash. A frame within `max_distance` bits of a cached hash
+    reuses that result, unless the entry is older than `refresh_s` (so results never go stale)."""
+
+    def __init__(self, capacity: int = FRAME_GATE_CACHE_SIZE, max_distance: int = FRAME_GATE_MAX_DISTANCE,
+                 refresh_s: float = FRAME_GATE_REFRESH_S):
+        self.capacity = capacity
+        self.max_distance = max_distance
+        self.refresh_s = refresh_s
+        self.cache = OrderedDict()  # hash -> (result, computed_at)
+        self.lock = Lock()
+        self.hits = self.misses = self.expired = 0
+
+    def lookup(self, fingerprint: int):
+        """Return a cached result for a similar frame, or None if inference must run."""
+        now = time.monotonic()
+        with self.lock:
+            best, best_distance = None, self.max_distance + 1
+            for key in self.cache:
+                distance = (key ^ fingerprint).bit_count()
+                if distance < best_distance:
+                    best, best_distance = key, distance
+            if best is None:
+                self.misses += 1
+                return None
+            result, computed_at = self.cache[best]
+            if now - computed_at > self.refresh_s:
+                # Forced refresh: drop it so the fresh result replaces it
+                del self.cache[best]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self.cache.move_to_end(best)
+            self.hits += 1
+            return result
+
+    def store(self, fingerprint: int, result: dict):
+        with self.lock:
+            self.cache[fingerprint] = (result, time.monotonic())
+            self.cache.move_to_end(fingerprint)
+            while len(self.cache) > self.capacity:
+                self.cache.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits, "misses": self.misses, "expired": self.expired,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "cached": len(self.cache), "capacity": self.capacity,
+            "max_distance": self.max_distance, "refresh_s": self.refresh_s,
+        }
@@ -0,0 +1,218 @@
+# backend/app/frame_store.py
+# Alert evidence: the frames behind AI detections, kept in one preallocated, memory-mapped ring file.
+#
+# File layout (little-endian):
+#   header   magic, version, slot count, data size, next frame id, write position
+#   index    `slots` fixed-size records (frame id, position, length, reason, stored-at ts); id N is in slot N % slots
+#   data     JPEG bytes back to back. When a frame doesn't fit before the end, the write wraps to the start.
+# Positions are logical (they only ever grow); a frame is still intact while the write position is less than one
+# data size past it. Nothing is ever deleted or compacted: old frames are simply overwritten, so each stored frame
+# costs its JPEG bytes plus one index record. Writes happen only at alert time, or on scene changes if configured.
+
+import mmap
+import os
+import time
+from pathlib import Path
+from threading import Lock
+
+import numpy as np
+from starlette.responses import Response
+
+from .config import (FRAME_STORE_PATH, FRAME_STORE_MB, FRAME_STORE_SLOTS, FRAME_STORE_RETENTION_S,
+                     FRAME_STORE_MIN_INTERVAL_S, FRAME_GATE_MAX_DISTANCE)
+from .frame_gate import dhash
+from .frames import Frame
+
+MAGIC = b"PHFRING1"
+VERSION = 1
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("version", "<u4"), ("slots", "<u4"), ("data_size", "<u8"),
+                         ("next_id", "<u8"), ("position", "<u8")])
+INDEX_DTYPE = np.dtype([("id", "<u8"), ("position", "<u8"), ("length", "<u4"), ("reason", "u1"), ("ts", "<f8")])
+REASONS = ("alert", "change")
+PAGE = 4096
+CHUNK = 64 * 1024  # bytes per body message when serving a frame
+
+class FrameStore:
+    def __init__(self, path: str = FRAME_STORE_PATH, size_mb: int = FRAME_STORE_MB, slots: int = FRAME_STORE_SLOTS,
+                 retention_s: float = FRAME_STORE_RETENTION_S, min_interval_s: float = FRAME_STORE_MIN_INTERVAL_S):
+        self.path = Path(path)
+        self.slots = slots
+        self.data_size = size_mb * 1024 * 1024
+        self.retention_s = retention_s
+        self.min_interval_s = min_interval_s
+        self.data_offset = -(-(HEADER_DTYPE.itemsize + slots * INDEX_DTYPE.itemsize) // PAGE) * PAGE
+        self._lock = Lock()
+        self._last = (None, None, None)  # (frame object, dhash, frame id) of the newest stored frame
+        self.writes = self.reused = self.bytes_written = 0
+        self._mm = None
+        # Logical end of the newest write, set *before* its bytes land. Readers check against this rather than the
+        # header position (only advanced once the write is done), so a frame being overwritten is already invalid.
+        self._claimed = 0
+
+    def open(self):
+        total = self.data_offset + self.data_size
+        self._file = open(self.path, "r+b" if self.path.exists() else "w+b")
+        fresh = os.fstat(self._file.fileno()).st_size != total
+        if fresh:
+            # Allocated once, up front: the file never grows, so the filesystem metadata isn't rewritten per frame
+            self._file.truncate(total)
+            if hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(self._file.fileno(), 0, total)
+        self._mm = mmap.mmap(self._file.fileno(), total)
+        self.header = np.frombuffer(self._mm, HEADER_DTYPE, 1)
+        self.index = np.frombuffer(self._mm, INDEX_DTYPE, self.slots, HEADER_DTYPE.itemsize)
+        self.data = memoryview(self._mm)[self.data_offset:]
+        h = self.header[0]
+        if fresh or h["magic"] != MAGIC or h["version"] != VERSION or h["slots"] != self.slots or h["data_size"] != self.data_size:
+            if not fresh:
+                print(f"🗑️ Frame store layout changed, starting {self.path} afresh")
+            self.header[0] = (MAGIC, VERSION, self.slots, self.data_size, 1, 0)
+            self.index[:] = 0  # id 0 is never used, so zeroed slots are empty
+        else:
+            print(f"🖼️ Frame store reopened: {self.stats()['frames']} frames, next id {int(h['next_id'])}")
+        self._claimed = int(self.header[0]["position"])
+
+    def close(self):
+        with self._lock:
+            if self._mm is None:
+                return
+            self._mm.flush()
+            self.header = self.index = self.data = None
+            try:
+                self._mm.close()
+            except BufferError:
+                pass  # a response is still streaming from the map; it goes when the process does
+            self._mm = None
+            self._file.close()
+
+    # --- Writes ---
+    def store(self, frame: Frame, reason: str = "alert") -> int:
+        """Keep `frame` and return its id (None while the store is closed). A frame that looks like the newest
+        stored one reuses that id instead."""
+        if self._mm is None:
+            return None
+        fingerprint = dhash(frame.model_input())
+        with self._lock:
+            last_frame, last_hash, last_id = self._last
+            if last_id is not None and self._intact(last_id) and (
+                    frame is last_frame or (last_hash ^ fingerprint).bit_count() <= FRAME_GATE_MAX_DISTANCE):
+                self.reused += 1
+                return last_id
+        jpeg = frame.jpeg()  # outside the lock: may encode
+        with self._lock:
+            if self._mm is None:
+                return None
+            frame_id = self._append(jpeg, time.time(), REASONS.index(reason))
+            self._last = (frame, fingerprint, frame_id)
+            return frame_id
+
+    def store_if_changed(self, frame: Frame) -> int:
+        """"changes" mode: keep the scene when it differs from the newest stored frame, at most once per min_interval_s."""
+        if self._mm is None:
+            return None
+        last_id = self._last[2]
+        if last_id is not None and self._intact(last_id) and time.time() - self.index[last_id % self.slots]["ts"] < self.min_interval_s:
+            return None
+        return self.store(frame, "change")
+
+    def _append(self, jpeg: bytes, ts: float, reason: int) -> int:
+        if len(jpeg) > self.data_size:
+            raise ValueError(f"Frame of {len(jpeg)} bytes is larger than the frame store")
+        h = self.header[0]
+        position = int(h["position"])
+        offset = position % self.data_size
+        if offset + len(jpeg) > self.data_size:
+            position += self.data_size - offset  # wrap rather than split a frame across the end
+            offset = 0
+        self._claimed = position + len(jpeg)
+        self.data[offset:offset + len(jpeg)] = jpeg
+        # Data reaches the disk before the index record that points at it, so a crash never indexes half a frame
+        start = (self.data_offset + offset) // mmap.ALLOCATIONGRANULARITY * mmap.ALLOCATIONGRANULARITY
+        self._mm.flush(start, self.data_offset + offset + len(jpeg) - start)
+        frame_id = int(h["next_id"])
+        self.index[frame_id % self.slots] = (frame_id, position, len(jpeg), reason, ts)
+        self.header["next_id"] = frame_id + 1
+        self.header["position"] = position + len(jpeg)
+        self.writes += 1
+        self.bytes_written += len(jpeg) + INDEX_DTYPE.itemsize
+        return frame_id
+
+    # --- Reads ---
+    def _intact(self, frame_id: int) -> bool:
+        if self._mm is None:
+            return False
+        entry = self.index[frame_id % self.slots]
+        return (int(entry["id"]) == frame_id and frame_id > 0
+                and max(self._claimed, int(self.header[0]["position"])) <= int(entry["position"]) + self.data_size)
+
+    def _live(self, frame_id: int, now: float) -> bool:
+        return self._intact(frame_id) and self.index[frame_id % self.slots]["ts"] >= now - self.retention_s
+
+    def get(self, frame_id: int) -> tuple:
+        """(memoryview of the JPEG inside the map, stored_at), or None once it's expired or overwritten."""
+        if not self._live(frame_id, time.time()):
+            return None
+        entry = self.index[frame_id % self.slots]
+        offset = int(entry["position"]) % self.data_size
+        return self.data[offset:offset + int(entry["length"])], float(entry["ts"])
+
+    def response(self, frame_id: int):
+        found = self.get(frame_id)
+        return FrameResponse(self, frame_id, *found) if found else None
+
+    def _valid_mask(self, now: float) -> np.ndarray:
+        index, position = self.index, max(self._claimed, int(self.header[0]["position"]))
+        return ((index["id"] > 0) & (index["position"] + np.uint64(self.data_size) >= np.uint64(position))
+                & (index["ts"] >= now - self.retention_s))
+
+    def lookup(self, at: float = None, limit: int = 50) -> list:
+        """The newest frames (at or before `at`, if given), newest first."""
+        if self._mm is None:
+            return []
+        now = time.time()
+        valid = self._valid_mask(now)
+        if at is not None:
+            valid &= self.index["ts"] <= at
+        entries = self.index[valid]
+        entries = entries[np.argsort(entries["id"])[::-1][:limit]]
+        return [{"frame_id": int(e["id"]), "stored_at": float(e["ts"]), "bytes": int(e["length"]),
+                 "reason": REASONS[e["reason"]]} for e in entries]
+
+    def stats(self) -> dict:
+        if self._mm is None:
+            return {"path": str(self.path), "open": False}
+        valid = self._valid_mask(time.time())
+        ts = self.index["ts"][valid]
+        position = int(self.header[0]["position"])
+        return {
+            "path": str(self.path), "size_mb": self.data_size // (1024 * 1024), "slots": self.slots,
+            "frames": int(valid.sum()), "oldest": float(ts.min()) if len(ts) else None,
+            "retention_s": self.retention_s, "wraps": position // self.data_size,
+            "next_id": int(self.header[0]["next_id"]),
+            "writes": self.writes, "reused": self.reused, "bytes_written": self.bytes_written,
+        }
+
+class FrameResponse(Response):
+    """Sends a stored JPEG straight from the memory map, in slices; only the last slice is copied. The frame is
+    re-checked after each slice goes out and after the last one is copied, so if the ring overwrites it mid-send
+    the response is cut short rather than finished with wrong pixels."""
+
+    media_type = "image/jpeg"
+
+    def __init__(self, store: FrameStore, frame_id: int, view: memoryview, stored_at: float):
+        super().__init__(headers={"content-length": str(len(view)), "x-frame-id": str(frame_id),
+                                  "x-stored-at": str(stored_at), "cache-control": "max-age=86400, immutable"})
+        self.store, self.frame_id, self.view = store, frame_id, view
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        for start in range(0, len(self.view), CHUNK):
+            more = start + CHUNK < len(self.view)
+            body = self.view[start:start + CHUNK]
+            if not more:
+                body = bytes(body)  # nothing is checked after the last send, so it can't be read from the live map
+            if not self.store._intact(self.frame_id):
+                raise RuntimeError(f"Frame {self.frame_id} was overwritten while being sent")
+            await send({"type": "http.response.body", "body": body, "more_body": more})
+        if not len(self.view):
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
@@ -0,0 +1,72 @@
+# backend/app/frames.py
+# A camera frame that carries raw pixels through the pipeline and only encodes on demand.
+
+import base64
+import time
+from threading import Lock
+
+import cv2
+import numpy as np
+
+MODEL_INPUT_SIZE = (180, 180)
+
+class Frame:
+    """Raw HxWx3 uint8 frame with lazily computed (and cached) JPEG, base64 and model-input views."""
+
+    def __init__(self, image: np.ndarray = None, jpeg: bytes = None, color_order: str = "BGR", captured_at: float = None):
+        if image is None and jpeg is None:
+            raise ValueError("Frame needs either raw pixels or JPEG bytes")
+        self._image = image
+        self._jpeg = jpeg
+        self._base64 = None
+        self._model_inputs = {}
+        self._lock = Lock()
+        self.color_order = color_order
+        self.captured_at = captured_at or time.time()
+
+    @classmethod
+    def from_jpeg(cls, jpeg: bytes, captured_at: float = None) -> "Frame":
+        return cls(jpeg=jpeg, captured_at=captured_at)
+
+    @property
+    def image(self) -> np.ndarray:
+        """Raw pixels in `color_order`; decoded once if the frame arrived as JPEG."""
+        with self._lock:
+            if self._image is None:
+                self._image = cv2.imdecode(np.frombuffer(self._jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+                self.color_order = "BGR"
+            return self._image
+
+    @property
+    def shape(self):
+        return self.image.shape
+
+    def rgb(self) -> np.ndarray:
+        image = self.image
+        return image if self.color_order == "RGB" else cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+    def bgr(self) -> np.ndarray:
+        image = self.image
+        return image if self.color_order == "BGR" else cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+
+    def model_input(self, size=MODEL_INPUT_SIZE) -> np.ndarray:
+        """Shared preprocessing: RGB uint8 resized to the model's input size, computed once per frame."""
+        cached = self._model_inputs.get(size)
+        if cached is None:
+            # Resize before the colour conversion so we only convert the small image
+            small = cv2.resize(self.image, size, interpolation=cv2.INTER_AREA)
+            cached = small if self.color_order == "RGB" else cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+            self._model_inputs[size] = cached
+        return cached
+
+    def jpeg(self) -> bytes:
+        """JPEG bytes, encoded only the first time a client actually needs pixels."""
+        if self._jpeg is None:
+            _, buffer = cv2.imencode('.jpg', self.bgr())
+            self._jpeg = buffer.tobytes()
+        return self._jpeg
+
+    def base64(self) -> str:
+        if self._base64 is None:
+            self._base64 = base64.b64encode(self.jpeg()).decode('utf-8')
+        return self._base64
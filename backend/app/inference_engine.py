@@ -0,0 +1,197 @@
+# backend/app/inference_engine.py
+# Micro-batching front end for the classifier: many callers, one forward pass per batch.
+
+import asyncio
+import time
+from collections import Counter, deque
+
+import numpy as np
+
+from .ai_models import analyze_batch
+from .config import INFERENCE_MAX_BATCH, INFERENCE_MAX_WAIT_MS, INFERENCE_QUEUE_SIZE, INFERENCE_WORKERS, DISEASE_MODE, TILE_AMBIGUOUS_BELOW
+from .executors import pipeline, StageBusy
+from .frame_gate import prepare_frame
+from .metrics import span, stage_seconds
+from .readiness import readiness, FAILED
+from .tiling import prepare_tiles, merge_regions, with_regions
+
+# inference_status values while no analysis can be produced
+MODEL_WARMING_UP, MODEL_UNAVAILABLE = "model warming up", "model unavailable"
+
+class BatchInferenceEngine:
+    """Collects preprocessed frames from any number of sources and flushes them as one batch
+    when either `max_batch_size` frames are waiting or the oldest has waited `max_wait_s`."""
+
+    def __init__(self, max_batch_size: int = INFERENCE_MAX_BATCH, max_wait_ms: float = INFERENCE_MAX_WAIT_MS,
+                 max_queued: int = INFERENCE_MAX_BATCH * INFERENCE_QUEUE_SIZE, max_in_flight: int = INFERENCE_WORKERS):
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000
+        self.max_queued = max_queued
+        self.max_in_flight = max_in_flight
+        self.queue = None
+        self.task = None
+        self._running = set()
+        self.batch_sizes = Counter()
+        self.queue_latencies = deque(maxlen=1024)
+        self.batch_durations = deque(maxlen=256)
+        self.frames = 0
+        self.rejected = 0
+        self.errors = 0
+
+    def start(self):
+        if self.task:
+            return
+        self.queue = asyncio.Queue(maxsize=self.max_queued)
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self.task = asyncio.create_task(self._collect())
+
+    async def stop(self):
+        """Stop collecting; every caller still waiting (queued, being batched or mid-forward-pass) gets StageBusy."""
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        running = list(self._running)
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        while self.queue is not None and not self.queue.empty():
+            _fail(self.queue.get_nowait()[2])
+
+    async def submit(self, model_input: np.ndarray) -> dict:
+        """Queue one preprocessed frame and wait for its analysis dict."""
+        return (await self._enqueue(np.expand_dims(model_input, 0)))[0]
+
+    async def submit_many(self, model_inputs) -> list:
+        """Queue several frames (e.g. tiles of one image) and wait for all of them."""
+        return await asyncio.gather(*(self.submit(model_input) for model_input in model_inputs))
+
+    async def submit_together(self, model_inputs: np.ndarray) -> list:
+        """Queue frames that belong together (the tiles of one image) as one item: they are never split across
+        batches, so they go through a single forward pass, even if that exceeds `max_batch_size`."""
+        return await self._enqueue(np.asarray(model_inputs))
+
+    async def _enqueue(self, model_inputs: np.ndarray) -> list:
+        if self.task is None:
+            raise StageBusy("inference engine is not running")
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((model_inputs, time.perf_counter(), future))
+        except asyncio.QueueFull:
+            self.rejected += len(model_inputs)
+            raise StageBusy(f"inference queue is full ({self.max_queued} items)")
+        return await future
+
+    async def _collect(self):
+        while True:
+            # Only start gathering once a worker is free; frames keep queueing meanwhile, so batches grow under load
+            await self._slots.acquire()
+            batch = [await self.queue.get()]
+            size = len(batch[0][0])
+            deadline = batch[0][1] + self.max_wait_s
+            try:
+                while size < self.max_batch_size:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                    size += len(batch[-1][0])
+            except asyncio.CancelledError:
+                # Stopped while gathering: these are off the queue but not yet in a batch task
+                for _, _, future in batch:
+                    _fail(future)
+                raise
+            task = asyncio.create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch):
+        dispatched = time.perf_counter()
+        sizes = [len(model_inputs) for model_inputs, _, _ in batch]
+        self.batch_sizes[sum(sizes)] += 1
+        self.frames += sum(sizes)
+        for _, queued_at, _ in batch:
+            self.queue_latencies.append(dispatched - queued_at)
+            stage_seconds.observe("inference_queue_wait", dispatched - queued_at)
+        try:
+            results = await pipeline.run_inference(analyze_batch, np.concatenate([model_inputs for model_inputs, _, _ in batch]))
+        except asyncio.CancelledError:
+            for _, _, future in batch:
+                _fail(future)
+            raise
+        except Exception as e:
+            self.errors += sum(sizes)
+            for _, _, future in batch:
+                if not future.done(): future.set_exception(e)
+        else:
+            # The classifier reports failures as an "Error" class rather than raising
+            self.errors += sum(r["disease_analysis"]["overall_health"] == "Error" for r in results)
+            offset = 0
+            for (_, _, future), size in zip(batch, sizes):
+                if not future.done(): future.set_result(results[offset:offset + size])
+                offset += size
+        finally:
+            self.batch_durations.append(time.perf_counter() - dispatched)
+            stage_seconds.observe("inference_batch", self.batch_durations[-1])
+            self._slots.release()
+
+    def stats(self) -> dict:
+        batches = sum(self.batch_sizes.values())
+        return {
+            "max_batch_size": self.max_batch_size, "max_wait_ms": self.max_wait_s * 1000,
+            "frames": self.frames, "batches": batches, "rejected": self.rejected, "errors": self.errors,
+            "queued": self.queue.qsize() if self.queue else 0,
+            "mean_batch_size": round(self.frames / batches, 2) if batches else 0,
+            "batch_size_histogram": dict(sorted(self.batch_sizes.items())),
+            "queue_latency_ms": _percentiles_ms(self.queue_latencies),
+            "batch_duration_ms": _percentiles_ms(self.batch_durations),
+        }
+
+def _fail(future: asyncio.Future):
+    if not future.done(): future.set_exception(StageBusy("inference engine stopped"))
+
+def _percentiles_ms(samples_s) -> dict:
+    if not samples_s:
+        return {"p50": None, "p99": None}
+    p50, p99 = np.percentile(np.array(samples_s) * 1000, [50, 99])
+    return {"p50": round(float(p50), 2), "p99": round(float(p99), 2)}
+
+inference_engine = BatchInferenceEngine()
+
+async def run_analysis(frame, gate) -> tuple:
+    """Readiness check, change gate, then the shared batcher. Returns (analysis or None, inference_status or None).
+    StageBusy/TimeoutError propagate so each caller decides whether to skip or retry."""
+    if not readiness.is_ready("model"):
+        return None, MODEL_UNAVAILABLE if readiness.state("model") == FAILED else MODEL_WARMING_UP
+    with span("frame_prepare"):
+        model_input, fingerprint = await pipeline.run_io(prepare_frame, frame)
+    analysis = gate.lookup(fingerprint)
+    if analysis is None:
+        with span("inference"):
+            if DISEASE_MODE == "tiled":
+                analysis = await tiled_analysis(frame, model_input)
+            else:
+                analysis = await inference_engine.submit(model_input)
+                disease = analysis["disease_analysis"]
+                # coarse_to_fine: a confident whole-frame answer stands; only borderline frames pay for tiles
+                if (DISEASE_MODE == "coarse_to_fine" and disease["overall_health"] != "Error"
+                        and disease["confidence"] < TILE_AMBIGUOUS_BELOW):
+                    analysis = await tiled_analysis(frame, full=analysis)
+        gate.store(fingerprint, analysis)
+    return analysis, None
+
+async def tiled_analysis(frame, model_input: np.ndarray = None, full: dict = None) -> dict:
+    """Score overlapping tiles in one forward pass (with the whole frame too, unless `full` already has its
+    analysis) and add the merged diseased regions to `disease_analysis`."""
+    with span("tile_prepare"):
+        tiles, boxes, grid = await pipeline.run_io(prepare_tiles, frame)
+    inputs = tiles if full is not None else np.concatenate([model_input[None], tiles])
+    with span("tile_inference"):
+        results = await inference_engine.submit_together(inputs)
+    if full is None:
+        full, results = results[0], results[1:]
+    regions = merge_regions(boxes, grid, [result["disease_analysis"] for result in results])
+    return with_regions(full, regions, len(boxes))
@@ -0,0 +1,264 @@
+# backend/app/ingest_hub.py
+# Remote greenhouses and rovers push telemetry and frames here. Every source shares one history store,
+# one alert engine and one inference engine; dashboards subscribe per greenhouse or to the fleet view.
+
+import asyncio
+import time
+from collections import deque
+
+from .config import HUB_TICK_S, HUB_MAX_SOURCES, HUB_MAX_BATCH, HUB_STALE_AFTER_S
+from .connections import ConnectionManager, FRAMES_BASE64
+from .executors import pipeline, StageBusy
+from .frame_gate import FrameChangeGate
+from .inference_engine import run_analysis
+from .metrics import span
+from .timeseries_store import TimeSeriesStore, to_epoch
+
+FLEET_TOPIC = "fleet"
+SUMMARY_METRICS = ("temperature_internal", "humidity", "soil_moisture", "water_level_cm")
+
+def greenhouse_topic(greenhouse_id: str) -> str:
+    return f"greenhouse:{greenhouse_id}"
+
+class SourceState:
+    """Latest view of one greenhouse/rover. Frames keep a latest-wins slot so at most one is being analysed."""
+
+    def __init__(self, source_id: str, local: bool = False):
+        self.id = source_id
+        self.local = local                   # the app's own simulator/Pi source, published by the telemetry producer
+        self.rover_id = None
+        self.latest = {}
+        self.last_seen = None                # epoch of the newest reading
+        self.analysis = None
+        self.analyzed_frame = None           # the frame `analysis` came from: alert evidence
+        self.inference_status = None
+        self.alerts = []
+        self.frame = None                    # newest frame, not yet published
+        self.pending_frame = None            # newest frame, not yet analysed
+        self.analyzing = None
+        self.gate = FrameChangeGate(capacity=4)
+        self.samples = deque(maxlen=HUB_MAX_BATCH)  # readings since the last tick, for the trends
+        self.readings = self.frames = self.skipped_frames = 0
+
+    def summary(self, now: float) -> dict:
+        levels = {}
+        for alert in self.alerts:
+            levels[alert.get("level")] = levels.get(alert.get("level"), 0) + 1
+        return {
+            "greenhouse_id": self.id, "rover_id": self.rover_id, "local": self.local,
+            "last_seen": self.last_seen, "online": self.last_seen is not None and now - self.last_seen < HUB_STALE_AFTER_S,
+            "metrics": {m: self.latest.get(m) for m in SUMMARY_METRICS if m in self.latest},
+            # Local snapshots already carry their analysis; remote ones get it merged at publish time
+            "overall_health": (self.analysis or self.latest).get("disease_analysis", {}).get("overall_health"),
+            "inference_status": self.inference_status, "alerts": levels,
+            "readings": self.readings, "frames": self.frames,
+        }
+
+class IngestHub:
+    """Ingest calls only buffer readings and update in-memory state. History writes (one I/O job), alert
+    evaluation (one vectorised pass over every source that changed) and dashboard fan-out happen once per
+    `tick_s`, so cost grows with the number of sources that changed rather than with the request rate."""
+
+    def __init__(self, manager: ConnectionManager, history_store: TimeSeriesStore, monitor,
+                 tick_s: float = HUB_TICK_S, max_sources: int = HUB_MAX_SOURCES):
+        self.manager = manager
+        self.history_store = history_store
+        self.monitor = monitor
+        self.tick_s = tick_s
+        self.max_sources = max_sources
+        self.sources = {}
+        self.dirty = set()
+        # Bounded so a wedged history store can't take the server down; the oldest readings go first
+        self.pending_history = deque(maxlen=HUB_MAX_BATCH * 100)
+        self.task = None
+
+    def start(self):
+        if not self.task:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+        for state in self.sources.values():
+            if state.analyzing: state.analyzing.cancel()
+
+    def topic_for(self, greenhouse_id: str, local_topic: str) -> str:
+        """Dashboards asking for the local greenhouse get the producer's own topic."""
+        state = self.sources.get(greenhouse_id)
+        return local_topic if state and state.local else greenhouse_topic(greenhouse_id)
+
+    def _source(self, source_id: str) -> SourceState:
+        state = self.sources.get(source_id)
+        if state is None:
+            if not source_id:
+                raise ValueError("greenhouse_id is required")
+            if len(self.sources) >= self.max_sources:
+                raise ValueError(f"Source limit reached ({self.max_sources}); set POLYHOUSE_HUB_MAX_SOURCES")
+            state = self.sources[source_id] = SourceState(source_id)
+            print(f"🛰️ New ingest source: {source_id}")
+        return state
+
+    # --- Ingest ---
+    def ingest(self, source_id: str, readings: list, rover_id: str = None) -> int:
+        """Accept a batch of readings (in any order; they're sorted by timestamp here)."""
+        if len(readings) > HUB_MAX_BATCH:
+            raise ValueError(f"At most {HUB_MAX_BATCH} readings per batch")
+        state = self._source(source_id)
+        now = time.time()
+        records = []
+        for reading in readings:
+            if not isinstance(reading, dict):
+                raise ValueError("Each reading must be a JSON object")
+            records.append((to_epoch(reading.get("timestamp")) or now, {**reading, "greenhouse_id": source_id}))
+        if not records:
+            return 0
+        records.sort(key=lambda record: record[0])
+        self.pending_history.extend((source_id, ts, data) for ts, data in records)
+        state.samples.extend(data for _, data in records)
+        ts, data = records[-1]
+        # A delayed batch still lands in history but never replaces a newer latest state
+        if state.last_seen is None or ts >= state.last_seen:
+            state.latest, state.last_seen = data, ts
+        state.rover_id = rover_id or state.rover_id
+        state.readings += len(records)
+        self.dirty.add(source_id)
+        return len(records)
+
+
+    def ingest_frame(self, source_id: str, frame, rover_id: str = None):
+        """Accept a frame without waiting for inference; a newer frame replaces one that hasn't been analysed yet."""
+        state = self._source(source_id)
+        state.rover_id = rover_id or state.rover_id
+        state.frames += 1
+        state.frame = frame
+        if state.pending_frame is not None:
+            state.skipped_frames += 1
+        state.pending_frame = frame
+        if state.analyzing is None:
+            state.analyzing = asyncio.create_task(self._analyze(state))
+        self.dirty.add(source_id)
+
+    async def _analyze(self, state: SourceState):
+        try:
+            while state.pending_frame is not None:
+                frame, state.pending_frame = state.pending_frame, None
+                try:
+                    analysis, state.inference_status = await run_analysis(frame, state.gate)
+                except (StageBusy, asyncio.TimeoutError):
+                    # Shared engine is saturated: drop this frame, the next one gets another chance
+                    state.skipped_frames += 1
+                    continue
+                except Exception as e:
+                    state.skipped_frames += 1
+                    print(f"⚠️ Could not analyse frame from {state.id}: {e}")
+                    continue
+                if analysis:
+                    state.analysis, state.analyzed_frame = analysis, frame
+                self.dirty.add(state.id)
+        finally:
+            state.analyzing = None
+
+    def observe_local(self, source_id: str, data: dict, alerts: list):
+        """The telemetry producer reports the app's own greenhouse so it appears in the fleet view."""
+        state = self.sources.get(source_id) or self.sources.setdefault(source_id, SourceState(source_id))
+        state.local = True
+        state.latest, state.alerts, state.last_seen = data, alerts, time.time()
+        state.readings += 1
+        self.dirty.add(source_id)
+
+    # --- Fan-out ---
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.tick_s)
+            try:
+                with span("hub_tick"):
+                    await self.flush()
+            except Exception as e:
+                print(f"Error in ingest hub: {e or type(e).__name__}")
+
+    async def flush(self):
+        if self.pending_history:
+            records, self.pending_history = list(self.pending_history), deque(maxlen=self.pending_history.maxlen)
+            try:
+                with span("hub_history"):
+                    await pipeline.run_io(self.history_store.ingest_many, records)
+            except StageBusy:
+                # Never started, so nothing was written: retry next tick ahead of anything newer
+                self.pending_history.extendleft(reversed(records))
+            except asyncio.TimeoutError:
+                # Still running on the I/O pool and lands when it finishes; retrying would write it twice
+                print(f"⚠️ Hub history write of {len(records)} readings is slow, not waiting for it")
+        if not self.dirty:
+            return
+        dirty, self.dirty = self.dirty, set()
+        states = [self.sources[s] for s in dirty if s in self.sources]
+        remote = [s for s in states if not s.local and s.latest]
+
+        snapshots = {s.id: {**s.latest, **(s.analysis or {})} for s in remote}
+        # Every reading of a batch feeds the trends in time order, not just the newest one
+        earlier = {s.id: list(s.samples) for s in remote if s.samples}
+        for state in remote:
+            state.samples.clear()
+        events = []
+        if snapshots:
+            with span("hub_alerts"):
+                active, events = self.monitor.update(snapshots, earlier=earlier)
+                await self.monitor.attach_frames(active, events, {s.id: s.analyzed_frame for s in remote})
+            for state in remote:
+                state.alerts = active.get(state.id, [])
+
+        events_by_source = {}
+        for e in events:
+            events_by_source.setdefault(e["alert"]["greenhouse_id"], []).append(e)
+        for state in remote:
+            try:
+                await self._publish(state, snapshots[state.id], events_by_source.get(state.id, []))
+            except Exception as e:
+                # One source failing must not cost the others (or the fleet view) this tick's update
+                print(f"⚠️ Could not publish {state.id}: {e or type(e).__name__}")
+
+        now = time.time()
+        await self.manager.publish(FLEET_TOPIC, {
+            "type": "fleet_update", "timestamp": now,
+            "sources": {s.id: s.summary(now) for s in states}, "alert_events": events,
+        }, retain=False)
+        # Late joiners get the whole fleet, not just the last delta
+        self.manager.retain(FLEET_TOPIC, {"type": "fleet_update", "timestamp": now, "sources": self.summaries(now)})
+
+    async def _publish(self, state: SourceState, data: dict, events: list):
+        if state.inference_status:
+            data["inference_status"] = state.inference_status
+        topic = greenhouse_topic(state.id)
+        frame, state.frame = state.frame, None
+        frame_modes = self.manager.frame_modes(topic)
+        if frame is not None and frame_modes:
+            try:
+                await pipeline.run_io(frame.base64 if FRAMES_BASE64 in frame_modes else frame.jpeg)
+            except (StageBusy, asyncio.TimeoutError):
+                # I/O pool saturated: publish the readings now, the frame goes out next tick unless a newer one arrives
+                state.frame = state.frame or frame
+                self.dirty.add(state.id)
+                frame = None
+        message = {"type": "sensor_update", "timestamp": data.get("timestamp"), "data": data,
+                   "alerts": state.alerts, "alert_events": events, "sampled_at": state.last_seen}
+        await self.manager.publish(topic, message, frame)
+
+    # --- Queries ---
+    def summaries(self, now: float = None) -> dict:
+        now = now or time.time()
+        return {source_id: state.summary(now) for source_id, state in self.sources.items()}
+
+    def latest(self, source_id: str) -> dict:
+        state = self.sources.get(source_id)
+        if state is None:
+            return None
+        return {**state.summary(time.time()), "data": {**state.latest, **(state.analysis or {})}, "alerts": state.alerts}
+
+    def stats(self) -> dict:
+        return {
+            "sources": len(self.sources), "pending_publish": len(self.dirty), "tick_s": self.tick_s,
+            "pending_history": len(self.pending_history),
+            "analyzing": sum(1 for s in self.sources.values() if s.analyzing),
+            "skipped_frames": sum(s.skipped_frames for s in self.sources.values()),
+        }
@@ -3,24 +3,48 @@
 
 import asyncio
 import base64
+import json
 import time
+import weakref
 from datetime import datetime
-from typing import List, Dict
+from typing import Any, List, Dict, Optional
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel
 
 # --- Correct Relative Imports ---
-from .config import IS_RPI
-from .ai_models import DiseaseDetector, PestIdentifier, GrowthMonitor
+from .config import (IS_RPI, FLEET_SIZE, FLEET_SEED, FLEET_TICK_S, FLEET_TIME_SCALE, RECORD_SESSION, REPLAY_SESSION, REPLAY_SPEED,
+                     CONTROL_REST_HOLD_S, UPLINK_URL, HUB_MAX_BATCH, FRAME_STORE_MODE)
+from .ai_models import DiseaseDetector, PestIdentifier, GrowthMonitor, warm_up
+from .executors import pipeline, StageBusy
+from .inference_engine import inference_engine, run_analysis
+from .timeseries_store import TimeSeriesStore
+from .frame_gate import FrameChangeGate
+from .cadence import AdaptiveCadence
+from .alert_engine import AlertEngine, DEFAULT_RULES, compile_rules
+from .trend_analyzer import TrendAnalyzer
+from .connections import ConnectionManager, TELEMETRY_TOPIC, FRAME_MODES, FRAMES_BINARY, FRAMES_BASE64, FRAMES_NONE
+from .frames import Frame
+from .frame_store import FrameStore
+from .ingest_hub import IngestHub, FLEET_TOPIC
+from .fleet_simulator import FleetSimulator
+from .metrics import metrics, span, stage_seconds
+from .profiler import profiler
+from .readiness import readiness, READY
+from .session_recorder import SessionManager, parse_speed
+from .motor_control import MotorController
+from .telemetry_codec import decode as decode_packed, is_packed
+from .uplink import RoverUplink
 
 if IS_RPI:
     from .sensor_integration import sensor_aggregator
 else:
-    from .sensor_simulator import MockSensorData
+    from .sensor_simulator import MockSensorData, DEMO_DISEASE_ANALYSIS, DEMO_PEST_ANALYSIS
     sensor_data_source = MockSensorData()
 
-# --- THIS IS THE CORRECTED AND COMPLETE THRESHOLD MONITOR ---
+# --- Threshold monitor: THRESHOLDS feed the data-driven rules in alert_engine.py ---
 class AdvancedThresholdMonitor:
     THRESHOLDS = {
         "temperature_internal": {"min": 18, "max": 28, "yield_stress_point": 32},
@@ -28,137 +52,544 @@ class AdvancedThresholdMonitor:
         "soil_moisture": {"critical_min": 30, "critical_max": 90},
     }
 
+    def __init__(self, rules: List[Dict] = DEFAULT_RULES, frame_store: FrameStore = None, run_io=None):
+        # Rules are data (see alert_engine.DEFAULT_RULES), compiled once against THRESHOLDS
+        self.engine = AlertEngine(compile_rules(rules, self.THRESHOLDS))
+        # Forecasts are projected onto the same threshold rules
+        self.trends = TrendAnalyzer(self.engine.threshold_rules)
+        # Alert evidence: frames go to `frame_store` (None keeps none) through `run_io`, an awaitable (fn, *args)
+        # runner; None means the shared I/O stage
+        self.frame_store, self.run_io = frame_store, run_io
+
     def check_thresholds(self, data: Dict) -> List[Dict]:
-        alerts = []
-        now_ts = time.time()
-        
-        # --- ALL THIS LOGIC WAS MISSING IN THE PREVIOUS VERSION ---
-        temp = data.get("temperature_internal")
-        if temp and temp > self.THRESHOLDS["temperature_internal"]["yield_stress_point"]:
-            alerts.append({
-                "id": f"yield_threat_{now_ts}", "level": "critical", "title": "Yield Threat: Heat Stress", 
-                "description": f"Internal temp is {temp}°C, exceeding the critical yield stress point.",
-                "current_value": temp, "optimal_range": "18-28°C",
-                "impact": "Sustained heat stress will slow fruit growth and reduce yield forecast by 5-10% per day.", 
-                "solutions": [{"priority": 1, "action": "Activate cooling systems (fans/misters) to lower temperature."}]
-            })
-
-        humidity = data.get("humidity")
-        if humidity and humidity > self.THRESHOLDS["humidity"]["disease_risk_point"]:
-            alerts.append({
-                "id": f"disease_risk_hum_{now_ts}", "level": "warning", "title": "Disease Risk: High Humidity",
-                "description": f"Humidity is {humidity}%, creating ideal conditions for fungal growth.",
-                "current_value": humidity, "optimal_range": "55-75%",
-                "impact": "High probability of powdery mildew or blight, impacting crop quality and market value.",
-                "solutions": [{"priority": 1, "action": "Increase ventilation and air circulation immediately."}]
-            })
-
-        if humidity and humidity < self.THRESHOLDS["humidity"]["stress_point"]:
-            alerts.append({
-                "id": f"yield_threat_hum_{now_ts}", "level": "warning", "title": "Yield Threat: Transpiration Stress",
-                "description": f"Humidity is {humidity}%, causing plants to lose water too quickly.",
-                "current_value": humidity, "optimal_range": "55-75%",
-                "impact": "Stunts growth and reduces fruit size, lowering overall yield.",
-                "solutions": [{"priority": 1, "action": "Activate misting or fogging systems to raise humidity."}]
-            })
-
-        moisture = data.get("soil_moisture")
-        if moisture and moisture < self.THRESHOLDS["soil_moisture"]["critical_min"]:
-            alerts.append({
-                "id": f"yield_threat_moisture_{now_ts}", "level": "critical", "title": "Yield Threat: Dehydration Stress",
-                "description": f"Soil moisture has dropped to {moisture}%, below the critical threshold.",
-                "current_value": moisture, "optimal_range": "50-80%",
-                "impact": "Impairs nutrient uptake, stunts growth, and can lead to irreversible wilting. Reduces yield forecast.",
-                "solutions": [{"priority": 1, "action": "Activate irrigation system immediately to restore soil moisture."}]
-            })
-
-        if moisture and moisture > self.THRESHOLDS["soil_moisture"]["critical_max"]:
-            alerts.append({
-                "id": f"disease_risk_moisture_{now_ts}", "level": "warning", "title": "Disease Risk: Waterlogged Soil",
-                "description": f"Soil moisture is at {moisture}%, creating anaerobic conditions.",
-                "current_value": moisture, "optimal_range": "50-80%",
-                "impact": "Promotes root rot and fungal diseases. High risk of crop loss if not addressed.",
-                "solutions": [{"priority": 1, "action": "Disable all irrigation and check for drainage issues."}]
-            })
-        # --------------------------------------------------------------------
-
-        disease_analysis = data.get("disease_analysis", {})
-        if disease_analysis and disease_analysis.get("diseases_detected"):
-            for disease in disease_analysis["diseases_detected"]:
-                alerts.append({"id": f"disease_{disease.get('name')}_{now_ts}", "level": "warning", "title": f"AI Detected Disease: {disease.get('name', 'Unknown').replace('_', ' ').title()}", "description": f"AI analysis has detected signs of {disease.get('name')} with {disease.get('confidence', 0)}% confidence.", "current_value": disease.get('confidence', 0), "optimal_range": "0% symptoms", "impact": "Immediate action required to prevent 15-25% crop loss, impacting market delivery schedules.", "solutions": [{"priority": 1, "action": f"Apply targeted {disease.get('recommended_action', 'treatment')}."}]})
-
-        pest_analysis = data.get("pest_analysis", {})
-        if pest_analysis and pest_analysis.get("pests_detected"):
-            for pest in pest_analysis["pests_detected"]:
-                alerts.append({"id": f"pest_{pest.get('pest_type')}_{now_ts}", "level": "warning", "title": f"AI Detected Pests: {pest.get('pest_type', 'Unknown').title()}", "description": f"AI analysis has identified an infestation of {pest.get('pest_type')} with an estimated population of {pest.get('count')}.", "current_value": pest.get('count'), "optimal_range": "0 pests", "impact": "Pest infestations can rapidly damage crops, reducing marketable yield and increasing labor costs.", "solutions": [{"priority": 1, "action": "Deploy biological controls or apply appropriate pesticides immediately."}]})
-
-        growth_metrics = data.get("growth_metrics", {})
-        if not alerts and growth_metrics.get("growth_stage") == 'fruiting':
-            alerts.append({"id": f"harvest_window_{now_ts}", "level": "advisory", "title": "Optimal Harvest Window Approaching", "description": "Plants are in the mature fruiting stage and environmental conditions are optimal.", "current_value": growth_metrics.get('canopy_coverage_percent', 0), "optimal_range": "Fruiting Stage", "impact": "Planning now ensures maximum yield quality and optimal market timing.", "solutions": [{"priority": 1, "action": "Schedule labor and logistics for harvest in the next 7-10 days."}]})
-
-        return alerts
+        """Stateless view: every rule whose condition holds for this snapshot right now."""
+        return self.engine.evaluate_snapshot(data)
+
+    def update(self, snapshots: Dict[str, Dict], now: float = None, earlier: Dict[str, List[Dict]] = None):
+        """Stateful, bulk evaluation over many greenhouses; returns (active alerts per greenhouse, transitions).
+        Each snapshot gains a trend_analysis first, which the forecast and sensor-fault rules read; `earlier` holds
+        the other readings of a batched upload, which feed the trends but not the alerts."""
+        for source, analysis in self.trends.update(snapshots, now, earlier).items():
+            snapshots[source]["trend_analysis"] = analysis
+        return self.engine.update(snapshots, now)
+
+    async def attach_frames(self, active: Dict[str, List[Dict]], events: List[Dict], frames: Dict[str, Frame]):
+        """Keep the frame behind each newly opened AI-detection alert and tag the alert with its frame_id.
+        Only writes when such an alert opens; `active` and `events` are updated in place."""
+        for source, alert_ids in (self.engine.needs_frame(events) if self.frame_store else {}).items():
+            if frames.get(source) is None:
+                continue
+            try:
+                frame_id = await (self.run_io or pipeline.run_io)(self.frame_store.store, frames[source], "alert")
+            except (StageBusy, asyncio.TimeoutError, ValueError) as e:
+                print(f"⚠️ Alert frame not kept: {e or 'timed out'}")
+                continue
+            if frame_id is None:
+                continue
+            for alert_id in alert_ids:
+                self.engine.attach(alert_id, frame_id=frame_id)
+            for event in events:
+                if event["alert"]["id"] in alert_ids:
+                    event["alert"]["frame_id"] = frame_id
+            active[source] = self.engine.active(source)
+
+    def acknowledge(self, alert_id: str):
+        return self.engine.acknowledge(alert_id)
 
 # --- FastAPI App Setup ---
 app = FastAPI(title="Polyhouse Monitoring API v2")
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
 
-threshold_monitor = AdvancedThresholdMonitor()
+# Frames behind AI-detection alerts, in a fixed-size ring file (opened at startup); served by GET /api/frames/{id}
+frame_store = FrameStore() if FRAME_STORE_MODE != "off" else None
+threshold_monitor = AdvancedThresholdMonitor(frame_store=frame_store)
 disease_detector, pest_identifier, growth_monitor = DiseaseDetector(), PestIdentifier(), GrowthMonitor()
 
-class ConnectionManager:
-    def __init__(self): self.active_connections: List[WebSocket] = []
-    async def connect(self, ws: WebSocket): await ws.accept(); self.active_connections.append(ws)
-    def disconnect(self, ws: WebSocket):
-        if ws in self.active_connections: self.active_connections.remove(ws)
-    async def broadcast(self, msg: dict):
-        for conn in self.active_connections[:]:
-            try: await conn.send_json(msg)
-            except: self.active_connections.remove(conn)
-
 manager = ConnectionManager()
+history_store = TimeSeriesStore()
+frame_gate = FrameChangeGate()
+cadence = AdaptiveCadence()
+hub = IngestHub(manager, history_store, threshold_monitor)
+# POLYHOUSE_FLEET_SIZE=N adds N virtual greenhouses, pushed through the same ingest path as real rovers
+fleet = FleetSimulator(FLEET_SIZE, seed=FLEET_SEED, time_scale=FLEET_TIME_SCALE) if FLEET_SIZE else None
+# Manual override lives on its own channel and is applied on the event loop, never behind a telemetry tick
+motors = MotorController(sensor_aggregator if IS_RPI else sensor_data_source)
+# Records the local producer's raw ticks, or replays a recorded session in place of the live sensors
+sessions = SessionManager()
+# A replay runs on the recorded clock: it gets fresh alert/trend state of its own so it never touches the live monitor's
+replay_monitors = weakref.WeakKeyDictionary()  # SessionReplay -> AdvancedThresholdMonitor
+# POLYHOUSE_UPLINK_URL: this rover also pushes its raw readings, packed and batched, to a central server
+uplink = RoverUplink(UPLINK_URL) if UPLINK_URL else None
+
+# Telemetry must be up for the API to count as ready; camera and model only degrade the output while they start
+readiness.register("sensors", required=True)
+readiness.register("camera")
+readiness.register("model")
+
+# --- Metrics: counters and queue depths read from the components at scrape time ---
+ticks_total = metrics.counter("polyhouse_telemetry_ticks_total", "Telemetry ticks, by outcome.", label="outcome")
+metrics.counter_fn("polyhouse_frames_processed_total", "Frames run through the classifier.", lambda: inference_engine.frames)
+metrics.counter_fn("polyhouse_inference_errors_total", "Frames whose inference failed.", lambda: inference_engine.errors)
+metrics.counter_fn("polyhouse_inference_rejected_total", "Frames refused because the inference queue was full.", lambda: inference_engine.rejected)
+metrics.counter_fn("polyhouse_frame_gate_hits_total", "Frames answered from the change-gate cache.", lambda: frame_gate.hits)
+metrics.counter_fn("polyhouse_dropped_clients_total", "WebSocket clients dropped after a send failure.", lambda: manager.dropped_clients)
+metrics.counter_fn("polyhouse_stage_rejected_total", "Jobs refused by a full executor stage.",
+                   lambda: {name: s["rejected"] for name, s in pipeline.stats().items()}, label="stage")
+metrics.counter_fn("polyhouse_stage_timeouts_total", "Jobs that exceeded their executor stage timeout.",
+                   lambda: {name: s["timeouts"] for name, s in pipeline.stats().items()}, label="stage")
+metrics.gauge_fn("polyhouse_queue_depth", "Items waiting or running in each queue.", lambda: {
+    **{name: s["pending"] for name, s in pipeline.stats().items()},
+    "batching": inference_engine.queue.qsize() if inference_engine.queue else 0,
+    "clients": sum(c["queue_depth"] for c in manager.stats()["clients"]),
+}, label="queue")
+metrics.gauge_fn("polyhouse_connected_clients", "Open /ws/realtime connections.", lambda: manager.subscriber_count(TELEMETRY_TOPIC))
+metrics.gauge_fn("polyhouse_telemetry_interval_seconds", "Current adaptive tick interval.", lambda: cadence.interval_s)
 
 @app.get("/")
 def root(): return {"message": "Polyhouse API v2", "raspberry_pi_mode": IS_RPI}
 
 @app.post("/api/simulate/problem")
-async def trigger_problem_endpoint(problem_type: str):
+async def trigger_problem_endpoint(problem_type: str, greenhouse_id: str = None):
+    if fleet and greenhouse_id in fleet.index:
+        try:
+            fleet.trigger_problem(greenhouse_id, problem_type)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"status": "success", "message": f"Problem '{problem_type}' triggered in {greenhouse_id}."}
     if not IS_RPI:
         sensor_data_source.trigger_problem(problem_type)
         return {"status": "success", "message": f"Problem '{problem_type}' triggered."}
     return {"status": "error", "message": "Demo controls are only available in simulator mode."}
 
 @app.post("/api/simulate/resolve")
-async def resolve_problem_endpoint():
+async def resolve_problem_endpoint(greenhouse_id: str = None):
+    if fleet and greenhouse_id in fleet.index:
+        fleet.clear_problem(greenhouse_id)
+        return {"status": "success", "message": f"Problems resolved in {greenhouse_id}."}
     if not IS_RPI:
         sensor_data_source.clear_problem()
         return {"status": "success", "message": "Problems resolved."}
     return {"status": "error", "message": "Demo controls are only available in simulator mode."}
 
+# --- Manual override ---
+@app.post("/api/motors/control")
+def control_motor(motor_id: int, direction: str, speed: int = 0):
+    try:
+        return {"status": "success", "motor_statuses": motors.command(motor_id, direction, speed, CONTROL_REST_HOLD_S)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/api/motors/stop-all")
+def stop_all_motors(): return {"status": "success", "motor_statuses": motors.stop_all()}
+
+@app.get("/api/motors")
+def motor_stats(): return motors.stats()
+
+@app.websocket("/ws/control")
+async def control_websocket(websocket: WebSocket):
+    """Sequence-numbered motor commands with acks and a deadman; see motor_control.py for the protocol."""
+    await motors.serve(websocket)
+
+# --- Shared Telemetry Producer ---
+# One acquisition/inference loop for the whole app; clients only subscribe to its topic.
+def read_sensors() -> dict:
+    replay = sessions.replay
+    if replay and not replay.finished:
+        data = replay.get_all_data()
+        if data is not None:
+            return data  # None: the replay was stopped while this read waited for it
+    return sensor_data_source.get_all_data() if not IS_RPI else sensor_aggregator.get_all_sensor_data()
+
+def replay_monitor(session) -> AdvancedThresholdMonitor:
+    if session is None:
+        return AdvancedThresholdMonitor(frame_store=frame_store) # replay stopped mid-tick: its last alerts go nowhere rather than live
+    if session not in replay_monitors:
+        replay_monitors[session] = AdvancedThresholdMonitor(frame_store=frame_store)
+    return replay_monitors[session]
+
+async def build_snapshot():
+    # Device I/O runs on the I/O thread pool and inference on the process pool, so the loop stays responsive
+    with span("sensor_read"):
+        sensor_data = await pipeline.run_io(read_sensors)
+    sampled_at = time.time()
+    frame = sensor_data.pop("camera_frame", None)
+    raw = dict(sensor_data) # what a recording keeps: readings before analysis, so a replay re-runs inference
+    # A replay runs alert durations on the recorded clock, and never mixes in the live demo scenarios
+    replay = sensor_data.get("replay")
+    demo_mode = None if IS_RPI or replay else sensor_data_source.problem_mode
+
+    if demo_mode == 'detect_disease':
+         sensor_data["disease_analysis"] = DEMO_DISEASE_ANALYSIS
+         sensor_data["pest_analysis"] = pest_identifier.identify_pest(b'')
+    elif demo_mode == 'detect_pest':
+        sensor_data["pest_analysis"] = DEMO_PEST_ANALYSIS
+        # Same result the old empty-bytes classify call produced, without loading the model in the API process
+        sensor_data["disease_analysis"] = disease_detector.report("Error", 0.0)
+    elif frame is not None:
+        try:
+            analysis, status = await run_analysis(frame, frame_gate)
+        except (StageBusy, asyncio.TimeoutError) as e:
+            # Publish telemetry without analysis rather than stalling the tick
+            print(f"⚠️ Skipping inference this tick: {e or 'timed out'}")
+            analysis, status = None, None
+        if analysis:
+            sensor_data.update(analysis)
+        if status:
+            # Telemetry flows while the model loads; the frame says why it has no analysis yet
+            sensor_data["inference_status"] = status
+
+    # Pixels are only encoded when someone is actually watching, and only in the encodings they asked for
+    frame_modes = manager.frame_modes(TELEMETRY_TOPIC)
+    if frame is not None and frame_modes:
+        with span("frame_encode"):
+            await pipeline.run_io(frame.base64 if FRAMES_BASE64 in frame_modes else frame.jpeg)
+
+    # Replayed rows were stored when the session was recorded; writing them again would double-count the rollups
+    if not replay:
+        with span("history_ingest"):
+            await pipeline.run_io(history_store.ingest, sensor_data)
+    # Alerts keep stable ids across ticks; alert_events carries only what changed (opened/acknowledged/resolved)
+    source = sensor_data.get("greenhouse_id", "default")
+    monitor = replay_monitor(sessions.replay) if replay else threshold_monitor
+    with span("alerts"):
+        active, events = monitor.update({source: sensor_data}, replay["recorded_at"] if replay else None)
+    with span("alert_frames"):
+        await monitor.attach_frames(active, events, {source: frame})
+    if frame_store and FRAME_STORE_MODE == "changes" and frame is not None:
+        try:
+            with span("frame_store"):
+                await pipeline.run_io(frame_store.store_if_changed, frame)
+        except StageBusy:
+            pass # only a scene change; the next one gets another chance
+    recorder = sessions.recorder
+    if recorder:
+        try:
+            with span("session_record"):
+                await pipeline.run_io(recorder.record, raw, frame, events)
+        except Exception as e:
+            # A recording problem (busy pool, full disk, ...) costs the recording a tick, never the live telemetry
+            print(f"⚠️ Session tick not recorded: {e or type(e).__name__}")
+    if uplink and not replay:
+        uplink.add(raw)
+    # Sample faster while alerts are open or readings are moving; back off while steady
+    cadence.observe(sensor_data, active[source])
+    hub.observe_local(source, sensor_data, active[source])
+    message = {"type": "sensor_update", "timestamp": sensor_data["timestamp"], "data": sensor_data,
+               "alerts": active[source], "alert_events": events, "cadence": cadence.state(),
+               "sampled_at": sampled_at}
+    return message, frame
+
+async def telemetry_producer():
+    while True:
+        try:
+            with span("tick"):
+                message, frame = await build_snapshot()
+                with span("publish"):
+                    await manager.publish(TELEMETRY_TOPIC, message, frame)
+            ticks_total.inc(1, "ok")
+        except Exception as e:
+            ticks_total.inc(1, "error")
+            print(f"Error in telemetry producer: {e or type(e).__name__}")
+        replay = sessions.replay
+        if replay and replay.finished:
+            print(f"⏹️ Replay of '{replay.path.name}' finished, back to live sensors")
+            sessions.stop_replay()
+            replay = None
+        # A replay keeps the recorded spacing (divided by its speed) instead of the adaptive cadence
+        await asyncio.sleep(replay.next_delay() if replay else cadence.interval_s)
+
+async def fleet_producer():
+    while True:
+        try:
+            with span("fleet_step"):
+                records = fleet.tick(FLEET_TICK_S)
+            for record in records:
+                hub.ingest(record["greenhouse_id"], [record], "fleet-simulator")
+        except Exception as e:
+            print(f"Error in fleet simulator: {e or type(e).__name__}")
+        await asyncio.sleep(FLEET_TICK_S)
+
+@app.on_event("startup")
+async def start_telemetry_producer():
+    pipeline.start()
+    inference_engine.start()
+    hub.start()
+    motors.start()
+    if frame_store:
+        frame_store.open()
+    # Only cheap work happens before uvicorn starts accepting; camera, video and model come up in the background
+    if IS_RPI:
+        readiness.run("sensors", sensor_aggregator.start)
+        readiness.run_in_background("camera", sensor_aggregator.camera.open)
+    else:
+        readiness.set("sensors", READY)
+        readiness.run_in_background("camera", sensor_data_source.start)
+    app.state.warm_up_task = asyncio.create_task(readiness.run_async("model", pipeline.warm_up(warm_up)))
+    if REPLAY_SESSION:
+        sessions.start_replay(REPLAY_SESSION, parse_speed(REPLAY_SPEED))
+    if RECORD_SESSION:
+        sessions.start_recording(RECORD_SESSION, "raspberry_pi" if IS_RPI else "simulator")
+    app.state.telemetry_task = asyncio.create_task(telemetry_producer())
+    if fleet:
+        print(f"🏭 Fleet simulator: {fleet.size} greenhouses every {FLEET_TICK_S:g}s")
+        app.state.fleet_task = asyncio.create_task(fleet_producer())
+
+@app.on_event("shutdown")
+async def stop_telemetry_producer():
+    app.state.telemetry_task.cancel()
+    app.state.warm_up_task.cancel()
+    if fleet:
+        app.state.fleet_task.cancel()
+    await hub.stop()
+    await motors.stop()
+    if uplink:
+        await uplink.stop()
+    if frame_store:
+        frame_store.close()
+    if sessions.recorder:
+        sessions.stop_recording()
+    sessions.stop_replay()
+    await inference_engine.stop()
+    pipeline.shutdown()
+    history_store.flush()
+
+@app.get("/api/pipeline/stats")
+def pipeline_stats():
+    stats = {**pipeline.stats(), "batching": inference_engine.stats(), "frame_gate": frame_gate.stats(),
+             "hub": hub.stats(), "stages": stage_seconds.summary()}
+    if IS_RPI:
+        stats["sensors"] = sensor_aggregator.scheduler.stats()
+    if uplink:
+        stats["uplink"] = uplink.stats()
+    if frame_store:
+        stats["frame_store"] = frame_store.stats()
+    return stats
+
+@app.get("/api/ready")
+def ready():
+    """200 once telemetry is flowing (503 before); per-component state for camera and model either way."""
+    report = readiness.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.post("/api/profiler/start")
+def start_profiler(interval_ms: float = 5, max_duration_s: float = 60):
+    """Sample every thread's stack until /api/profiler/stop (or max_duration_s). Use during a lag spike."""
+    try:
+        profiler.start(interval_ms / 1000, max_duration_s)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"status": "running", "interval_ms": interval_ms, "max_duration_s": max_duration_s}
+
+@app.post("/api/profiler/stop")
+def stop_profiler(): return profiler.stop()
+
+@app.get("/api/profiler")
+def profiler_report(format: str = "json", limit: int = 25):
+    """format=collapsed returns folded stacks for flamegraph.pl / speedscope."""
+    if format == "collapsed":
+        return PlainTextResponse(profiler.collapsed())
+    return profiler.report(limit)
+
+# --- Session recording and replay ---
+@app.get("/api/sessions")
+def list_sessions(): return sessions.list()
+
+@app.post("/api/sessions/record")
+def start_recording(name: str = None):
+    try:
+        return sessions.start_recording(name, "raspberry_pi" if IS_RPI else "simulator")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.post("/api/sessions/record/stop")
+def stop_recording():
+    if not sessions.recorder:
+        raise HTTPException(status_code=409, detail="Not recording")
+    return sessions.stop_recording()
+
+@app.get("/api/sessions/replay")
+def replay_status():
+    return sessions.replay.status() if sessions.replay else {"replaying": False}
+
+@app.post("/api/sessions/replay/seek")
+def seek_replay(at: str = None, offset_s: float = None):
+    """Jump to a recorded time (epoch or ISO-8601) or to `offset_s` seconds into the session."""
+    replay = sessions.replay
+    if not replay:
+        raise HTTPException(status_code=409, detail="No replay running")
+    if (at is None) == (offset_s is None):
+        raise HTTPException(status_code=400, detail="Give exactly one of 'at' or 'offset_s'")
+    try:
+        replay.seek(at) if at is not None else replay.seek_offset(offset_s)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return replay.status()
+
+@app.post("/api/sessions/replay/stop")
+def stop_replay():
+    sessions.stop_replay()
+    return {"replaying": False}
+
+@app.post("/api/sessions/{name}/replay")
+def start_replay(name: str, speed: str = "1", loop: bool = False):
+    """Play a session back through inference and alerts at `speed` x (e.g. 1, 10) or 'max'."""
+    try:
+        return sessions.start_replay(name, parse_speed(speed), loop)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/sessions/{name}/events")
+def session_events(name: str):
+    """Alert transitions seen while the session was recorded, to compare against a replay."""
+    try:
+        return sessions.events(name)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@app.get("/api/history")
+def history(metric: str, start: str = Query(None, alias="from"), end: str = Query(None, alias="to"),
+            resolution: str = "auto", greenhouse_id: str = None):
+    """`from`/`to` accept epoch seconds or ISO-8601; resolution is raw, 1m, 1h, 1d or auto."""
+    try:
+        return history_store.query(metric, start, end, resolution, greenhouse_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/trends/{greenhouse_id}")
+def trends(greenhouse_id: str):
+    """EWMA, slopes, robust z-scores, forecasts and sensor faults from the latest reading of one greenhouse."""
+    analysis = threshold_monitor.trends.latest.get(greenhouse_id)
+    if analysis is None:
+        raise HTTPException(status_code=404, detail=f"No readings from '{greenhouse_id}' yet")
+    return analysis
+
+@app.get("/api/alerts")
+def list_alerts(greenhouse_id: str = None): return threshold_monitor.engine.active(greenhouse_id)
+
+@app.post("/api/alerts/{alert_id}/ack")
+async def acknowledge_alert(alert_id: str):
+    event = threshold_monitor.acknowledge(alert_id)
+    if not event:
+        raise HTTPException(status_code=404, detail=f"No open alert '{alert_id}'")
+    await manager.publish(TELEMETRY_TOPIC, {"type": "alert_event", **event}, retain=False)
+    return event
+
+@app.get("/api/frames")
+def list_frames(at: Optional[float] = None, limit: int = Query(50, ge=1, le=1000)):
+    """Stored frames, newest first; `at` (epoch seconds) returns the ones kept at or before that moment."""
+    return frame_store.lookup(at, limit) if frame_store else []
+
+@app.get("/api/frames/{frame_id}")
+def get_frame(frame_id: int):
+    """The JPEG behind an alert's frame_id, sent straight from the memory-mapped ring."""
+    response = frame_store.response(frame_id) if frame_store else None
+    if response is None:
+        raise HTTPException(status_code=404, detail=f"Frame {frame_id} is unknown, expired or overwritten")
+    return response
+
+# --- Ingestion from remote greenhouses/rovers (see ingest_hub.py) ---
+class IngestBatch(BaseModel):
+    greenhouse_id: str
+    rover_id: Optional[str] = None
+    readings: List[Dict[str, Any]] = []
+    frame_jpeg_base64: Optional[str] = None # Prefer POST /api/ingest/{greenhouse_id}/frame for raw JPEG
+
+def jpeg_frame(data: bytes) -> Frame:
+    if not data.startswith(b"\xff\xd8"):
+        raise ValueError("Frame must be a JPEG image")
+    return Frame.from_jpeg(data, captured_at=time.time())
+
+@app.post("/api/ingest", status_code=202)
+async def ingest_batch(batch: IngestBatch):
+    """Readings (and optionally one frame) for one greenhouse; analysis and fan-out happen asynchronously."""
+    try:
+        frame = jpeg_frame(base64.b64decode(batch.frame_jpeg_base64)) if batch.frame_jpeg_base64 else None
+        accepted = hub.ingest(batch.greenhouse_id, batch.readings, batch.rover_id)
+        if frame is not None:
+            hub.ingest_frame(batch.greenhouse_id, frame, batch.rover_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"accepted": accepted, "frame_queued": frame is not None}
+
+@app.post("/api/ingest/{greenhouse_id}/frame", status_code=202)
+async def ingest_frame(greenhouse_id: str, request: Request, rover_id: str = None):
+    """Raw JPEG request body; a third smaller on the wire than base64 in JSON."""
+    try:
+        hub.ingest_frame(greenhouse_id, jpeg_frame(await request.body()), rover_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"frame_queued": True}
+
+@app.post("/api/ingest/{greenhouse_id}/packed", status_code=202)
+async def ingest_packed(greenhouse_id: str, request: Request, rover_id: str = None):
+    """Readings in the compact binary format of telemetry_codec.py (what RoverUplink sends)."""
+    try:
+        with span("packed_decode"):
+            readings = decode_packed(await request.body(), HUB_MAX_BATCH)
+        accepted = hub.ingest(greenhouse_id, readings, rover_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"accepted": accepted}
+
+@app.websocket("/ws/ingest")
+async def ingest_websocket(websocket: WebSocket, greenhouse_id: str, rover_id: str = None):
+    """Persistent push channel for a rover. Text messages: one reading, a list of readings or
+    {"readings": [...]}; binary messages: a JPEG frame or packed readings. Only failures are answered."""
+    await websocket.accept()
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            try:
+                if message.get("bytes") is not None and is_packed(message["bytes"]):
+                    hub.ingest(greenhouse_id, decode_packed(message["bytes"], HUB_MAX_BATCH), rover_id)
+                elif message.get("bytes") is not None:
+                    hub.ingest_frame(greenhouse_id, jpeg_frame(message["bytes"]), rover_id)
+                else:
+                    payload = json.loads(message["text"])
+                    readings = payload.get("readings", [payload]) if isinstance(payload, dict) else payload
+                    hub.ingest(greenhouse_id, readings, rover_id)
+            except ValueError as e:
+                await websocket.send_json({"type": "error", "detail": str(e)})
+    except WebSocketDisconnect:
+        pass
+
+@app.get("/api/sources")
+def list_sources(): return hub.summaries()
+
+@app.get("/api/sources/{greenhouse_id}")
+def source_detail(greenhouse_id: str):
+    state = hub.latest(greenhouse_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"Unknown greenhouse '{greenhouse_id}'")
+    return state
+
+@app.get("/api/clients")
+def client_stats(): return manager.stats()
+
 @app.websocket("/ws/realtime")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+async def websocket_endpoint(websocket: WebSocket, frames: str = FRAMES_BINARY, greenhouse_id: str = None):
+    # ?frames=binary (default): JPEG follows each JSON update as a binary message
+    # ?frames=base64: legacy embedded camera_frame_base64, ?frames=none: telemetry only
+    # ?greenhouse_id=<id>: one ingested greenhouse instead of the local one; ?greenhouse_id=all: fleet summary
+    frame_mode = frames if frames in FRAME_MODES else FRAMES_BINARY
+    if greenhouse_id == "all":
+        topic, frame_mode = FLEET_TOPIC, FRAMES_NONE
+    else:
+        topic = hub.topic_for(greenhouse_id, TELEMETRY_TOPIC) if greenhouse_id else TELEMETRY_TOPIC
+    await manager.connect(websocket, topic, frame_mode)
     try:
+        # The producer pushes updates; this loop only keeps the socket open until the client leaves
         while True:
-            sensor_data = sensor_data_source.get_all_data() if not IS_RPI else sensor_aggregator.get_all_sensor_data()
-            
-            if not IS_RPI and sensor_data_source.problem_mode == 'detect_disease':
-                 sensor_data["disease_analysis"] = { 'diseases_detected': [{'name': 'powdery_mildew', 'confidence': 92.3, 'recommended_action': 'Neem oil spray'}], 'overall_health': 'diseased' }
-                 sensor_data["pest_analysis"] = pest_identifier.identify_pest(b'')
-            elif not IS_RPI and sensor_data_source.problem_mode == 'detect_pest':
-                sensor_data["pest_analysis"] = { 'pests_detected': [{'pest_type': 'aphids', 'count': 42, 'confidence': 88.1, 'severity': 'moderate'}], 'infestation_level': 'moderate' }
-                sensor_data["disease_analysis"] = disease_detector.detect_disease(b'')
-            else:
-                frame_b64 = sensor_data.get("camera_frame_base64")
-                if frame_b64:
-                    frame_bytes = base64.b64decode(frame_b64)
-                    sensor_data["disease_analysis"] = disease_detector.detect_disease(frame_bytes)
-                    sensor_data["pest_analysis"] = pest_identifier.identify_pest(frame_bytes)
-                    sensor_data["growth_metrics"] = growth_monitor.measure_growth(frame_bytes)
-            
-            alerts = threshold_monitor.check_thresholds(sensor_data)
-            message = {"type": "sensor_update", "timestamp": sensor_data["timestamp"], "data": sensor_data, "alerts": alerts}
-            await manager.broadcast(message)
-            await asyncio.sleep(10)
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
     except Exception as e:
         print(f"Error in websocket: {e}")
-        await manager.disconnect(websocket)
\ No newline at end of file
+    finally:
+        manager.disconnect(websocket)
@@ -0,0 +1,169 @@
+# backend/app/metrics.py
+# Hot-path instrumentation: fixed-bucket histograms and counters, rendered as Prometheus text for /metrics.
+
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from threading import Lock
+
+# Seconds; covers a sub-millisecond threshold check up to a multi-second cold model load
+DEFAULT_BUCKETS_S = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _labels(label: str, value) -> str:
+    return f'{{{label}="{value}"}}' if label else ""
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Histogram:
+    """One metric family with a single label (e.g. stage). observe() is a bisect plus three increments."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, label: str = "stage", buckets=DEFAULT_BUCKETS_S):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = tuple(buckets)
+        self.series = {}  # label value -> [per-bucket counts (+Inf last), sum, count]
+        self._lock = Lock()
+
+    def observe(self, label_value: str, seconds: float):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self.series.get(label_value)
+            if series is None:
+                series = self.series[label_value] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    @contextmanager
+    def time(self, label_value: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(label_value, time.perf_counter() - start)
+
+    def drain(self) -> dict:
+        """Hand over and reset everything observed so far (used to ship worker-process timings to the parent)."""
+        with self._lock:
+            series, self.series = self.series, {}
+        return series
+
+    def merge(self, series: dict):
+        with self._lock:
+            for label_value, (counts, total, count) in series.items():
+                mine = self.series.get(label_value)
+                if mine is None:
+                    mine = self.series[label_value] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                mine[0] = [a + b for a, b in zip(mine[0], counts)]
+                mine[1] += total
+                mine[2] += count
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return sorted((k, (list(counts), total, count)) for k, (counts, total, count) in self.series.items())
+
+    def summary(self) -> dict:
+        """Approximate p50/p99 per label from the buckets (upper bound of the bucket holding the quantile)."""
+        result = {}
+        for label_value, (counts, total, count) in self.snapshot():
+            quantiles = {}
+            for q in (0.5, 0.99):
+                seen = 0
+                for bound, n in zip(self.buckets + (float("inf"),), counts):
+                    seen += n
+                    if seen >= q * count:
+                        quantiles[f"p{int(q * 100)}_ms"] = bound * 1000
+                        break
+            result[label_value] = {"count": count, "mean_ms": round(total / count * 1000, 3), **quantiles}
+        return result
+
+    def render(self) -> list:
+        lines = []
+        for label_value, (counts, total, count) in self.snapshot():
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                lines.append(f'{self.name}_bucket{{{self.label}="{label_value}",le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{_labels(self.label, label_value)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label, label_value)} {count}")
+        return lines
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, label: str = None):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.values = {}
+
+    def inc(self, amount: int = 1, label_value: str = None):
+        # Only touched from the event loop; a lost increment under a race would be harmless anyway
+        self.values[label_value] = self.values.get(label_value, 0) + amount
+
+    def render(self) -> list:
+        return [f"{self.name}{_labels(self.label, k)} {_number(v)}" for k, v in sorted(self.values.items(), key=str)]
+
+class Callback:
+    """Counter or gauge read from existing state at scrape time. `fn` returns a number or {label value: number}."""
+
+    def __init__(self, name: str, help: str, kind: str, fn, label: str = None):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.fn = fn
+        self.label = label
+
+    def render(self) -> list:
+        try:
+            value = self.fn()
+        except Exception:
+            return []
+        if isinstance(value, dict):
+            return [f"{self.name}{_labels(self.label, k)} {_number(v)}" for k, v in sorted(value.items())]
+        return [f"{self.name} {_number(value)}"]
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = {}
+
+    def _add(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def histogram(self, name: str, help: str, label: str = "stage", buckets=DEFAULT_BUCKETS_S) -> Histogram:
+        return self._add(Histogram(name, help, label, buckets))
+
+    def counter(self, name: str, help: str, label: str = None) -> Counter:
+        return self._add(Counter(name, help, label))
+
+    def gauge_fn(self, name: str, help: str, fn, label: str = None):
+        return self._add(Callback(name, help, "gauge", fn, label))
+
+    def counter_fn(self, name: str, help: str, fn, label: str = None):
+        return self._add(Callback(name, help, "counter", fn, label))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+# Shared by every module: `with span("jpeg_encode"): ...`
+stage_seconds = metrics.histogram("polyhouse_stage_seconds", "Time spent in each pipeline stage.")
+span = stage_seconds.time
+
+def call_with_timings(fn, *args):
+    """Run `fn` in a worker process and return its result together with the stage timings it recorded there."""
+    result = fn(*args)
+    return result, stage_seconds.drain()
@@ -0,0 +1,98 @@
+# backend/app/model_backends.py
+# Interchangeable runtimes for the hibiscus classifier: full Keras or a (quantized) TFLite flatbuffer.
+
+import os
+import time
+
+import numpy as np
+
+DEFAULT_MODEL_PATHS = {
+    "keras": "backend/app/hibiscus_disease_classifier.h5",
+    "tflite-fp16": "backend/app/hibiscus_disease_classifier_fp16.tflite",
+    "tflite-int8": "backend/app/hibiscus_disease_classifier_int8.tflite",
+}
+
+class KerasBackend:
+    """Full TensorFlow/Keras model. Most accurate baseline, slowest to import and load."""
+    name = "keras"
+
+    def __init__(self, model_path: str):
+        import tensorflow as tf # Imported here so TFLite deployments never pay for it
+        self._tf = tf
+        self.model = tf.keras.models.load_model(model_path)
+        # Compiled once; reduce_retracing keeps varying batch sizes from re-tracing every call
+        self._forward = tf.function(lambda x: self.model(x, training=False), reduce_retracing=True)
+
+    def predict(self, images: np.ndarray) -> np.ndarray:
+        """(N, H, W, 3) RGB batch in, (N, num_classes) logits out."""
+        return self._forward(self._tf.convert_to_tensor(images, dtype=self._tf.float32)).numpy()
+
+class TFLiteBackend:
+    """TFLite interpreter for float16 or full-integer (int8) models made by convert_model.py."""
+
+    def __init__(self, model_path: str, num_threads: int = 4):
+        try:
+            # The slim runtime is what we install on the Pi; fall back to the one bundled with TensorFlow
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self.name = "tflite-int8" if np.issubdtype(self.input["dtype"], np.integer) else "tflite-fp16"
+
+    def predict(self, images: np.ndarray) -> np.ndarray:
+        """(N, H, W, 3) RGB batch in, (N, num_classes) logits out."""
+        if self.input["shape"][0] != len(images):
+            self.interpreter.resize_tensor_input(self.input["index"], [len(images), *self.input["shape"][1:]])
+            self.interpreter.allocate_tensors()
+            self.input = self.interpreter.get_input_details()[0]
+            self.output = self.interpreter.get_output_details()[0]
+
+        self.interpreter.set_tensor(self.input["index"], _quantize(images, self.input))
+        self.interpreter.invoke()
+        return _dequantize(self.interpreter.get_tensor(self.output["index"]), self.output)
+
+class StubBackend:
+    """Deterministic stand-in for load tests and benchmarks: no TensorFlow, fixed cost per forward pass
+    (POLYHOUSE_STUB_LATENCY_MS, plus POLYHOUSE_STUB_LATENCY_PER_FRAME_MS for each frame in the batch)."""
+    name = "stub"
+
+    def __init__(self, model_path: str = None):
+        self.latency_s = float(os.getenv("POLYHOUSE_STUB_LATENCY_MS", "20")) / 1000
+        self.per_frame_s = float(os.getenv("POLYHOUSE_STUB_LATENCY_PER_FRAME_MS", "2")) / 1000
+
+    def predict(self, images: np.ndarray) -> np.ndarray:
+        time.sleep(self.latency_s + self.per_frame_s * len(images))
+        # Darker frames score as "diseased" so results still vary with the input
+        brightness = images.reshape(len(images), -1).mean(axis=1) / 255
+        return np.stack([1 - brightness, brightness], axis=1).astype(np.float32)
+
+def _quantize(images: np.ndarray, details: dict) -> np.ndarray:
+    dtype = details["dtype"]
+    if not np.issubdtype(dtype, np.integer):
+        return images.astype(dtype)
+    scale, zero_point = details["quantization"]
+    if scale:
+        images = np.round(images.astype(np.float32) / scale + zero_point)
+    info = np.iinfo(dtype)
+    return np.clip(images, info.min, info.max).astype(dtype)
+
+def _dequantize(values: np.ndarray, details: dict) -> np.ndarray:
+    scale, zero_point = details["quantization"]
+    if np.issubdtype(values.dtype, np.integer) and scale:
+        return (values.astype(np.float32) - zero_point) * scale
+    return values.astype(np.float32)
+
+def load_backend(kind: str, model_path: str = None):
+    """Build a backend by name: 'keras', 'tflite-fp16', 'tflite-int8' or 'stub'."""
+    model_path = model_path or DEFAULT_MODEL_PATHS.get(kind)
+    if kind == "keras":
+        return KerasBackend(model_path)
+    if kind in ("tflite-fp16", "tflite-int8"):
+        return TFLiteBackend(model_path)
+    if kind == "stub":
+        return StubBackend(model_path)
+    raise ValueError(f"Unknown model backend '{kind}'. Choose from: {', '.join(DEFAULT_MODEL_PATHS)}, stub")
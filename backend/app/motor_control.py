@@ -0,0 +1,215 @@
+# backend/app/motor_control.py
+# Manual-override motor control, kept off the telemetry path: commands are applied straight on the event loop
+# (never queued behind the I/O pool or inference) and a deadman watchdog stops the rover if they stop arriving.
+#
+# /ws/control protocol (JSON text messages):
+#   client -> {"seq": 7, "type": "motor", "motor_id": 1, "direction": "forward", "speed": 80}
+#             {"seq": 8, "type": "heartbeat"}      keeps the motors running while the operator holds a control
+#             {"seq": 9, "type": "stop_all"}
+#             {"type": "pong", "id": 3}            reply to a server ping
+#   server -> {"type": "ack", "seq": 7, "status": "ok" | "stale" | "error", "server_ms", "rtt_ms", "motor_statuses"}
+#             {"type": "ping", "id": 3}
+#             {"type": "motor_stop", "reason": "deadman" | "disconnect", "motor_statuses"}
+# Sequence numbers must increase per connection; an older command arriving late is acknowledged as "stale" and
+# never applied, so it can't undo a newer one.
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from .config import CONTROL_DEADMAN_S, CONTROL_PING_S
+from .metrics import metrics, span, stage_seconds
+
+MOTOR_IDS = (1, 2, 3, 4)
+DIRECTIONS = ("forward", "backward", "stop")
+
+commands_total = metrics.counter("polyhouse_control_commands_total", "Control commands received, by outcome.", label="status")
+forced_stops_total = metrics.counter("polyhouse_control_forced_stops_total", "Motor stops not requested by an operator.", label="reason")
+
+class ControlSession:
+    """One /ws/control connection."""
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.last_seq = -1
+        self.pings = OrderedDict()  # ping id -> perf_counter when sent
+        self.next_ping = 0
+        self.rtt_ms = None
+        self._send_lock = asyncio.Lock()
+
+    async def send(self, message: dict):
+        async with self._send_lock:
+            await self.websocket.send_json(message)
+
+class MotorController:
+    """Single owner of the motors. `driver` is MockSensorData or SensorDataAggregator (control_motor,
+    stop_all_motors, motor_speeds). Every movement arms a deadline; the watchdog stops all motors once it passes."""
+
+    def __init__(self, driver, deadman_s: float = CONTROL_DEADMAN_S, ping_s: float = CONTROL_PING_S):
+        self.driver = driver
+        self.deadman_s = deadman_s
+        self.ping_s = ping_s
+        self.deadline = None   # monotonic time the motors stop unless another command or heartbeat arrives
+        self.owner = None      # session that last moved the motors; losing it stops them
+        self.sessions = set()
+        self.task = None
+        self.forced_stops = 0
+
+    def start(self):
+        if not self.task:
+            self.task = asyncio.create_task(self._watchdog())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+        self.stop_all()
+
+    def moving(self) -> bool:
+        return any(self.driver.motor_speeds.values())
+
+    def motor_statuses(self) -> dict:
+        return dict(self.driver.motor_speeds)
+
+    # --- Commands ---
+    def command(self, motor_id: int, direction: str, speed: int, hold_s: float = None) -> dict:
+        """Validate and apply one motor command. `hold_s` arms the deadman (None/0: runs until told otherwise).
+        A deadline armed by someone else (a /ws/control client still driving) is never pushed earlier or disarmed."""
+        if motor_id not in MOTOR_IDS:
+            raise ValueError(f"motor_id must be one of {MOTOR_IDS}")
+        if direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {DIRECTIONS}")
+        if not 0 <= speed <= 100:
+            raise ValueError("speed must be between 0 and 100")
+        with span("control_apply"):
+            self.driver.control_motor(motor_id, direction, speed)
+        if not self.moving():
+            self.deadline = None  # everything is stopped: nothing left to time out
+        elif hold_s:
+            self.deadline = max(self.deadline or 0.0, time.monotonic() + hold_s)
+        return self.motor_statuses()
+
+    def stop_all(self, reason: str = None) -> dict:
+        """Stop every motor; `reason` is set when the stop wasn't asked for (deadman, disconnect, shutdown)."""
+        with span("control_apply"):
+            self.driver.stop_all_motors()
+        self.deadline = None
+        if reason:
+            self.forced_stops += 1
+            forced_stops_total.inc(1, reason)
+        return self.motor_statuses()
+
+    def heartbeat(self):
+        if self.deadline is not None:
+            self.deadline = time.monotonic() + self.deadman_s
+
+    # --- Control WebSocket ---
+    async def serve(self, websocket: WebSocket):
+        await websocket.accept()
+        session = ControlSession(websocket)
+        self.sessions.add(session)
+        pinger = asyncio.create_task(self._ping(session))
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                # Parsed in handle(), so a malformed or binary message gets an error ack instead of ending the session
+                reply = self.handle(session, message.get("text") or "", time.perf_counter())
+                if reply:
+                    await session.send(reply)
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+        finally:
+            pinger.cancel()
+            self.sessions.discard(session)
+            if session is self.owner:
+                self.owner = None
+                # The operator's link is gone: don't wait out the deadman
+                if self.moving():
+                    print("🛑 Control client disconnected while driving, stopping motors")
+                    await self._notify("disconnect", self.stop_all("disconnect"))
+
+    def handle(self, session: ControlSession, message, received: float) -> dict:
+        """Apply one client message (JSON text or an already parsed dict) and build its ack (None for pongs)."""
+        if isinstance(message, str):
+            try:
+                message = json.loads(message)
+            except ValueError:
+                commands_total.inc(1, "error")
+                return {"type": "ack", "seq": None, "status": "error", "error": "messages must be JSON objects"}
+        kind = message.get("type", "motor") if isinstance(message, dict) else None
+        if kind == "pong":
+            sent = session.pings.pop(message.get("id"), None)
+            if sent is not None:
+                stage_seconds.observe("control_rtt", time.perf_counter() - sent)
+                session.rtt_ms = round((time.perf_counter() - sent) * 1000, 3)
+            return None
+
+        seq = message.get("seq") if kind else None
+        if not isinstance(seq, int) or isinstance(seq, bool):
+            commands_total.inc(1, "error")
+            return {"type": "ack", "seq": seq, "status": "error", "error": "every command needs an integer 'seq'"}
+        if seq <= session.last_seq:
+            commands_total.inc(1, "stale")
+            return self._ack(seq, "stale", received, session)
+        session.last_seq = seq
+        try:
+            if kind == "motor":
+                self.command(int(message["motor_id"]), message["direction"], int(message.get("speed", 0)), self.deadman_s)
+                self.owner = session if self.moving() else self.owner
+            elif kind == "stop_all":
+                self.stop_all()
+            elif kind == "heartbeat":
+                self.heartbeat()
+            else:
+                raise ValueError(f"Unknown command type '{kind}'")
+        except (KeyError, TypeError, ValueError) as e:
+            commands_total.inc(1, "error")
+            return {**self._ack(seq, "error", received, session), "error": str(e)}
+        commands_total.inc(1, "ok")
+        return self._ack(seq, "ok", received, session)
+
+    def _ack(self, seq: int, status: str, received: float, session: ControlSession) -> dict:
+        return {"type": "ack", "seq": seq, "status": status, "motor_statuses": self.motor_statuses(),
+                "server_ms": round((time.perf_counter() - received) * 1000, 3), "rtt_ms": session.rtt_ms}
+
+    async def _ping(self, session: ControlSession):
+        """Server-side round-trip measurement, independent of the client's clock."""
+        while True:
+            await asyncio.sleep(self.ping_s)
+            session.next_ping += 1
+            session.pings[session.next_ping] = time.perf_counter()
+            while len(session.pings) > 8: # unanswered pings don't pile up
+                session.pings.popitem(last=False)
+            try:
+                await session.send({"type": "ping", "id": session.next_ping})
+            except Exception:
+                return
+
+    async def _watchdog(self):
+        while True:
+            await asyncio.sleep(self.deadman_s / 5)
+            if self.deadline is not None and time.monotonic() > self.deadline:
+                print(f"🛑 Deadman: no control command for {self.deadman_s:g}s, stopping motors")
+                await self._notify("deadman", self.stop_all("deadman"))
+
+    async def _notify(self, reason: str, motor_statuses: dict):
+        message = {"type": "motor_stop", "reason": reason, "motor_statuses": motor_statuses}
+        for session in list(self.sessions):
+            try:
+                await asyncio.wait_for(session.send(message), timeout=1.0)
+            except Exception:
+                pass # its own receive loop will notice the dead socket
+
+    def stats(self) -> dict:
+        stages = stage_seconds.summary()
+        return {
+            "motor_statuses": self.motor_statuses(), "deadman_s": self.deadman_s,
+            "deadman_armed": self.deadline is not None, "control_clients": len(self.sessions),
+            "forced_stops": self.forced_stops,
+            "apply_latency": stages.get("control_apply"), "round_trip": stages.get("control_rtt"),
+        }
@@ -0,0 +1,83 @@
+# backend/app/profiler.py
+# On-demand sampling profiler: turn it on over the API during a lag spike, read back the hottest stacks.
+
+import os
+import sys
+import time
+from collections import Counter
+from threading import Event, Thread, get_ident
+
+class SamplingProfiler:
+    """Snapshots every thread's Python stack each `interval_s` with sys._current_frames().
+    Costs nothing while stopped and stops itself after `max_duration_s` so it can't be left running.
+    Only sees this process; inference worker processes show up as time waiting in the inference stage."""
+
+    def __init__(self, max_depth: int = 48):
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self.leaves = Counter()
+        self.samples = 0
+        self.interval_s = None
+        self.started_at = self.stopped_at = None
+        self._stop = Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval_s: float = 0.005, max_duration_s: float = 60):
+        if self.running:
+            raise RuntimeError("Profiler is already running")
+        self.stacks.clear()
+        self.leaves.clear()
+        self.samples = 0
+        self.interval_s = interval_s
+        self.started_at, self.stopped_at = time.time(), None
+        self._stop.clear()
+        self._thread = Thread(target=self._sample, args=(max_duration_s,), name="sampling-profiler", daemon=True)
+        self._thread.start()
+        print(f"🔬 Sampling profiler started ({interval_s * 1000:g} ms interval, auto-stop after {max_duration_s:g}s)")
+
+    def stop(self) -> dict:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+        return self.report()
+
+    def _sample(self, max_duration_s: float):
+        me = get_ident()
+        deadline = time.monotonic() + max_duration_s
+        while not self._stop.wait(self.interval_s) and time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                    frame = frame.f_back
+                if not stack:
+                    continue
+                self.leaves[stack[0]] += 1
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+        self.stopped_at = time.time()
+
+    def report(self, limit: int = 25) -> dict:
+        end = self.stopped_at or time.time()
+        # dict.copy is atomic under the GIL, so reading while the sampler thread writes is safe
+        leaves, stacks = Counter(dict.copy(self.leaves)), Counter(dict.copy(self.stacks))
+        return {
+            "running": self.running, "samples": self.samples, "interval_ms": (self.interval_s or 0) * 1000,
+            "duration_s": round(end - self.started_at, 2) if self.started_at else 0,
+            # Leaf frames are where threads actually were; idle threads show up parked in wait()/select()
+            "top_frames": [{"frame": f, "samples": n} for f, n in leaves.most_common(limit)],
+            "top_stacks": [{"stack": s, "samples": n} for s, n in stacks.most_common(limit)],
+        }
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed-stack format, ready for flamegraph.pl or speedscope."""
+        return "".join(f"{stack} {n}\n" for stack, n in Counter(dict.copy(self.stacks)).most_common())
+
+profiler = SamplingProfiler()
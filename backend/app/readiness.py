@@ -0,0 +1,65 @@
+# backend/app/readiness.py
+# Slow components (model, camera, video) start in the background; this tracks where each one is.
+
+import time
+from threading import Thread
+
+PENDING, STARTING, READY, FAILED = "pending", "starting", "ready", "failed"
+
+class Readiness:
+    """Component name -> state. `required` components gate /api/ready; the rest only degrade the output."""
+
+    def __init__(self):
+        self.components = {}
+
+    def register(self, name: str, required: bool = False):
+        self.components[name] = {"state": PENDING, "required": required, "detail": None,
+                                 "since": time.time(), "startup_s": None}
+
+    def set(self, name: str, state: str, detail: str = None):
+        component = self.components.setdefault(name, {"required": False, "startup_s": None})
+        now = time.time()
+        if state in (READY, FAILED) and component.get("state") == STARTING:
+            component["startup_s"] = round(now - component["since"], 2)
+        component.update(state=state, detail=detail, since=now)
+
+    def state(self, name: str) -> str:
+        return self.components.get(name, {}).get("state", PENDING)
+
+    def is_ready(self, name: str) -> bool:
+        return self.state(name) == READY
+
+    def _finish(self, name: str, result=None, error: Exception = None):
+        if error is not None:
+            self.set(name, FAILED, str(error))
+            print(f"❌ {name} failed to start: {error}")
+            return None
+        self.set(name, READY, result if isinstance(result, str) else None)
+        print(f"✅ {name} ready ({self.components[name]['startup_s']}s)")
+        return result
+
+    def run(self, name: str, fn, *args):
+        """Run a blocking initializer now, recording its state and duration."""
+        self.set(name, STARTING)
+        try:
+            return self._finish(name, fn(*args))
+        except Exception as e:
+            return self._finish(name, error=e)
+
+    async def run_async(self, name: str, awaitable):
+        self.set(name, STARTING)
+        try:
+            return self._finish(name, await awaitable)
+        except Exception as e:
+            return self._finish(name, error=e)
+
+    def run_in_background(self, name: str, fn, *args) -> Thread:
+        thread = Thread(target=self.run, args=(name, fn, *args), name=f"init-{name}", daemon=True)
+        thread.start()
+        return thread
+
+    def report(self) -> dict:
+        ready = all(c["state"] == READY for c in self.components.values() if c["required"])
+        return {"ready": ready, "components": self.components}
+
+readiness = Readiness()
@@ -3,7 +3,9 @@
 import time
 from datetime import datetime
 import numpy as np
-from .config import IS_RPI # Use the central config file to check the platform
+from .config import IS_RPI, DHT22_PERIOD_S, ULTRASONIC_PERIOD_S, CAMERA_PERIOD_S # Use the central config file to check the platform
+from .sensor_scheduler import SensorScheduler
+from .frames import Frame
 
 # This block is crucial: it only imports hardware libraries if on the Pi
 if IS_RPI:
@@ -71,22 +73,28 @@ class UltrasonicSensor:
 class CameraModule:
     def __init__(self):
         self.camera = None
+
+    def open(self):
+        """Slow (includes a 2 s warm-up), so the app runs it in the background after startup"""
         if IS_RPI:
-            try:
-                self.camera = picamera.PiCamera()
-                self.camera.resolution = (640, 480)
-                time.sleep(2) # Camera warm-up time
-                print("✅ Camera module initialized.")
-            except Exception as e:
-                print(f"❌ ERROR initializing Camera: {e}")
+            # Failures propagate so the readiness report shows the camera as failed
+            camera = picamera.PiCamera()
+            camera.resolution = (640, 480)
+            time.sleep(2) # Camera warm-up time
+            self.camera = camera # Only published once warm, so the scheduler never captures a dark frame
+            print("✅ Camera module initialized.")
 
-    def capture_frame_bytes(self):
+    def capture_frame(self):
+        """Capture straight into an RGB numpy buffer, skipping the JPEG round trip"""
         if not self.camera: return None
-        from io import BytesIO
-        stream = BytesIO()
-        self.camera.capture(stream, format='jpeg', use_video_port=True)
-        stream.seek(0)
-        return stream.getvalue()
+        width, height = self.camera.resolution
+        image = np.empty((height, width, 3), dtype=np.uint8)
+        self.camera.capture(image, format='rgb', use_video_port=True)
+        return Frame(image, color_order="RGB")
+
+    def capture_frame_bytes(self):
+        frame = self.capture_frame()
+        return frame.jpeg() if frame else None
 
 class SensorDataAggregator:
     def __init__(self):
@@ -94,12 +102,23 @@ class SensorDataAggregator:
         self.dht22 = DHT22Sensor()
         self.ultrasonic = UltrasonicSensor()
         self.camera = CameraModule()
-        # Initialize other sensor classes here
+        # Each sensor runs at its own rate; register other sensor classes here the same way
+        self.scheduler = SensorScheduler()
+        self.scheduler.add("dht22", self.dht22.read, DHT22_PERIOD_S, jitter_s=0.5, timeout_s=5.0,
+                           initial=(self.dht22.last_temp, self.dht22.last_humidity))
+        self.scheduler.add("ultrasonic", self.ultrasonic.read, ULTRASONIC_PERIOD_S, jitter_s=0.005, timeout_s=0.2,
+                           initial=self.ultrasonic.last_distance)
+        # Yields None until camera.open() has finished
+        self.scheduler.add("camera", self.camera.capture_frame, CAMERA_PERIOD_S, jitter_s=0.05, timeout_s=2.0)
+        self.motor_speeds = {1: 0, 2: 0, 3: 0, 4: 0}
+
+    def start(self):
+        self.scheduler.start()
 
     def get_all_sensor_data(self):
-        temp, humidity = self.dht22.read()
-        water_level = self.ultrasonic.read()
-        frame_bytes = self.camera.capture_frame_bytes()
+        """O(1): assembles the latest scheduled readings, never touches the hardware itself."""
+        readings = self.scheduler.snapshot()
+        temp, humidity = readings["dht22"].value
         
         # Simulate other values until all sensors are wired
         return {
@@ -107,13 +126,22 @@ class SensorDataAggregator:
             "greenhouse_id": "GH001-RPI",
             "temperature_internal": temp,
             "humidity": humidity,
-            "water_level_cm": water_level,
-            "camera_frame_base64": base64.b64encode(frame_bytes).decode('utf-8') if frame_bytes else None,
+            "water_level_cm": readings["ultrasonic"].value,
+            "camera_frame": readings["camera"].value,
+            "stale_sensors": self.scheduler.stale(),
+            "motor_statuses": self.motor_speeds.copy(),
             # Placeholder data
             "soil_moisture": 68.5,
             "motion_detected": False,
             "soil_ph": 6.4,
         }
 
-# This single instance will be imported by main.py
-sensor_aggregator = SensorDataAggregator()
\ No newline at end of file
+    # Placeholder until the L298N driver is wired: same interface as MockSensorData, so /ws/control works on both
+    def control_motor(self, motor_id: int, direction: str, speed: int):
+        self.motor_speeds[motor_id] = speed if direction != 'stop' else 0
+
+    def stop_all_motors(self):
+        self.motor_speeds = {1: 0, 2: 0, 3: 0, 4: 0}
+
+# This single instance will be imported by main.py, which starts it on app startup
+sensor_aggregator = SensorDataAggregator()
@@ -0,0 +1,88 @@
+# backend/app/sensor_scheduler.py
+# Samples every sensor on its own period in its own worker; readers only ever look at the latest values.
+
+import random
+import time
+from collections import namedtuple
+from threading import Event, Thread
+
+SensorReading = namedtuple("SensorReading", ["value", "read_at", "duration_s", "error"])
+
+class SensorTask:
+    def __init__(self, name: str, read_fn, period_s: float, jitter_s: float = 0.0, timeout_s: float = None):
+        self.name = name
+        self.read_fn = read_fn
+        self.period_s = period_s
+        self.jitter_s = jitter_s
+        self.timeout_s = timeout_s if timeout_s is not None else period_s
+        self.reads = self.errors = self.overruns = 0
+        self.in_flight_since = None
+        self.thread = None
+
+class SensorScheduler:
+    """Multi-rate sampler. Each sensor gets a daemon thread that reads it every `period_s` (+/- jitter).
+    Readings land in a dict whose keys are fixed at registration, so workers only replace values and
+    snapshot() never takes a lock or waits on slow hardware."""
+
+    def __init__(self):
+        self.tasks = {}
+        self.readings = {}
+        self.stop_event = Event()
+
+    def add(self, name: str, read_fn, period_s: float, jitter_s: float = 0.0, timeout_s: float = None, initial=None):
+        if self.tasks.get(name) and self.tasks[name].thread:
+            raise ValueError(f"Sensor '{name}' is already running")
+        self.tasks[name] = SensorTask(name, read_fn, period_s, jitter_s, timeout_s)
+        self.readings[name] = SensorReading(initial, None, 0.0, None)
+
+    def start(self):
+        self.stop_event.clear()
+        for task in self.tasks.values():
+            if task.thread is None:
+                task.thread = Thread(target=self._worker, args=(task,), name=f"sensor-{task.name}", daemon=True)
+                task.thread.start()
+        print(f"⏱️ Sensor scheduler started: " + ", ".join(f"{t.name}@{1 / t.period_s:g}Hz" for t in self.tasks.values()))
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _worker(self, task: SensorTask):
+        # Random phase so sensors sharing a period don't all hit the bus at once
+        next_run = time.monotonic() + random.uniform(0, task.jitter_s)
+        while not self.stop_event.wait(max(0.0, next_run - time.monotonic())):
+            started = time.monotonic()
+            task.in_flight_since = started
+            try:
+                value, error = task.read_fn(), None
+            except Exception as e:
+                value, error = self.readings[task.name].value, str(e)
+                task.errors += 1
+            duration = time.monotonic() - started
+            task.in_flight_since = None
+            task.reads += 1
+            if duration > task.timeout_s:
+                task.overruns += 1
+            self.readings[task.name] = SensorReading(value, time.time(), duration, error)
+            # Keep a fixed cadence; if a read overran, start the next one right away rather than bunching up
+            next_run = max(started + task.period_s + random.uniform(-task.jitter_s, task.jitter_s), time.monotonic())
+
+    def latest(self, name: str) -> SensorReading:
+        return self.readings[name]
+
+    def snapshot(self) -> dict:
+        return dict(self.readings)
+
+    def stale(self, now: float = None) -> list:
+        """Sensors with no reading within period + timeout (stuck hardware or a hung read)."""
+        now = now if now is not None else time.time()
+        return [name for name, task in self.tasks.items()
+                if self.readings[name].read_at is None or now - self.readings[name].read_at > task.period_s + task.timeout_s]
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {name: {
+            "period_s": task.period_s, "timeout_s": task.timeout_s,
+            "reads": task.reads, "errors": task.errors, "overruns": task.overruns,
+            "last_duration_s": round(self.readings[name].duration_s, 4),
+            "in_flight_s": round(now - task.in_flight_since, 3) if task.in_flight_since else None,
+        } for name, task in self.tasks.items()}
@@ -7,12 +7,17 @@ import io
 import numpy as np
 from .video_simulator import video_simulator
 
+# Canned AI results for the detect_disease / detect_pest demo scenarios (also used by fleet_simulator.py)
+DEMO_DISEASE_ANALYSIS = { 'diseases_detected': [{'name': 'powdery_mildew', 'confidence': 92.3, 'recommended_action': 'Neem oil spray'}], 'overall_health': 'diseased' }
+DEMO_PEST_ANALYSIS = { 'pests_detected': [{'pest_type': 'aphids', 'count': 42, 'confidence': 88.1, 'severity': 'moderate'}], 'infestation_level': 'moderate' }
+
 class MockSensorData:
     def __init__(self):
         self.problem_mode = None
         self.motor_speeds = {1: 0, 2: 0, 3: 0, 4: 0}
-        
-        # Start video simulator
+    
+    def start(self):
+        """Open the simulated camera. Called from app startup (in the background), not at import"""
         video_simulator.start()
         
     def trigger_problem(self, problem_type: str):
@@ -57,8 +62,8 @@ class MockSensorData:
         elif self.problem_mode == 'high_soil_moisture':
             soil_moisture += 20
         
-        # Get camera frame from video simulator
-        camera_frame = video_simulator.get_frame_base64()
+        # Raw camera frame from video simulator; JPEG/base64 encoding is left to whoever needs pixels
+        camera_frame = video_simulator.capture()
         
         return {
             "timestamp": datetime.now().isoformat(),
@@ -75,7 +80,7 @@ class MockSensorData:
             "soil_ph": round(6.2 + random.uniform(-0.2, 0.2), 1),
             "soil_ec": round(1.8 + random.uniform(-0.1, 0.1), 1),
             "motor_statuses": self.motor_speeds.copy(),
-            "camera_frame_base64": camera_frame
+            "camera_frame": camera_frame
         }
     
     def control_motor(self, motor_id: int, direction: str, speed: int):
@@ -0,0 +1,306 @@
+# backend/app/session_recorder.py
+# Record a rover session to disk (telemetry columns + memory-mapped JPEG store) and replay it through the pipeline.
+#
+# Session directory layout:
+#   meta.json     column names/types, start time, counts
+#   rows.f8       float64 matrix, one row per tick: [ts, frame_id, <numeric columns>...]
+#   extras.jsonl  non-numeric fields (ids, motor states, ...), written only when they change
+#   frames.bin    JPEG bytes back to back, never base64
+#   frames.idx    fixed-size records (offset, length, ts) so any frame is one slice of the mmap away
+#   events.jsonl  alert transitions seen while recording, for comparing against a replay
+
+import json
+import mmap
+import os
+import re
+import time
+from bisect import bisect_right
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+
+import numpy as np
+
+from .config import SESSIONS_DIR
+from .frames import Frame
+from .timeseries_store import to_epoch
+
+FORMAT_VERSION = 1
+FRAME_INDEX_DTYPE = np.dtype([("offset", "<u8"), ("length", "<u4"), ("ts", "<f8")])
+NO_FRAME = -1.0
+MAX_SPEED = 0  # replay speed meaning "as fast as the pipeline can go"
+
+def parse_speed(value) -> float:
+    """'1', '10', '0.5' or 'max'."""
+    if str(value).lower() == "max":
+        return MAX_SPEED
+    speed = float(value)
+    if speed <= 0:
+        raise ValueError("Replay speed must be positive, or 'max'")
+    return speed
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+class SessionRecorder:
+    """Appends ticks to a session directory. Column set is fixed by the first record; anything else goes to extras."""
+
+    def __init__(self, path: Path, source: str = None):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=False)
+        self.source = source
+        self.columns = None
+        self.types = {}
+        self.rows = self.frames = self.events = 0
+        self.started_at = time.time()
+        self._last_extras = None
+        self._last_frame = None
+        self._last_frame_id = NO_FRAME
+        self._frame_offset = 0
+        self._lock = Lock()   # record() runs on the I/O pool, close() on an API handler
+        self.closed = False
+        self._rows = open(self.path / "rows.f8", "ab")
+        self._extras = open(self.path / "extras.jsonl", "a")
+        self._frames = open(self.path / "frames.bin", "ab")
+        self._index = open(self.path / "frames.idx", "ab")
+        self._events = open(self.path / "events.jsonl", "a")
+        self._write_meta(closed=False)
+
+    def record(self, data: dict, frame: Frame = None, events: list = None, ts: float = None):
+        """Store one raw sensor snapshot (before analysis), its frame, and the alert transitions it caused."""
+        ts = ts if ts is not None else to_epoch(data.get("timestamp")) or time.time()
+        with self._lock:
+            if self.closed:
+                return  # recording was stopped while this tick was on its way
+            if self.columns is None:
+                self.columns = [k for k, v in data.items() if _is_number(v) or isinstance(v, bool)]
+                self.types = {k: "bool" if isinstance(data[k], bool) else "number" for k in self.columns}
+                self._write_meta(closed=False)
+
+            row = np.full(2 + len(self.columns), np.nan)
+            row[0], row[1] = ts, self._store_frame(frame, ts)
+            for i, column in enumerate(self.columns, start=2):
+                value = data.get(column)
+                if _is_number(value) or isinstance(value, bool):
+                    row[i] = float(value)
+            self._rows.write(row.tobytes())
+
+            extras = {k: v for k, v in data.items() if k not in self.types and k not in ("timestamp", "replay")}
+            if extras != self._last_extras:
+                self._extras.write(json.dumps({"row": self.rows, "values": extras}, default=str) + "\n")
+                self._last_extras = extras
+            for event in events or ():
+                self._events.write(json.dumps({"row": self.rows, "ts": ts, **event}, default=str) + "\n")
+                self.events += 1
+            self.rows += 1
+
+    def _store_frame(self, frame: Frame, ts: float) -> float:
+        if frame is None:
+            return NO_FRAME
+        # Sources hand out the same Frame object until the picture changes, so repeats cost nothing
+        if frame is self._last_frame:
+            return self._last_frame_id
+        jpeg = frame.jpeg()
+        self._frames.write(jpeg)
+        record = np.array([(self._frame_offset, len(jpeg), ts)], dtype=FRAME_INDEX_DTYPE)
+        self._index.write(record.tobytes())
+        self._frame_offset += len(jpeg)
+        self._last_frame, self._last_frame_id = frame, float(self.frames)
+        self.frames += 1
+        return self._last_frame_id
+
+    def _write_meta(self, closed: bool):
+        meta = {
+            "version": FORMAT_VERSION, "source": self.source, "started_at": self.started_at,
+            "columns": self.columns or [], "types": self.types,
+            "rows": self.rows, "frames": self.frames, "events": self.events, "closed": closed,
+        }
+        with open(self.path / "meta.json", "w") as f:
+            json.dump(meta, f, indent=2)
+
+    def close(self) -> dict:
+        with self._lock:
+            if self.closed:
+                return self.status()
+            self.closed = True
+            for f in (self._rows, self._extras, self._frames, self._index, self._events):
+                f.close()
+            self._write_meta(closed=True)
+        return self.status()
+
+    def status(self) -> dict:
+        return {"session": self.path.name, "recording": not self.closed, "rows": self.rows,
+                "frames": self.frames, "events": self.events, "duration_s": round(time.time() - self.started_at, 1)}
+
+class SessionReplay:
+    """Stands in for MockSensorData / SensorDataAggregator. Each get_all_data() call returns the next recorded tick;
+    next_delay() says how long to wait before asking again (recorded gap / speed, or 0 at MAX_SPEED)."""
+
+    def __init__(self, path: Path, speed: float = 1.0, loop: bool = False):
+        self.path = Path(path)
+        with open(self.path / "meta.json") as f:
+            self.meta = json.load(f)
+        self.columns = self.meta["columns"]
+        self.types = self.meta["types"]
+        width = 2 + len(self.columns)
+        # Sized from the file rather than meta.json, so a session cut short by a crash still replays
+        rows_file = self.path / "rows.f8"
+        count = os.path.getsize(rows_file) // (8 * width)
+        self.rows = np.memmap(rows_file, dtype="<f8", mode="r", shape=(count, width)) if count else np.empty((0, width))
+        self.ts = np.ascontiguousarray(self.rows[:, 0])
+        self.frame_index = np.fromfile(self.path / "frames.idx", dtype=FRAME_INDEX_DTYPE)
+        self._frames_file = open(self.path / "frames.bin", "rb")
+        self._frames = mmap.mmap(self._frames_file.fileno(), 0, access=mmap.ACCESS_READ) if len(self.frame_index) else None
+        self._extras_rows, self._extras = [], []
+        with open(self.path / "extras.jsonl") as f:
+            for line in f:
+                entry = json.loads(line)
+                self._extras_rows.append(entry["row"])
+                self._extras.append(entry["values"])
+        self.speed = speed
+        self.loop = loop
+        self.position = 0
+        self.finished = count == 0
+        self._frame_cache = (None, None)
+        self._lock = Lock()  # reads run on the I/O pool; seek and close come from API handlers
+        self.closed = False
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def seek(self, at) -> int:
+        """Jump to the first tick at or after `at` (epoch seconds or ISO-8601)."""
+        at = to_epoch(at)
+        with self._lock:
+            self.position = min(int(np.searchsorted(self.ts, at, side="left")), max(len(self) - 1, 0))
+            self.finished = self.closed or len(self) == 0
+            return self.position
+
+    def seek_offset(self, seconds: float) -> int:
+        """Jump to `seconds` after the start of the session."""
+        return self.seek(self.ts[0] + seconds) if len(self) else 0
+
+    def frame(self, frame_id: int) -> Frame:
+        cached_id, cached = self._frame_cache
+        if frame_id == cached_id:
+            return cached # Same object for repeated frames, so the change gate and JPEG caches still hit
+        offset, length, ts = self.frame_index[frame_id]
+        frame = Frame.from_jpeg(self._frames[int(offset):int(offset) + int(length)], captured_at=float(ts))
+        self._frame_cache = (frame_id, frame)
+        return frame
+
+    def row(self, i: int) -> dict:
+        values = self.rows[i]
+        data = {}
+        extras_at = bisect_right(self._extras_rows, i) - 1
+        if extras_at >= 0:
+            data.update(self._extras[extras_at])
+        for column, value in zip(self.columns, values[2:].tolist()):
+            if value == value: # skip NaN (field missing in that tick)
+                data[column] = bool(value) if self.types[column] == "bool" else value
+        ts = float(values[0])
+        data["timestamp"] = datetime.fromtimestamp(ts).isoformat()
+        data["camera_frame"] = self.frame(int(values[1])) if values[1] >= 0 else None
+        data["replay"] = {"session": self.path.name, "row": i, "recorded_at": ts}
+        return data
+
+    def get_all_data(self) -> dict:
+        """The next recorded tick, or None once the replay has finished or been closed."""
+        with self._lock:
+            if self.finished:
+                return None
+            data = self.row(self.position)
+            self.position += 1
+            if self.position >= len(self):
+                self.position = 0
+                self.finished = not self.loop
+            return data
+
+    get_all_sensor_data = get_all_data
+
+    def next_delay(self) -> float:
+        """Seconds until the next recorded tick at the current speed."""
+        if self.speed == MAX_SPEED or self.finished or self.position == 0:
+            return 0.0
+        gap = self.ts[self.position] - self.ts[self.position - 1]
+        return max(float(gap), 0.0) / self.speed
+
+    def close(self):
+        # Waits for a read in progress, so the map is never closed under it
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = self.finished = True
+            if self._frames is not None:
+                self._frames.close()
+            self._frames_file.close()
+
+    def status(self) -> dict:
+        return {
+            "session": self.path.name, "speed": "max" if self.speed == MAX_SPEED else self.speed, "loop": self.loop,
+            "position": self.position, "rows": len(self), "finished": self.finished,
+            "at": float(self.ts[min(self.position, len(self) - 1)]) if len(self) else None,
+        }
+
+class SessionManager:
+    """At most one recording and one replay at a time, under `base_dir`/<session name>."""
+
+    def __init__(self, base_dir: str = SESSIONS_DIR):
+        self.base_dir = Path(base_dir)
+        self.recorder = None
+        self.replay = None
+
+    def _path(self, name: str) -> Path:
+        if not re.fullmatch(r"[\w.-]+", name or ""):
+            raise ValueError("Session names may only contain letters, digits, '.', '_' and '-'")
+        return self.base_dir / name
+
+    def start_recording(self, name: str = None, source: str = None) -> dict:
+        if self.recorder:
+            raise ValueError(f"Already recording '{self.recorder.path.name}'")
+        name = name or datetime.now().strftime("session-%Y%m%d-%H%M%S")
+        path = self._path(name)
+        if path.exists():
+            raise ValueError(f"Session '{name}' already exists")
+        self.recorder = SessionRecorder(path, source)
+        print(f"⏺️ Recording session '{name}'")
+        return self.recorder.status()
+
+    def stop_recording(self) -> dict:
+        if not self.recorder:
+            raise ValueError("Not recording")
+        recorder, self.recorder = self.recorder, None
+        status = recorder.close()
+        print(f"⏹️ Session '{status['session']}' saved: {status['rows']} ticks, {status['frames']} frames")
+        return status
+
+    def start_replay(self, name: str, speed: float = 1.0, loop: bool = False) -> dict:
+        path = self._path(name)
+        if not (path / "meta.json").exists():
+            raise ValueError(f"No session named '{name}'")
+        self.stop_replay()
+        self.replay = SessionReplay(path, speed, loop)
+        print(f"▶️ Replaying session '{name}' at {'max' if speed == MAX_SPEED else f'{speed:g}x'} speed")
+        return self.replay.status()
+
+    def events(self, name: str) -> list:
+        path = self._path(name) / "events.jsonl"
+        if not path.exists():
+            raise ValueError(f"No session named '{name}'")
+        with open(path) as f:
+            return [json.loads(line) for line in f]
+
+    def stop_replay(self):
+        if self.replay:
+            self.replay.close()
+            self.replay = None
+
+    def list(self) -> list:
+        if not self.base_dir.exists():
+            return []
+        sessions = []
+        for meta_file in sorted(self.base_dir.glob("*/meta.json")):
+            with open(meta_file) as f:
+                meta = json.load(f)
+            sessions.append({"session": meta_file.parent.name, **{k: meta[k] for k in ("source", "started_at", "rows", "frames", "events", "closed")}})
+        return sessions
@@ -0,0 +1,204 @@
+# backend/app/telemetry_codec.py
+# Compact binary encoding for rover -> server telemetry. The schema is fixed, so no key names go over the wire.
+# Each column holds fixed-point integers, delta-encoded against the previous sample and stored as zigzag varints.
+# Readings barely change between ticks, so most values take a single byte.
+#
+# Message layout (all varints are unsigned LEB128):
+#   magic "PT", version (1 byte), flags (1 byte; bit 0 = body is zlib-compressed)
+#   body:  varint rows, varint columns (a prefix of COLUMNS, so columns can be appended in later versions)
+#          one presence byte per column: 0 absent, 1 in every row, 2 in some rows (a packed row mask follows)
+#          the row masks of the "some rows" columns, in column order
+#          one varint stream: the present values' zigzag deltas, column by column
+# Fields outside the schema (greenhouse_id, camera_frame, ...) are not carried; the greenhouse comes from the URL
+# and frames keep their own raw-JPEG channel.
+
+import zlib
+
+import numpy as np
+
+from .timeseries_store import to_epoch
+
+MAGIC = b"PT"
+VERSION = 1
+FLAG_ZLIB = 0x01
+ABSENT, DENSE, MASKED = 0, 1, 2
+MAX_VARINT_BYTES = 10  # a 64-bit value
+VARINT_LIMITS = np.array([1 << (7 * k) for k in range(1, MAX_VARINT_BYTES)], dtype=np.uint64)  # smallest k+1-byte value
+
+STALE_SENSORS = ("dht22", "ultrasonic", "camera")  # bit i of the stale_sensors column
+MOTOR_IDS = (1, 2, 3, 4)
+
+# (field, scale): the value sent is round(value * scale). Order is part of the format: only ever append.
+COLUMNS = (
+    ("timestamp", 1000),  # epoch milliseconds
+    ("temperature_internal", 10), ("temperature_external", 10), ("temperature_soil", 10),
+    ("humidity", 10), ("soil_moisture", 10), ("water_level_cm", 10),
+    ("light_par", 10), ("co2_level", 10), ("soil_ph", 100), ("soil_ec", 100),
+    ("motion_detected", 1),
+    *((f"motor_statuses.{m}", 1) for m in MOTOR_IDS),
+    ("stale_sensors", 1),  # bitmask over STALE_SENSORS
+)
+SCALES = np.array([scale for _, scale in COLUMNS], dtype=np.float64)
+
+def is_packed(payload: bytes) -> bool:
+    return payload[:2] == MAGIC
+
+# --- Encoding (rover side) ---
+def flatten(reading: dict) -> list:
+    """One reading as a row of COLUMNS values (None where missing)."""
+    motors = reading.get("motor_statuses") or {}
+    stale = reading.get("stale_sensors")
+    row = [to_epoch(reading.get("timestamp"))]
+    for field, _ in COLUMNS[1:]:
+        if field.startswith("motor_statuses."):
+            motor = int(field.rsplit(".", 1)[1])
+            row.append(motors.get(motor, motors.get(str(motor))))
+        elif field == "stale_sensors":
+            row.append(None if stale is None else sum(1 << i for i, name in enumerate(STALE_SENSORS) if name in stale))
+        else:
+            value = reading.get(field)
+            row.append(value if isinstance(value, (int, float)) else None)
+    return row
+
+def encode(readings: list, compress: bool = False) -> bytes:
+    """Pack readings (dicts as produced by the sensor aggregator, or rows from `flatten`) into one message."""
+    rows = [flatten(r) if isinstance(r, dict) else r for r in readings]
+    values = np.array(rows, dtype=np.float64).reshape(len(rows), len(COLUMNS))  # None -> nan
+    present = ~np.isnan(values)
+    scaled = np.rint(np.where(present, values, 0) * SCALES).astype(np.int64)
+
+    kinds = np.where(present.all(axis=0), DENSE, np.where(present.any(axis=0), MASKED, ABSENT)).astype(np.uint8)
+    masks = [np.packbits(present[:, c]).tobytes() for c in np.flatnonzero(kinds == MASKED)]
+    # Deltas skip missing rows: carry each column's last present value forward, then difference down the rows
+    last_present = np.maximum.accumulate(np.where(present, np.arange(len(rows))[:, None], 0), axis=0)
+    carried = np.take_along_axis(scaled, last_present, axis=0)
+    deltas = np.diff(carried, axis=0, prepend=0)
+    stream = _varints(_zigzag(deltas.T[present.T]))  # column by column, present values only
+
+    body = _varints(np.array([len(rows), len(COLUMNS)], dtype=np.uint64)) + kinds.tobytes() + b"".join(masks) + stream
+    flags = 0
+    if compress:
+        body, flags = zlib.compress(body, 6), FLAG_ZLIB
+    return MAGIC + bytes((VERSION, flags)) + body
+
+def _zigzag(values: np.ndarray) -> np.ndarray:
+    return ((values << 1) ^ (values >> 63)).astype(np.uint64)
+
+def _varints(values: np.ndarray) -> bytes:
+    """Vectorised LEB128: one pass per byte position rather than one loop per value."""
+    sizes = np.searchsorted(VARINT_LIMITS, values, side="right") + 1
+    starts = np.cumsum(sizes) - sizes
+    out = np.empty(int(sizes.sum()), dtype=np.uint8)
+    for k in range(int(sizes.max(initial=0))):
+        selected = sizes > k
+        low = (values[selected] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        out[starts[selected] + k] = low | (sizes[selected] > k + 1).astype(np.uint64) << np.uint64(7)
+    return out.tobytes()
+
+# --- Decoding (server side) ---
+def decode_columns(payload: bytes, max_rows: int = None) -> tuple:
+    """Returns (n_rows, {field: float64 array, nan where missing}) for the fields this message carries."""
+    if not is_packed(payload) or len(payload) < 4:
+        raise ValueError("Not a packed telemetry message")
+    version, flags = payload[2], payload[3]
+    if version != VERSION:
+        raise ValueError(f"Unsupported packed telemetry version {version}")
+    body = payload[4:]
+    if flags & FLAG_ZLIB:
+        # Bounded, so a small compressed message can't expand without limit
+        limit = 16 + (max_rows or 1 << 16) * len(COLUMNS) * (MAX_VARINT_BYTES + 1)
+        inflater = zlib.decompressobj()
+        try:
+            body = inflater.decompress(body, limit)
+        except zlib.error as e:
+            raise ValueError(f"Corrupt packed telemetry: {e}")
+        if inflater.unconsumed_tail:
+            raise ValueError("Packed telemetry expands beyond the batch limit")
+        if not inflater.eof:
+            raise ValueError("Corrupt packed telemetry: truncated compressed body")
+
+    n_rows, offset = _read_varint(body, 0)
+    n_columns, offset = _read_varint(body, offset)
+    if max_rows is not None and n_rows > max_rows:
+        raise ValueError(f"At most {max_rows} readings per batch")
+    if n_columns > len(COLUMNS):
+        raise ValueError(f"Packed telemetry has {n_columns} columns; this server knows {len(COLUMNS)}")
+    kinds = np.frombuffer(body, dtype=np.uint8, count=n_columns, offset=offset) if n_columns else np.empty(0, np.uint8)
+    offset += n_columns
+    if (kinds > MASKED).any():
+        raise ValueError("Corrupt packed telemetry: bad column presence")
+
+    carried = np.flatnonzero(kinds != ABSENT)
+    present = np.ones((len(carried), n_rows), dtype=bool)
+    masked = np.flatnonzero(kinds[carried] == MASKED)
+    if len(masked):
+        mask_size = (n_rows + 7) // 8
+        if offset + mask_size * len(masked) > len(body):
+            raise ValueError("Corrupt packed telemetry: truncated row mask")
+        masks = np.frombuffer(body, np.uint8, mask_size * len(masked), offset).reshape(len(masked), mask_size)
+        present[masked] = np.unpackbits(masks, axis=1, count=n_rows).astype(bool)
+        offset += mask_size * len(masked)
+
+    deltas = _read_varints(np.frombuffer(body, dtype=np.uint8, offset=offset))
+    if len(deltas) != present.sum():
+        raise ValueError(f"Corrupt packed telemetry: {len(deltas)} values for {present.sum()} slots")
+    # Missing slots get a zero delta, so one cumulative sum along the rows rebuilds every column at once
+    scaled = np.zeros(present.shape, dtype=np.int64)
+    scaled[present] = deltas
+    values = np.cumsum(scaled, axis=1) / SCALES[carried, None]
+    values[~present] = np.nan
+    return n_rows, dict(zip((COLUMNS[c][0] for c in carried), values))
+
+def decode(payload: bytes, max_rows: int = None) -> list:
+    """Packed message -> reading dicts in the shape the aggregator produced (epoch timestamps)."""
+    n_rows, columns = decode_columns(payload, max_rows)
+    if not columns:
+        return [{} for _ in range(n_rows)]
+    fields = list(columns)
+    # One conversion to Python rows; missing values are nan (nan != nan) and are left out of the reading
+    rows = np.stack(list(columns.values()), axis=1).tolist()
+    plain = [(i, f) for i, f in enumerate(fields) if f not in ("motion_detected", "stale_sensors") and "." not in f]
+    motors = [(i, int(f.rsplit(".", 1)[1])) for i, f in enumerate(fields) if f.startswith("motor_statuses.")]
+    motion = fields.index("motion_detected") if "motion_detected" in columns else None
+    stale = fields.index("stale_sensors") if "stale_sensors" in columns else None
+    readings = []
+    for row in rows:
+        reading = {f: row[i] for i, f in plain if row[i] == row[i]}
+        if motion is not None and row[motion] == row[motion]:
+            reading["motion_detected"] = bool(row[motion])
+        if motors:
+            statuses = {m: int(row[i]) for i, m in motors if row[i] == row[i]}
+            if statuses: reading["motor_statuses"] = statuses
+        if stale is not None and row[stale] == row[stale]:
+            reading["stale_sensors"] = [name for i, name in enumerate(STALE_SENSORS) if int(row[stale]) >> i & 1]
+        readings.append(reading)
+    return readings
+
+def _read_varint(data: bytes, offset: int) -> tuple:
+    value = shift = 0
+    for _ in range(MAX_VARINT_BYTES):
+        if offset >= len(data):
+            break
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+    raise ValueError("Corrupt packed telemetry: bad varint")
+
+def _read_varints(data: np.ndarray) -> np.ndarray:
+    """Vectorised LEB128 + zigzag decode of a whole stream."""
+    if not len(data):
+        return np.empty(0, dtype=np.int64)
+    ends = np.flatnonzero((data & 0x80) == 0)
+    if not len(ends) or ends[-1] != len(data) - 1:
+        raise ValueError("Corrupt packed telemetry: truncated varint")
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    sizes = ends - starts + 1
+    if sizes.max() > MAX_VARINT_BYTES:
+        raise ValueError("Corrupt packed telemetry: varint too long")
+    shifts = (np.arange(len(data)) - np.repeat(starts, sizes)).astype(np.uint64) * np.uint64(7)
+    # The 7-bit groups don't overlap, so adding them is the same as or-ing them
+    values = np.add.reduceat((data & 0x7F).astype(np.uint64) << shifts, starts)
+    return (values >> np.uint64(1)).astype(np.int64) ^ -(values & np.uint64(1)).astype(np.int64)
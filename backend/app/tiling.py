@@ -0,0 +1,70 @@
+# backend/app/tiling.py
+# Region-level disease detection: overlapping tiles scored as one batch, diseased neighbours merged into boxes.
+
+import cv2
+import numpy as np
+
+from .ai_models import DiseaseDetector
+from .config import TILE_SIZE_PX, TILE_OVERLAP, TILE_MIN_CONFIDENCE
+from .frames import MODEL_INPUT_SIZE
+
+def _starts(length: int, tile: int, step: int) -> list:
+    starts = list(range(0, length - tile + 1, step))
+    if starts[-1] + tile < length:
+        starts.append(length - tile) # last tile flush with the edge, so nothing is left unscored
+    return starts
+
+def tile_grid(width: int, height: int, tile: int = TILE_SIZE_PX, overlap: float = TILE_OVERLAP):
+    """Row-major (x, y, w, h) boxes covering the frame, plus the (rows, cols) shape of the grid."""
+    tile = min(tile, width, height)
+    step = max(1, int(round(tile * (1 - overlap))))
+    xs, ys = _starts(width, tile, step), _starts(height, tile, step)
+    boxes = np.array([(x, y, tile, tile) for y in ys for x in xs], dtype=np.int32)
+    return boxes, (len(ys), len(xs))
+
+def prepare_tiles(frame, tile: int = TILE_SIZE_PX, overlap: float = TILE_OVERLAP):
+    """Frame -> ((N, H, W, 3) model inputs, boxes, grid shape). Cut from full-resolution pixels, so small
+    lesions keep their detail instead of being averaged away by the whole-frame resize."""
+    image = frame.rgb()
+    height, width = image.shape[:2]
+    boxes, grid = tile_grid(width, height, tile, overlap)
+    tiles = np.stack([cv2.resize(image[y:y + h, x:x + w], MODEL_INPUT_SIZE, interpolation=cv2.INTER_AREA)
+                      for x, y, w, h in boxes])
+    return tiles, boxes, grid
+
+def merge_regions(boxes: np.ndarray, grid: tuple, reports: list, min_confidence: float = TILE_MIN_CONFIDENCE) -> list:
+    """Group diseased tiles that touch on the grid (4-neighbour) and return one box per group, largest first."""
+    rows, cols = grid
+    confidence = np.array([r["confidence"] if r["overall_health"] == "diseased" else 0.0 for r in reports])
+    diseased = (confidence >= min_confidence).reshape(rows, cols)
+    seen = np.zeros_like(diseased)
+    regions = []
+    for start in zip(*np.nonzero(diseased)):
+        if seen[start]:
+            continue
+        seen[start] = True
+        stack, members = [start], []
+        while stack:
+            r, c = stack.pop()
+            members.append(r * cols + c)
+            for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+                if 0 <= nr < rows and 0 <= nc < cols and diseased[nr, nc] and not seen[nr, nc]:
+                    seen[nr, nc] = True
+                    stack.append((nr, nc))
+        member_boxes = boxes[members]
+        x0, y0 = member_boxes[:, :2].min(axis=0)
+        x1, y1 = (member_boxes[:, :2] + member_boxes[:, 2:]).max(axis=0)
+        regions.append({
+            "bbox": [int(x0), int(y0), int(x1 - x0), int(y1 - y0)], # (x, y, w, h), as VideoSimulator.highlight_disease_region takes
+            "confidence": round(float(confidence[members].max()), 2),
+            "tiles": len(members),
+        })
+    return sorted(regions, key=lambda region: region["tiles"], reverse=True)
+
+def with_regions(analysis: dict, regions: list, tiles_scored: int) -> dict:
+    """Copy of `analysis` with the regions added; a lesion too small to swing the whole-frame label still
+    marks the plant as diseased."""
+    disease = analysis["disease_analysis"]
+    if regions and disease["overall_health"] != "diseased":
+        disease = DiseaseDetector().report("diseased", max(region["confidence"] for region in regions))
+    return {**analysis, "disease_analysis": {**disease, "regions": regions, "tiles_scored": tiles_scored}}
@@ -0,0 +1,218 @@
+# backend/app/timeseries_store.py
+# Append-only sensor history: in-memory ring buffer for recent samples, SQLite for the long tail,
+# and 1 min / 1 h / 1 day min/max/mean rollups maintained incrementally on ingest.
+
+import time
+from collections import deque
+from datetime import datetime
+from threading import Lock
+
+from sqlalchemy import (
+    Column, Float, Index, Integer, MetaData, PrimaryKeyConstraint, String, Table,
+    create_engine, event, func, select, delete,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .config import HISTORY_DB_PATH, HISTORY_RING_SIZE, HISTORY_RAW_RETENTION_DAYS
+
+RESOLUTIONS = {"1m": 60, "1h": 3600, "1d": 86400}
+MAX_POINTS = 1000  # "auto" resolution picks the finest level that stays under this many points
+
+metadata = MetaData()
+
+samples_table = Table(
+    "samples", metadata,
+    Column("source", String, nullable=False),
+    Column("metric", String, nullable=False),
+    Column("ts", Float, nullable=False),
+    Column("value", Float, nullable=False),
+    Index("ix_samples_lookup", "metric", "source", "ts"),
+)
+
+rollups_table = Table(
+    "rollups", metadata,
+    Column("source", String, nullable=False),
+    Column("metric", String, nullable=False),
+    Column("resolution", Integer, nullable=False),
+    Column("bucket", Float, nullable=False),
+    Column("count", Integer, nullable=False),
+    Column("sum", Float, nullable=False),
+    Column("min", Float, nullable=False),
+    Column("max", Float, nullable=False),
+    PrimaryKeyConstraint("metric", "resolution", "source", "bucket"),
+)
+
+def to_epoch(value) -> float:
+    """Accepts epoch seconds, an ISO-8601 string or a datetime."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return datetime.fromisoformat(str(value)).timestamp()
+
+def numeric_fields(data: dict) -> dict:
+    return {k: float(v) for k, v in data.items() if isinstance(v, (int, float)) and not isinstance(v, bool)}
+
+class _Bucket:
+    __slots__ = ("start", "count", "sum", "min", "max")
+
+    def __init__(self, start: float, value: float):
+        self.start, self.count, self.sum, self.min, self.max = start, 1, value, value, value
+
+    def add(self, value: float):
+        self.count += 1
+        self.sum += value
+        if value < self.min: self.min = value
+        if value > self.max: self.max = value
+
+    def row(self, source: str, metric: str, resolution: int) -> dict:
+        return {"source": source, "metric": metric, "resolution": resolution, "bucket": self.start,
+                "count": self.count, "sum": self.sum, "min": self.min, "max": self.max}
+
+class TimeSeriesStore:
+    def __init__(self, db_path: str = HISTORY_DB_PATH, ring_size: int = HISTORY_RING_SIZE,
+                 raw_retention_days: float = HISTORY_RAW_RETENTION_DAYS, flush_every: int = 200, flush_interval_s: float = 30):
+        self.engine = create_engine(f"sqlite:///{db_path}")
+        event.listen(self.engine, "connect", _sqlite_pragmas)
+        metadata.create_all(self.engine)
+        self.ring_size = ring_size
+        self.raw_retention_s = raw_retention_days * 86400
+        self.flush_every = flush_every
+        self.flush_interval_s = flush_interval_s
+        self.lock = Lock()
+        self.recent = {}        # (source, metric) -> deque[(ts, value)]
+        self.open_buckets = {}  # (source, metric, resolution) -> _Bucket
+        self.pending_samples = []
+        self.pending_rollups = []
+        self.last_flush = time.monotonic()
+        self.last_prune = 0.0
+
+    # --- Ingest ---
+    def ingest(self, data: dict, source: str = None, ts: float = None):
+        """Record every numeric field of one sensor snapshot."""
+        self.ingest_many([(source, ts, data)])
+
+    def ingest_many(self, records):
+        """(source, ts, data) tuples, e.g. one tick of a whole fleet; checks for a flush once rather than per record."""
+        with self.lock:
+            for source, ts, data in records:
+                source = source or data.get("greenhouse_id", "default")
+                ts = ts if ts is not None else to_epoch(data.get("timestamp")) or time.time()
+                for metric, value in numeric_fields(data).items():
+                    self._append(source, metric, ts, value)
+            if len(self.pending_samples) >= self.flush_every or time.monotonic() - self.last_flush >= self.flush_interval_s:
+                self._flush()
+
+    def _append(self, source: str, metric: str, ts: float, value: float):
+        key = (source, metric)
+        ring = self.recent.get(key)
+        if ring is None:
+            ring = self.recent[key] = deque(maxlen=self.ring_size)
+        ring.append((ts, value))
+        self.pending_samples.append({"source": source, "metric": metric, "ts": ts, "value": value})
+
+        for resolution in RESOLUTIONS.values():
+            start = ts - ts % resolution
+            bucket = self.open_buckets.get((source, metric, resolution))
+            if bucket is not None and bucket.start == start:
+                bucket.add(value)
+                continue
+            if bucket is not None:
+                # The previous bucket is complete: it gets written exactly once
+                self.pending_rollups.append(bucket.row(source, metric, resolution))
+            self.open_buckets[(source, metric, resolution)] = _Bucket(start, value)
+
+    def flush(self):
+        with self.lock:
+            self._flush(include_open=True)
+
+    def _flush(self, include_open: bool = False):
+        rollups = self.pending_rollups
+        if include_open:
+            rollups = rollups + [b.row(s, m, r) for (s, m, r), b in self.open_buckets.items()]
+        with self.engine.begin() as conn:
+            if self.pending_samples:
+                conn.execute(samples_table.insert(), self.pending_samples)
+            if rollups:
+                # Additive upsert: a bucket split by a restart is merged rather than overwritten
+                stmt = sqlite_insert(rollups_table)
+                r = rollups_table.c
+                conn.execute(stmt.on_conflict_do_update(
+                    index_elements=["metric", "resolution", "source", "bucket"],
+                    set_={"count": r.count + stmt.excluded.count, "sum": r.sum + stmt.excluded.sum,
+                          "min": func.min(r.min, stmt.excluded.min), "max": func.max(r.max, stmt.excluded.max)},
+                ), rollups)
+            now = time.time()
+            if now - self.last_prune > 3600:
+                # Raw rows are only kept for a short window; rollups serve everything older
+                conn.execute(delete(samples_table).where(samples_table.c.ts < now - self.raw_retention_s))
+                self.last_prune = now
+        self.pending_samples, self.pending_rollups = [], []
+        if include_open:
+            self.open_buckets = {}
+        self.last_flush = time.monotonic()
+
+    # --- Query ---
+    def query(self, metric: str, start=None, end=None, resolution: str = "auto", source: str = None) -> dict:
+        # Explicit None checks: epoch 0 is a valid bound, not a missing one
+        end = to_epoch(end)
+        end = time.time() if end is None else end
+        start = to_epoch(start)
+        start = end - 86400 if start is None else start
+        if resolution == "auto":
+            resolution = next((name for name, seconds in [("raw", 10), *RESOLUTIONS.items()]
+                               if (end - start) / seconds <= MAX_POINTS), "1d")
+        if resolution == "raw":
+            points = self._query_raw(metric, start, end, source)
+        elif resolution in RESOLUTIONS:
+            points = self._query_rollups(metric, start, end, RESOLUTIONS[resolution], source)
+        else:
+            raise ValueError(f"Unknown resolution '{resolution}'. Use raw, {', '.join(RESOLUTIONS)} or auto.")
+        return {"metric": metric, "source": source, "from": start, "to": end, "resolution": resolution, "points": points}
+
+    def _query_raw(self, metric, start, end, source):
+        with self.lock:
+            rings = [ring for (s, m), ring in self.recent.items() if m == metric and (source is None or s == source)]
+            # Served straight from memory when the ring buffers still cover the whole window
+            if rings and all(len(ring) and ring[0][0] <= start for ring in rings):
+                return [{"ts": ts, "value": v} for ts, v in sorted(p for ring in rings for p in ring if start <= p[0] <= end)]
+            self._flush()
+        query = (select(samples_table.c.ts, samples_table.c.value)
+                 .where(samples_table.c.metric == metric, samples_table.c.ts.between(start, end))
+                 .order_by(samples_table.c.ts))
+        if source is not None:
+            query = query.where(samples_table.c.source == source)
+        with self.engine.connect() as conn:
+            return [{"ts": ts, "value": value} for ts, value in conn.execute(query)]
+
+    def _query_rollups(self, metric, start, end, resolution, source):
+        r = rollups_table.c
+        query = (select(r.bucket, func.sum(r.count), func.sum(r.sum), func.min(r.min), func.max(r.max))
+                 .where(r.metric == metric, r.resolution == resolution, r.bucket.between(start - resolution, end))
+                 .group_by(r.bucket))
+        if source is not None:
+            query = query.where(r.source == source)
+        with self.lock:
+            self._flush()
+            # Buckets still filling up live only in memory; merge them into the answer
+            open_rows = [b.row(s, m, res) for (s, m, res), b in self.open_buckets.items()
+                         if m == metric and res == resolution and (source is None or s == source)]
+        with self.engine.connect() as conn:
+            merged = {bucket: [count, total, lo, hi] for bucket, count, total, lo, hi in conn.execute(query)}
+        for row in open_rows:
+            if start - resolution <= row["bucket"] <= end:
+                agg = merged.setdefault(row["bucket"], [0, 0.0, row["min"], row["max"]])
+                agg[0] += row["count"]; agg[1] += row["sum"]
+                agg[2] = min(agg[2], row["min"]); agg[3] = max(agg[3], row["max"])
+        return [{"ts": bucket, "min": lo, "max": hi, "mean": round(total / count, 3), "count": count}
+                for bucket, (count, total, lo, hi) in sorted(merged.items())]
+
+def _sqlite_pragmas(dbapi_connection, _record):
+    # WAL + NORMAL sync: far fewer fsyncs on the Pi's SD card, still crash-safe for committed batches
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
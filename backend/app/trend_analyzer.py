@@ -0,0 +1,270 @@
+# backend/app/trend_analyzer.py
+# Streaming trend and anomaly statistics per (greenhouse, metric): fixed-size state, one vectorised pass per update.
+
+import time
+
+import numpy as np
+
+from .config import (TREND_METRICS, TREND_WINDOWS_S, TREND_FORECAST_HORIZON_S, TREND_SPIKE_Z,
+                     TREND_STUCK_METRICS, TREND_STUCK_AFTER_S)
+from .timeseries_store import to_epoch
+
+UNITS = {"temperature_internal": "°C", "temperature_external": "°C", "temperature_soil": "°C",
+         "humidity": "%", "soil_moisture": "%", "water_level_cm": " cm"}
+SENSORS = {"temperature_internal": "DHT22", "humidity": "DHT22", "soil_moisture": "soil moisture",
+           "water_level_cm": "ultrasonic"}
+
+WARMUP_SAMPLES = 10        # plain running mean/deviation until the robust estimates have something to stand on
+MIN_FIT_WEIGHT = 5.0       # effective samples a window needs before its slope is reported
+MIN_COVERAGE = 0.1         # ...and their timestamps must spread (std dev) over at least this fraction of it
+SPIKE_MAX_SAMPLES = 2      # an outlier run this short that returns to normal is a spike; longer is a real step
+STUCK_MIN_SAMPLES = 5
+RESOLUTION = 0.1           # sensor resolution, the floor for the robust scale
+HUBER_CLIP = 3.0           # deviations beyond this many scales only move the robust estimates this far
+GROW_BY = 64
+
+def _window_label(seconds: float) -> str:
+    return f"{seconds / 3600:g}h" if seconds >= 3600 else f"{seconds / 60:g}m"
+
+def _eta_text(eta_s: float) -> str:
+    return f"{eta_s / 60:.0f} min" if eta_s < 3600 else f"{eta_s / 3600:.1f} h" if eta_s < 2 * 3600 else f"{eta_s / 3600:.0f} h"
+
+class TrendAnalyzer:
+    """Every statistic is an exponentially weighted running sum, so memory per (source, metric) is constant and
+    irregular sampling (adaptive cadence, batched ingest) is handled by decaying with the real time gap:
+      - EWMA mean and variance (time constant = first window)
+      - least-squares slope over each window, from decayed sums of t, y, t*t and t*y (time origin kept at the newest sample)
+      - a Huber-clipped running centre and mean absolute deviation, giving a robust z-score that one spike can't drag
+    Forecasts project the last window's fit onto the threshold rules; faults are stuck readings and isolated spikes.
+    State lives in (sources x metrics [x windows]) arrays, so an update over hundreds of sources is a handful of NumPy ops."""
+
+    def __init__(self, threshold_rules: list, metrics=TREND_METRICS, windows_s=TREND_WINDOWS_S,
+                 horizon_s: float = TREND_FORECAST_HORIZON_S, spike_z: float = TREND_SPIKE_Z,
+                 stuck_metrics=TREND_STUCK_METRICS, stuck_after_s: float = TREND_STUCK_AFTER_S):
+        self.metrics = list(metrics)
+        self.windows = np.asarray(windows_s, dtype=float)
+        self.window_labels = [_window_label(w) for w in self.windows]
+        self.horizon_s = horizon_s
+        self.spike_z = spike_z
+        self.stuck_after_s = stuck_after_s
+        self.stuck_columns = np.array([m in stuck_metrics for m in self.metrics])
+        self.limits = [(self.metrics.index(r.metric), r) for r in threshold_rules if r.metric in self.metrics]
+        self.index = {}     # source -> row
+        self.latest = {}    # source -> last analysis, returned again when a source is re-sent without a new sample
+        self.size = 0
+        self._allocate(GROW_BY)
+
+    def _allocate(self, capacity: int):
+        m, w = len(self.metrics), len(self.windows)
+        def grow(name, shape, fill=0.0):
+            old = getattr(self, name, None)
+            new = np.full(shape, fill)
+            if old is not None:
+                new[:len(old)] = old
+            setattr(self, name, new)
+        grow("last_t", capacity, np.nan)
+        for name in ("count", "mean", "var", "center", "mad", "same_since", "same_count", "outlier_run", "spike_at", "spike_value"):
+            grow(name, (capacity, m), np.nan if name in ("spike_at", "spike_value") else 0.0)
+        grow("last_value", (capacity, m), np.nan)
+        grow("forecasting", (capacity, m))
+        for name in ("sw", "st", "sy", "stt", "sty", "syy"):
+            grow(name, (capacity, m, w))
+        self.capacity = capacity
+
+    def _rows(self, sources: list) -> np.ndarray:
+        for source in sources:
+            if source not in self.index:
+                if self.size == self.capacity:
+                    self._allocate(self.capacity * 2)
+                self.index[source] = self.size
+                self.size += 1
+        return np.array([self.index[s] for s in sources], dtype=int)
+
+    # --- Update ---
+    def update(self, snapshots: dict, now: float = None, earlier: dict = None) -> dict:
+        """Feed the newest reading of each source; returns {source: trend analysis}.
+        `earlier` ({source: [readings]}) holds the rest of a batched upload: those readings are stepped through in
+        time order first, so a batch counts once per sample rather than once per update. A reading older than the
+        last one already fed can't enter the running sums any more and is left out."""
+        now = now if now is not None else time.time()
+        times = {s: to_epoch(d.get("timestamp")) or now for s, d in snapshots.items()}
+        rows_all = self._rows(list(snapshots))
+        if earlier:
+            self._backfill({s: earlier[s] for s in snapshots if earlier.get(s)}, times, now)
+        # A source re-sent without a newer reading (e.g. only its frame analysis changed) keeps its last result
+        fresh = [(s, r) for s, r in zip(snapshots, rows_all) if not times[s] <= self.last_t[r]]
+        if fresh:
+            sources = [s for s, _ in fresh]
+            rows, t = np.array([r for _, r in fresh]), np.array([times[s] for s in sources])
+            z = self._step(rows, t, np.array([[_as_float(snapshots[s].get(m)) for m in self.metrics] for s in sources]))
+            self.latest.update(zip(sources, self._report(rows, t, z)))
+        return {s: self.latest.get(s) for s in snapshots}
+
+    def _backfill(self, earlier: dict, until: dict, now: float):
+        """Step each source through its readings between the last one fed and `until`, oldest first; one vectorised
+        step per position in the longest queue, across every source at once. Nothing is reported for these."""
+        queues = {}
+        for source, readings in earlier.items():
+            last, queue = self.last_t[self.index[source]], []
+            for t, reading in sorted(((to_epoch(r.get("timestamp")) or now, r) for r in readings), key=lambda x: x[0]):
+                if not t <= last and t < until[source]:
+                    queue.append((t, reading))
+                    last = t
+            queues[source] = queue
+        for k in range(max(map(len, queues.values()), default=0)):
+            batch = [(s, q[k]) for s, q in queues.items() if k < len(q)]
+            rows = np.array([self.index[s] for s, _ in batch], dtype=int)
+            t = np.array([t for _, (t, _) in batch])
+            self._step(rows, t, np.array([[_as_float(r.get(m)) for m in self.metrics] for _, (_, r) in batch]))
+
+    def _step(self, rows: np.ndarray, t: np.ndarray, x: np.ndarray):
+        seen = ~np.isnan(x)
+        first = np.isnan(self.last_t[rows])
+        dt = np.where(first, 0.0, np.clip(t - self.last_t[rows], 0.0, None))
+        self.last_t[rows] = t
+        count = self.count[rows] + seen
+        self.count[rows] = count
+        xs = np.where(seen, x, 0.0)
+
+        # EWMA mean/variance with a time-based smoothing factor
+        alpha = (1 - np.exp(-dt / self.windows[0]))[:, None]
+        mean, var = self.mean[rows], self.var[rows]
+        delta = xs - mean
+        start = seen & (count == 1)
+        self.mean[rows] = np.where(start, xs, np.where(seen, mean + alpha * delta, mean))
+        self.var[rows] = np.where(seen & ~start, (1 - alpha) * (var + alpha * delta * delta), var)
+
+        # Windowed regression: move the time origin to this sample (shift by -dt), decay, then add the point at t=0
+        d = np.exp(-dt[:, None, None] / self.windows)
+        dtc = dt[:, None, None]
+        sw, st, sy, stt, sty, syy = (getattr(self, n)[rows] for n in ("sw", "st", "sy", "stt", "sty", "syy"))
+        self.syy[rows] = d * syy + (xs * xs)[:, :, None]
+        self.stt[rows] = d * (stt - 2 * dtc * st + dtc * dtc * sw)
+        self.sty[rows] = d * (sty - dtc * sy)
+        self.st[rows] = d * (st - dtc * sw)
+        self.sw[rows] = d * sw + seen[:, :, None]
+        self.sy[rows] = d * sy + xs[:, :, None]
+
+        # Robust centre/scale: a plain running mean during warm-up, then Huber-clipped updates.
+        # The z-score is taken against the estimates *before* this sample moves them.
+        center, mad = self.center[rows], self.mad[rows]
+        scale = 1.2533 * np.maximum(mad, RESOLUTION)   # mean absolute deviation -> sigma for normal noise
+        z = np.where(seen, (xs - center) / scale, 0.0)
+        warm = count > WARMUP_SAMPLES
+        clip = HUBER_CLIP * scale
+        step = np.maximum(alpha, 0.02)
+        n = np.maximum(count, 1)
+        deviation = np.abs(xs - center)
+        self.center[rows] = np.where(~seen, center, np.where(
+            warm, center + step * np.clip(xs - center, -clip, clip), center + (xs - center) / n))
+        self.mad[rows] = np.where(~seen | start, mad, np.where(
+            warm, mad + step * (np.minimum(deviation, clip) - mad), mad + (deviation - mad) / n))
+
+        # Spikes: a short run of outliers followed by a normal reading (a sustained step is a real change)
+        outlier = seen & warm & (np.abs(z) > self.spike_z)
+        run = self.outlier_run[rows]
+        spike = seen & ~outlier & (run >= 1) & (run <= SPIKE_MAX_SAMPLES)
+        self.spike_at[rows] = np.where(spike, t[:, None], self.spike_at[rows])
+        self.spike_value[rows] = np.where(outlier, xs, self.spike_value[rows])
+        self.outlier_run[rows] = np.where(outlier, run + 1, np.where(seen, 0, run))
+
+        # Stuck: bit-identical readings (e.g. a DHT22 that keeps returning its last good value)
+        same = seen & (xs == self.last_value[rows])
+        self.same_since[rows] = np.where(seen & ~same, t[:, None], self.same_since[rows])
+        self.same_count[rows] = np.where(same, self.same_count[rows] + 1, np.where(seen, 0, self.same_count[rows]))
+        self.last_value[rows] = np.where(seen, xs, self.last_value[rows])
+        return z
+
+    def _fit(self, rows: np.ndarray):
+        """Per (source, metric, window): slope per second and fitted value now, NaN where the window doesn't hold
+        enough data, and whether the slope is significant (more than twice its standard error)."""
+        sw, st, sy, stt, sty, syy = (getattr(self, n)[rows] for n in ("sw", "st", "sy", "stt", "sty", "syy"))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sxx = stt - st * st / sw
+            sxy = sty - st * sy / sw
+            # Needs a few samples spread over a decent part of the window, not a burst at its start
+            valid = (sw >= MIN_FIT_WEIGHT) & (sxx / sw >= (MIN_COVERAGE * self.windows) ** 2)
+            slope = np.where(valid, sxy / sxx, np.nan)
+            level = (sy - np.nan_to_num(slope) * st) / sw
+            residual = np.clip(syy - sy * sy / sw - np.nan_to_num(slope) * sxy, 0, None)
+            stderr = np.sqrt(residual / np.maximum(sw - 2, 1e-9) / sxx)
+            significant = valid & (np.abs(slope) > 2 * stderr)
+        return slope, level, significant
+
+    # --- Reporting ---
+    def _report(self, rows: np.ndarray, t: np.ndarray, z: np.ndarray) -> list:
+        slope, level, significant = self._fit(rows)
+        etas, limits = self._forecasts(rows, slope[:, :, -1], level[:, :, -1], significant[:, :, -1])
+        stuck_for = t[:, None] - self.same_since[rows]
+        stuck = self.stuck_columns & (self.same_count[rows] >= STUCK_MIN_SAMPLES) & (stuck_for >= self.stuck_after_s)
+        # Listed for one stuck-window after the last spike, so a flapping sensor stays visible
+        spiked = t[:, None] - self.spike_at[rows] <= self.stuck_after_s
+
+        # Everything above is vectorised; only the JSON assembly walks sources one by one, on plain lists
+        count = self.count[rows]
+        mean, std = np.round(self.mean[rows], 3).tolist(), np.round(np.sqrt(self.var[rows]), 3).tolist()
+        slope_h = np.round(slope * 3600, 3)
+        slopes = np.where(np.isnan(slope_h), None, slope_h).tolist() # JSON has no NaN
+        z = np.where(count > WARMUP_SAMPLES, np.round(z, 2), None).tolist()
+        count, slope_h, etas, level = count.tolist(), slope_h.tolist(), etas.tolist(), level[:, :, -1].tolist()
+        last, since, spike_value, spike_at = (a[rows].tolist() for a in (self.last_value, self.same_since, self.spike_value, self.spike_at))
+        stuck, spiked, stuck_for = stuck.tolist(), spiked.tolist(), stuck_for.tolist()
+        reports = []
+        for k in range(len(rows)):
+            metrics, forecasts, faults = {}, [], []
+            for i, metric in enumerate(self.metrics):
+                if not count[k][i]:
+                    continue
+                metrics[metric] = {
+                    "ewma": mean[k][i], "std": std[k][i],
+                    "slope_per_h": dict(zip(self.window_labels, slopes[k][i])), "robust_z": z[k][i],
+                }
+                if etas[k][i] == etas[k][i]: # not NaN
+                    forecasts.append(self._forecast(metric, limits[k][i], etas[k][i], slope_h[k][i][-1], level[k][i]))
+                name, sensor = metric.replace("_", " ").capitalize(), SENSORS.get(metric, metric.replace("_", " "))
+                if stuck[k][i]:
+                    faults.append({"fault_id": f"{metric}_stuck", "metric": metric, "kind": "stuck", "sensor": sensor,
+                                   "value": last[k][i], "since": since[k][i],
+                                   "detail": f"{name} has read exactly {last[k][i]:g} for {stuck_for[k][i] / 60:.0f} min."})
+                if spiked[k][i]:
+                    faults.append({"fault_id": f"{metric}_spike", "metric": metric, "kind": "spike", "sensor": sensor,
+                                   "value": spike_value[k][i], "since": spike_at[k][i],
+                                   "detail": f"{name} jumped to {spike_value[k][i]:g} and straight back (robust z > {self.spike_z:g})."})
+            reports.append({"metrics": metrics, "forecasts": forecasts, "faults": faults})
+        return reports
+
+    def _forecasts(self, rows: np.ndarray, slope: np.ndarray, level: np.ndarray, significant: np.ndarray):
+        """Seconds until each metric crosses the nearest threshold it is heading for (NaN: none within the horizon),
+        and which rule that is. Uses the longest window's fit; once raised, a forecast holds until the ETA drifts
+        25% past the horizon, so noise around the horizon doesn't flap the alert."""
+        k, m = slope.shape
+        eta = np.full((k, m), np.inf)
+        limit = np.full((k, m), -1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for j, (i, rule) in enumerate(self.limits):
+                heading = slope[:, i] < 0 if rule.spec["op"] == "<" else slope[:, i] > 0
+                # Already past it is the threshold rule's business, not a forecast
+                candidate = (rule.enter - level[:, i]) / slope[:, i]
+                candidate = np.where(significant[:, i] & heading & ~rule.op(level[:, i], rule.enter), candidate, np.inf)
+                nearer = candidate < eta[:, i]
+                eta[:, i] = np.where(nearer, candidate, eta[:, i])
+                limit[:, i] = np.where(nearer, j, limit[:, i])
+        horizon = np.where(self.forecasting[rows] > 0, 1.25 * self.horizon_s, self.horizon_s)
+        active = (eta > 0) & (eta <= horizon)
+        self.forecasting[rows] = active
+        return np.where(active, eta, np.nan), limit.tolist()
+
+    def _forecast(self, metric: str, limit: int, eta_s: float, rate_per_h: float, level: float) -> dict:
+        rule = self.limits[limit][1]
+        unit = UNITS.get(metric, "")
+        return {
+            "metric": metric, "rule": rule.id, "threshold": rule.enter, "unit": unit,
+            "eta_s": round(eta_s), "eta_h": round(eta_s / 3600, 2), "eta_text": _eta_text(eta_s),
+            "rate_per_h": round(rate_per_h, 2), "rate_text": f"{rate_per_h:+.1f}{unit}", "current": round(level, 1),
+        }
+
+    def stats(self) -> dict:
+        return {"sources": self.size, "metrics": self.metrics, "windows": self.window_labels}
+
+def _as_float(value) -> float:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else np.nan
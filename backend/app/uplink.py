@@ -0,0 +1,125 @@
+# backend/app/uplink.py
+# Rover side of the packed telemetry path: buffer the local readings and push them to a central server's
+# POST /api/ingest/{greenhouse_id}/packed in batches. While the link is poor (a send failed or was slow, or a
+# backlog built up), everything waiting goes out as one zlib-compressed multi-sample envelope.
+# Only connection errors and 5xx answers are retried; a batch the server refuses (4xx) is split or dropped, since
+# sending it again as is would block everything queued behind it.
+
+import asyncio
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import (UPLINK_GREENHOUSE_ID, UPLINK_BATCH, UPLINK_MAX_BACKLOG, UPLINK_COMPRESS, UPLINK_TIMEOUT_S,
+                     HUB_MAX_BATCH)
+from .metrics import span, stage_seconds
+from .telemetry_codec import encode, flatten
+
+COMPRESS_MODES = ("auto", "always", "never")
+RETRY_STATUSES = (408, 429)  # 4xx answers that mean "later", not "never"
+
+class RoverUplink:
+    def __init__(self, url: str, greenhouse_id: str = UPLINK_GREENHOUSE_ID, batch_size: int = UPLINK_BATCH,
+                 max_backlog: int = UPLINK_MAX_BACKLOG, compress: str = UPLINK_COMPRESS, timeout_s: float = UPLINK_TIMEOUT_S):
+        if compress not in COMPRESS_MODES:
+            raise ValueError(f"POLYHOUSE_UPLINK_COMPRESS must be one of {COMPRESS_MODES}")
+        self.url = url.rstrip("/")
+        self.greenhouse_id = greenhouse_id
+        self.batch_size = batch_size
+        self.compress = compress
+        self.timeout_s = timeout_s
+        self.backlog = deque(maxlen=max_backlog)  # flattened rows; the oldest go first if the link stays down
+        self.poor_link = False
+        # The server's batch limit isn't known here: start from ours and halve it whenever a batch is refused
+        self.max_batch = HUB_MAX_BATCH
+        self.task = None
+        # Its own thread: a hanging link must not hold up the shared I/O stage (history writes, frame encodes)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="uplink")
+        self.messages = self.samples = self.bytes_sent = self.compressed = self.failures = self.rejected = 0
+
+    def add(self, reading: dict):
+        """Queue one raw reading (cheap; runs on the event loop). A send starts once a batch is waiting."""
+        self.greenhouse_id = self.greenhouse_id or reading.get("greenhouse_id")
+        self.backlog.append(flatten(reading))
+        if len(self.backlog) >= self.batch_size and self.task is None:
+            self.task = asyncio.create_task(self._drain())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _drain(self):
+        try:
+            while len(self.backlog) >= self.batch_size:
+                if not await self._send():
+                    return  # the next reading tries again
+        finally:
+            self.task = None
+
+    async def _send(self) -> bool:
+        # A healthy link sends fixed-size batches; a poor one sends whatever has piled up in one envelope
+        count = min(len(self.backlog) if self.poor_link else self.batch_size, self.max_batch)
+        rows = [self.backlog.popleft() for _ in range(count)]
+        compress = self.compress == "always" or (self.compress == "auto" and self.poor_link)
+        with span("uplink_encode"):
+            payload = encode(rows, compress)
+        started = time.perf_counter()
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._post, payload)
+        except urllib.error.HTTPError as e:
+            if 400 <= e.code < 500 and e.code not in RETRY_STATUSES:
+                return self._refused(rows, e)
+            return self._failed(rows, e)
+        except Exception as e:
+            return self._failed(rows, e)
+        elapsed = time.perf_counter() - started
+        stage_seconds.observe("uplink_send", elapsed)
+        if self.poor_link and len(self.backlog) < self.batch_size and elapsed < self.timeout_s / 2:
+            print(f"📡 Uplink to {self.url} recovered")
+        self.poor_link = len(self.backlog) >= self.batch_size or elapsed >= self.timeout_s / 2
+        self.messages += 1
+        self.samples += count
+        self.bytes_sent += len(payload)
+        self.compressed += compress
+        return True
+
+    def _requeue(self, rows: list):
+        # Back in front of anything newer; if that overflows, the oldest readings are dropped
+        self.backlog = deque(rows + list(self.backlog), maxlen=self.backlog.maxlen)
+
+    def _failed(self, rows: list, error: Exception) -> bool:
+        self._requeue(rows)
+        self.failures += 1
+        if not self.poor_link:
+            print(f"📡 Uplink to {self.url} failing ({error}); buffering readings")
+        self.poor_link = True
+        return False
+
+    def _refused(self, rows: list, error: urllib.error.HTTPError) -> bool:
+        if error.code in (400, 413) and len(rows) > 1:
+            # Possibly more rows than the server takes: retry in halves (a bad row ends up alone and is dropped)
+            self.max_batch = max(1, len(rows) // 2)
+            self._requeue(rows)
+            return True
+        self.rejected += len(rows)
+        print(f"📡 Uplink dropped {len(rows)} reading(s) refused by {self.url}: HTTP {error.code} {error.reason}")
+        return True
+
+    def _post(self, payload: bytes):
+        request = urllib.request.Request(f"{self.url}/api/ingest/{self.greenhouse_id}/packed", data=payload, method="POST",
+                                         headers={"Content-Type": "application/octet-stream"})
+        with urllib.request.urlopen(request, timeout=self.timeout_s) as response:
+            response.read()
+
+    def stats(self) -> dict:
+        return {
+            "url": self.url, "greenhouse_id": self.greenhouse_id, "poor_link": self.poor_link,
+            "backlog": len(self.backlog), "messages": self.messages, "samples": self.samples,
+            "compressed_messages": self.compressed, "failures": self.failures, "rejected": self.rejected,
+            "max_batch": self.max_batch, "bytes_sent": self.bytes_sent,
+            "bytes_per_sample": round(self.bytes_sent / self.samples, 1) if self.samples else None,
+        }
@@ -4,30 +4,55 @@ import numpy as np
 from pathlib import Path
 from threading import Thread, Lock
 import time
+from .config import VIDEO_SIMULATOR_MODE
+from .frames import Frame
+
+# Playback modes:
+#   on_demand - decode only when a frame is requested, seeking to the wall-clock-correct position (default)
+#   threaded  - background thread decodes every frame at 30 FPS (for real-time streaming clients)
+MODE_ON_DEMAND, MODE_THREADED = "on_demand", "threaded"
+MAX_GRAB_AHEAD = 15  # Further than this, one seek is cheaper than grabbing frame by frame
 
 class VideoSimulator:
     """Simulate camera feed using a video file"""
     
-    def __init__(self, video_path="demo_videos/polyhouse_plants.mp4"):
+    def __init__(self, video_path="demo_videos/polyhouse_plants.mp4", mode=VIDEO_SIMULATOR_MODE):
         self.video_path = video_path
+        self.mode = mode
         self.cap = None
         self.current_frame = None
         self.frame_lock = Lock()
         self.is_running = False
         self.thread = None
-        
-        # Try to load video
-        if Path(video_path).exists():
-            self.cap = cv2.VideoCapture(video_path)
-            print(f"✅ Video simulator loaded: {video_path}")
+        self._static_image = None
+        self.started_at = None
+        self.position = 0           # index of the next frame the decoder will return
+        self.current_index = None   # index of the frame held in current_frame
+        self._cached = None         # Frame wrapping current_frame, reused (with its JPEG) until it changes
+        self.ready = False          # capture() returns None until start() has opened the source
+    
+    def _open(self):
+        """Open the video file. Kept out of __init__ so importing the app never touches the disk or codecs"""
+        if Path(self.video_path).exists():
+            self.cap = cv2.VideoCapture(self.video_path)
+            self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+            self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT)) or 1
+            print(f"✅ Video simulator loaded: {self.video_path} ({self.mode})")
         else:
-            print(f"⚠️ Video file not found: {video_path}")
+            print(f"⚠️ Video file not found: {self.video_path}")
             print("   Using static image generation instead")
     
     def start(self):
-        """Start video playback thread"""
+        """Open the source and start playback (a thread only in threaded mode)"""
+        if not self.ready:
+            self._open()
+            self.ready = True
         if self.cap and not self.is_running:
             self.is_running = True
+            self.started_at = time.monotonic()
+            if self.mode != MODE_THREADED:
+                print("▶️ Video simulator started (on-demand decoding)")
+                return
             self.thread = Thread(target=self._playback_loop, daemon=True)
             self.thread.start()
             print("▶️ Video simulator started")
@@ -57,30 +82,67 @@ class VideoSimulator:
                 
                 with self.frame_lock:
                     self.current_frame = frame
+                    self._cached = None
             
             # Control playback speed (30 FPS)
             time.sleep(1/30)
     
-    def get_frame(self):
-        """Get current frame as bytes"""
+    def _seek_to_now(self):
+        """On-demand mode: decode just the frame that should be showing right now (call with frame_lock held)"""
+        target = int((time.monotonic() - self.started_at) * self.fps) % self.frame_count
+        if target == self.current_index:
+            return
+        if not (0 <= target - self.position <= MAX_GRAB_AHEAD):
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+        else:
+            # grab() skips the colour conversion and copy that read() does
+            for _ in range(target - self.position):
+                self.cap.grab()
+        ret, frame = self.cap.read()
+        if not ret:
+            # Unreliable frame count: wrap around to the start
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            target = 0
+            ret, frame = self.cap.read()
+        if ret:
+            self.current_frame = cv2.resize(frame, (640, 480))
+            self.current_index = target
+            self.position = target + 1
+            self._cached = None
+    
+    def capture(self) -> Frame:
+        """Get current frame as a raw Frame (no encoding happens here), or None before start()"""
+        if not self.ready:
+            return None
         with self.frame_lock:
+            if self.mode != MODE_THREADED and self.is_running:
+                self._seek_to_now()
             if self.current_frame is not None:
-                # Encode frame as JPEG
-                _, buffer = cv2.imencode('.jpg', self.current_frame)
-                return buffer.tobytes()
+                # Repeat calls for the same frame share one Frame, so its lazy JPEG is only encoded once
+                if self._cached is None:
+                    image = self.current_frame.copy()
+                    image.flags.writeable = False
+                    self._cached = Frame(image, color_order="BGR")
+                return self._cached
         
-        # Fallback: generate static green image
-        return self._generate_static_frame()
+        # Fallback: static green image
+        return Frame(self._generate_static_image(), color_order="BGR")
+    
+    def get_frame(self):
+        """Get current frame as JPEG bytes"""
+        frame = self.capture()
+        return frame.jpeg() if frame else None
     
     def get_frame_base64(self):
         """Get current frame as base64 string"""
-        frame_bytes = self.get_frame()
-        return base64.b64encode(frame_bytes).decode('utf-8')
+        frame = self.capture()
+        return frame.base64() if frame else None
     
     def add_overlay_text(self, text, position=(10, 30), color=(0, 255, 0)):
         """Add text overlay to current frame (for disease detection demo)"""
         with self.frame_lock:
             if self.current_frame is not None:
+                self._cached = None
                 cv2.putText(
                     self.current_frame, 
                     text, 
@@ -95,6 +157,7 @@ class VideoSimulator:
         """Draw bounding box around detected disease"""
         with self.frame_lock:
             if self.current_frame is not None:
+                self._cached = None
                 x, y, w, h = bbox
                 # Draw red rectangle
                 cv2.rectangle(self.current_frame, (x, y), (x+w, y+h), (0, 0, 255), 2)
@@ -109,8 +172,11 @@ class VideoSimulator:
                     2
                 )
     
-    def _generate_static_frame(self):
-        """Generate a static plant image if no video available"""
+    def _generate_static_image(self):
+        """Generate a static plant image if no video available (built once, then reused)"""
+        if self._static_image is not None:
+            return self._static_image
+        
         # Create green gradient background
         img = np.zeros((480, 640, 3), dtype=np.uint8)
         img[:, :] = [45, 100, 30]  # Dark green
@@ -126,8 +192,9 @@ class VideoSimulator:
         cv2.putText(img, "No video file - Using static image", (120, 450),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 200), 1)
         
-        _, buffer = cv2.imencode('.jpg', img)
-        return buffer.tobytes()
+        img.flags.writeable = False
+        self._static_image = img
+        return img
 
 # Global instance
 video_simulator = VideoSimulator()
\ No newline at end of file
@@ -0,0 +1,44 @@
+# backend/benchmarks/compare.py
+# Diff two benchmark reports: every numeric result that moved, as a percentage change.
+#
+# Usage: python -m backend.benchmarks.compare baseline.json candidate.json [--threshold 5]
+
+import argparse
+import json
+
+def numeric_leaves(node, prefix: str = "") -> dict:
+    if isinstance(node, dict):
+        leaves = {}
+        for key, value in node.items():
+            leaves.update(numeric_leaves(value, f"{prefix}.{key}" if prefix else key))
+        return leaves
+    if isinstance(node, (int, float)) and not isinstance(node, bool):
+        return {prefix: node}
+    return {}
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark JSON reports.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=5.0, help="Only show changes of at least this many percent")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    print(f"📊 {baseline['benchmark']}: {baseline['git_revision']} -> {candidate['git_revision']}")
+
+    before, after = numeric_leaves(baseline["results"]), numeric_leaves(candidate["results"])
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key], after[key]
+        if old == new:
+            continue
+        change = (new - old) / abs(old) * 100 if old else float("inf")
+        if abs(change) >= args.threshold:
+            print(f"  {key:<56}{old:>12g} -> {new:<12g}{change:+8.1f}%")
+    for key in sorted(before.keys() ^ after.keys()):
+        print(f"  {key:<56}only in {'baseline' if key in before else 'candidate'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# backend/benchmarks/control.py
+# Command-to-ack latency on /ws/control while /ws/realtime clients load the telemetry path, plus deadman reaction time.
+#
+# Usage (from the repository root):
+#   python -m backend.benchmarks.control --commands 500 --telemetry-clients 10 --output bench_control.json
+#
+# The target is p99 under 50 ms locally: a command is applied on the event loop, never behind inference.
+
+import argparse
+import asyncio
+import json
+import time
+
+import websockets
+
+from .realtime import ClientStats, free_port, run_client, start_server
+from .report import percentiles_ms, write_report
+
+async def drive(url: str, commands: int, rate_hz: float) -> dict:
+    """Alternate forward/stop commands at `rate_hz` and time each ack."""
+    latencies, server_ms, statuses = [], [], {}
+    async with websockets.connect(url) as ws:
+        for seq in range(commands):
+            sent = time.perf_counter()
+            await ws.send(json.dumps({"seq": seq, "type": "motor", "motor_id": 1 + seq % 4,
+                                      "direction": "forward" if seq % 2 == 0 else "stop", "speed": 60}))
+            while True:
+                message = json.loads(await ws.recv())
+                if message.get("type") == "ping":
+                    await ws.send(json.dumps({"type": "pong", "id": message["id"]}))
+                elif message.get("type") == "ack" and message.get("seq") == seq:
+                    break
+            latencies.append(time.perf_counter() - sent)
+            server_ms.append(message["server_ms"] / 1000)
+            statuses[message["status"]] = statuses.get(message["status"], 0) + 1
+            await asyncio.sleep(max(0.0, 1 / rate_hz - (time.perf_counter() - sent)))
+        await ws.send(json.dumps({"seq": commands, "type": "stop_all"}))
+    return {"round_trip_ms": percentiles_ms(latencies), "server_apply_ms": percentiles_ms(server_ms), "statuses": statuses}
+
+async def deadman(url: str, deadman_s: float) -> dict:
+    """Start a motor, go silent, and time how long until the server stops it."""
+    async with websockets.connect(url) as ws:
+        await ws.send(json.dumps({"seq": 0, "type": "motor", "motor_id": 1, "direction": "forward", "speed": 60}))
+        silent_from = time.perf_counter()
+        while True:
+            message = json.loads(await asyncio.wait_for(ws.recv(), timeout=deadman_s * 10))
+            if message.get("type") == "motor_stop":
+                return {"reason": message["reason"], "stopped_after_ms": round((time.perf_counter() - silent_from) * 1000, 1)}
+
+async def run(port: int, args) -> dict:
+    stop_at = time.time() + 3600
+    telemetry = [asyncio.create_task(run_client(f"ws://127.0.0.1:{port}/ws/realtime?frames=binary", stop_at, ClientStats()))
+                 for _ in range(args.telemetry_clients)]
+    try:
+        url = f"ws://127.0.0.1:{port}/ws/control"
+        result = await drive(url, args.commands, args.rate)
+        result["deadman"] = await deadman(url, args.deadman)
+    finally:
+        for task in telemetry:
+            task.cancel()
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure manual-override latency under telemetry load.")
+    parser.add_argument("--commands", type=int, default=500)
+    parser.add_argument("--rate", type=float, default=50, help="Commands per second")
+    parser.add_argument("--telemetry-clients", type=int, default=10)
+    parser.add_argument("--interval", type=float, default=0.5, help="Fixed telemetry tick interval (seconds)")
+    parser.add_argument("--stub-latency-ms", type=float, default=200, help="Slow model, to show control doesn't wait on it")
+    parser.add_argument("--deadman", type=float, default=0.5, help="Server deadman timeout (seconds)")
+    parser.add_argument("--output", default="bench_control.json")
+    args = parser.parse_args()
+
+    port = free_port()
+    print(f"🚀 Starting server on port {port} (stub model, {args.stub_latency_ms:g} ms per batch)")
+    server = start_server(port, args.interval, args.stub_latency_ms, {"POLYHOUSE_CONTROL_DEADMAN_S": str(args.deadman)})
+    try:
+        result = asyncio.run(run(port, args))
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+    rtt = result["round_trip_ms"]
+    print(f"   round trip p50 {rtt['p50']} ms, p99 {rtt['p99']} ms; deadman stop after {result['deadman']['stopped_after_ms']} ms")
+    write_report(args.output, "control", {"control": result}, vars(args))
+
+if __name__ == "__main__":
+    main()
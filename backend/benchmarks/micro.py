@@ -0,0 +1,109 @@
+# backend/benchmarks/micro.py
+# Micro-benchmarks for the per-tick hot path: threshold checks, frame encode/decode, classification.
+#
+# Usage (from the repository root):
+#   python -m backend.benchmarks.micro --output bench_micro.json
+#   python -m backend.benchmarks.compare old.json bench_micro.json
+
+import argparse
+import base64
+import io
+import itertools
+import os
+import tempfile
+import time
+
+# Stub model with zero latency so classify_* measures our own overhead; history goes to a throwaway file
+os.environ.setdefault("POLYHOUSE_MODEL_BACKEND", "stub")
+os.environ.setdefault("POLYHOUSE_STUB_LATENCY_MS", "0")
+os.environ.setdefault("POLYHOUSE_STUB_LATENCY_PER_FRAME_MS", "0")
+os.environ.setdefault("POLYHOUSE_HISTORY_DB", os.path.join(tempfile.mkdtemp(), "bench_history.db"))
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from ..app.ai_models import HibiscusClassifier
+from ..app.fleet_simulator import FleetSimulator
+from ..app.frames import Frame, MODEL_INPUT_SIZE
+from ..app.main import AdvancedThresholdMonitor, sensor_data_source
+from ..app.tiling import prepare_tiles
+from .report import percentiles_ms, write_report
+
+def bench(fn, iterations: int, warmup: int = 5) -> dict:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    total = sum(samples)
+    return {"iterations": iterations, "ops_per_s": round(iterations / total, 1) if total else None,
+            "latency_ms": percentiles_ms(samples)}
+
+def sample_image() -> np.ndarray:
+    sensor_data_source.start() # The app opens the video source at startup, not at import
+    frame = sensor_data_source.get_all_data()["camera_frame"]
+    return np.ascontiguousarray(frame.bgr())
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark the realtime pipeline's hot spots.")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--sources", type=int, default=100, help="Greenhouses for the bulk alert-engine case")
+    parser.add_argument("--output", default="bench_micro.json")
+    args = parser.parse_args()
+    n = args.iterations
+
+    monitor = AdvancedThresholdMonitor()
+    snapshot = {k: v for k, v in sensor_data_source.get_all_data().items() if k != "camera_frame"}
+    hot_snapshot = {**snapshot, "temperature_internal": 35.0, "humidity": 90.0, "soil_moisture": 20.0}
+    fleet = {f"GH{i:04d}": {**snapshot, "temperature_internal": 25.0 + (i % 15)} for i in range(args.sources)}
+    fleet_monitor = AdvancedThresholdMonitor()
+    trend_analyzer, trend_fleet = AdvancedThresholdMonitor().trends, {k: dict(v) for k, v in fleet.items()}
+    trend_clock = itertools.count(time.time(), 10)
+    def trend_update():
+        # Every source gets a newer reading; the analyzer skips readings that aren't newer than its last
+        now = next(trend_clock)
+        for data in trend_fleet.values():
+            data["timestamp"] = now
+        trend_analyzer.update(trend_fleet)
+
+    image = sample_image()
+    jpeg = Frame(image).jpeg()
+    b64 = base64.b64encode(jpeg).decode()
+    small = Frame(image).model_input()
+    classifier = HibiscusClassifier(backend="stub")
+    batch = np.stack([small] * 8)
+    tiles, _, _ = prepare_tiles(Frame(image))
+    fleet_sim = FleetSimulator(1000, seed=0)
+
+    results = {
+        "check_thresholds": bench(lambda: monitor.check_thresholds(snapshot), n * 10),
+        "check_thresholds_alerting": bench(lambda: monitor.check_thresholds(hot_snapshot), n * 10),
+        f"alert_engine_update_{args.sources}_sources": bench(lambda: fleet_monitor.update(fleet), n),
+        f"trend_update_{args.sources}_sources": bench(trend_update, n),
+        "frame_jpeg_encode": bench(lambda: Frame(image).jpeg(), n),
+        "frame_base64_encode": bench(lambda: base64.b64encode(jpeg).decode(), n),
+        "frame_base64_decode": bench(lambda: base64.b64decode(b64), n),
+        "frame_jpeg_decode_cv2": bench(lambda: cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR), n),
+        "frame_model_input_from_raw": bench(lambda: Frame(image).model_input(), n),
+        "legacy_decode_resize_pil": bench(lambda: Image.open(io.BytesIO(jpeg)).convert('RGB').resize(MODEL_INPUT_SIZE), n),
+        "classify_image_jpeg_bytes": bench(lambda: classifier.classify_image(jpeg), n),
+        "classify_array": bench(lambda: classifier.classify_array(small), n),
+        "classify_batch_8": bench(lambda: classifier.classify_batch(batch), n),
+        "prepare_tiles": bench(lambda: prepare_tiles(Frame(image)), n),
+        f"classify_tiles_{len(tiles)}": bench(lambda: classifier.classify_batch(tiles), n),
+        "fleet_step_1000_greenhouses": bench(lambda: fleet_sim.step(1.0), n),
+        "fleet_tick_1000_greenhouses": bench(lambda: fleet_sim.tick(1.0), n),
+    }
+    results["frame_sizes_bytes"] = {"raw": int(image.nbytes), "jpeg": len(jpeg), "base64": len(b64)}
+
+    print(f"\n{'case':<36}{'ops/s':>12}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, result in results.items():
+        if "latency_ms" in result:
+            print(f"{name:<36}{result['ops_per_s']:>12}{result['latency_ms']['p50']:>10}{result['latency_ms']['p99']:>10}")
+    write_report(args.output, "micro", results, {"iterations": n, "sources": args.sources})
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# backend/benchmarks/model_backends.py
+# Accuracy-vs-speed comparison of classifier backends over a folder of labelled images.
+#
+# Images are labelled by their parent folder name (e.g. data/val/diseased/*.jpg, data/val/fresh/*.jpg).
+# Usage (from the repository root):
+#   python -m backend.benchmarks.model_backends --images data/val \
+#       --backend keras --backend tflite-fp16 --backend tflite-int8 --output bench_backends.json
+
+import argparse
+import json
+import multiprocessing
+import resource
+import time
+
+import numpy as np
+
+from ..app.ai_models import HibiscusClassifier
+from ..app.convert_model import find_images, load_image
+
+def _run_backend(kind: str, model_path: str, images: np.ndarray, batch_size: int, warmup: int) -> dict:
+    """Runs in a fresh process so startup time and memory aren't polluted by other backends."""
+    start = time.perf_counter()
+    classifier = HibiscusClassifier(model_path=model_path, backend=kind)
+    startup_s = time.perf_counter() - start
+    if not classifier.model:
+        return {"error": f"could not load {kind} model"}
+
+    for _ in range(warmup):
+        classifier.classify_batch(images[:batch_size])
+
+    latencies, predictions = [], []
+    for i in range(0, len(images), batch_size):
+        batch = images[i:i + batch_size]
+        start = time.perf_counter()
+        results = classifier.classify_batch(batch)
+        latencies.append((time.perf_counter() - start) / len(batch))
+        predictions.extend(label for label, _ in results)
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "startup_s": round(startup_s, 3),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "latency_ms_per_frame": {
+            "p50": round(float(np.percentile(latencies_ms, 50)), 3),
+            "p99": round(float(np.percentile(latencies_ms, 99)), 3),
+            "mean": round(float(latencies_ms.mean()), 3),
+        },
+        "predictions": predictions,
+        "class_names": classifier.class_names,
+    }
+
+def confusion(labels, predictions, class_names) -> dict:
+    return {actual: {predicted: sum(1 for l, p in zip(labels, predictions) if l == actual and p == predicted)
+                     for predicted in class_names} for actual in class_names}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark classifier backends on labelled images.")
+    parser.add_argument("--images", required=True, help="Folder with one sub-folder per class")
+    parser.add_argument("--backend", action="append", dest="backends",
+                        help="Backend to test, optionally kind=path (repeatable). Default: keras, tflite-fp16, tflite-int8")
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--output", help="Write the full report as JSON")
+    args = parser.parse_args()
+
+    paths = find_images(args.images)
+    if not paths:
+        raise SystemExit(f"❌ No images found in {args.images}")
+    labels = [p.parent.name for p in paths]
+    images = np.stack([load_image(p) for p in paths])
+    print(f"📷 {len(images)} images, classes: {sorted(set(labels))}")
+
+    report = {"images": len(images), "batch_size": args.batch_size, "backends": {}}
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1, maxtasksperchild=1) as pool:
+        for spec in args.backends or ["keras", "tflite-fp16", "tflite-int8"]:
+            kind, _, model_path = spec.partition("=")
+            result = pool.apply(_run_backend, (kind, model_path or None, images, args.batch_size, args.warmup))
+            report["backends"][kind] = result
+
+    baseline = report["backends"].get("keras", {}).get("predictions")
+    print(f"\n{'backend':<14}{'startup s':>10}{'rss MB':>9}{'p50 ms':>9}{'p99 ms':>9}{'accuracy':>10}{'vs keras':>10}")
+    for kind, result in report["backends"].items():
+        if "error" in result:
+            print(f"{kind:<14}  {result['error']}")
+            continue
+        predictions = result.pop("predictions")
+        result["accuracy"] = round(float(np.mean([p == l for p, l in zip(predictions, labels)])), 4)
+        result["confusion"] = confusion(labels, predictions, result["class_names"])
+        if baseline:
+            result["agreement_with_keras"] = round(float(np.mean([p == b for p, b in zip(predictions, baseline)])), 4)
+        latency = result["latency_ms_per_frame"]
+        print(f"{kind:<14}{result['startup_s']:>10}{result['peak_rss_mb']:>9}{latency['p50']:>9}{latency['p99']:>9}"
+              f"{result['accuracy']:>10}{result.get('agreement_with_keras', '-'):>10}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
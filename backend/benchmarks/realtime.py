@@ -0,0 +1,194 @@
+# backend/benchmarks/realtime.py
+# End-to-end load test: boots the API in simulator mode with the stub model and drives N /ws/realtime clients.
+#
+# Usage (from the repository root, Linux; CPU/RSS come from /proc):
+#   python -m backend.benchmarks.realtime --clients 1,10,50 --duration 30 --output bench_realtime.json
+#
+# Latency is sensor read -> client receive, using the "sampled_at" stamp the server puts on each update.
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import websockets
+
+from .report import percentiles_ms, write_report
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def process_tree(pid: int) -> list:
+    """pid plus its descendants (the inference pool runs in spawned child processes)."""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    parents[int(entry)] = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+    tree, frontier = [pid], [pid]
+    while frontier:
+        children = [p for p, ppid in parents.items() if ppid in frontier]
+        tree += children
+        frontier = children
+    return tree
+
+def cpu_seconds(pids: list) -> float:
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            total += int(fields[11]) + int(fields[12]) # utime + stime
+        except (OSError, IndexError):
+            continue
+    return total / CLOCK_TICKS
+
+def rss_mb(pids: list) -> float:
+    total_kb = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                total_kb += next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+        except (OSError, StopIteration):
+            continue
+    return round(total_kb / 1024, 1)
+
+def start_server(port: int, interval_s: float, stub_latency_ms: float, extra_env: dict = None) -> subprocess.Popen:
+    scratch = tempfile.mkdtemp(prefix="polyhouse_bench_")
+    env = {
+        **os.environ,
+        "POLYHOUSE_MODEL_BACKEND": "stub",
+        "POLYHOUSE_STUB_LATENCY_MS": str(stub_latency_ms),
+        # Everything the server writes goes to a scratch dir, never the caller's working directory
+        "POLYHOUSE_HISTORY_DB": os.path.join(scratch, "bench_history.db"),
+        "POLYHOUSE_FRAME_STORE_PATH": os.path.join(scratch, "bench_frames.ring"),
+        "POLYHOUSE_FRAME_STORE_MB": "8",
+        "POLYHOUSE_SESSIONS_DIR": os.path.join(scratch, "sessions"),
+        # Pin the adaptive cadence so every run ticks at the same rate
+        "POLYHOUSE_TELEMETRY_INTERVAL_S": str(interval_s),
+        "POLYHOUSE_TELEMETRY_MIN_INTERVAL_S": str(interval_s),
+        "POLYHOUSE_TELEMETRY_MAX_INTERVAL_S": str(interval_s),
+        **(extra_env or {}),
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited during startup with code {server.returncode}")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.25)
+    server.terminate()
+    raise RuntimeError("Server did not come up within 60s")
+
+class ClientStats:
+    def __init__(self):
+        self.messages = 0
+        self.frames = 0
+        self.bytes = 0
+        self.latencies = []
+        self.errors = 0
+
+async def run_client(url: str, stop_at: float, stats: ClientStats):
+    try:
+        async with websockets.connect(url, max_size=None) as ws:
+            while True:
+                remaining = stop_at - time.time()
+                if remaining <= 0:
+                    return
+                try:
+                    message = await asyncio.wait_for(ws.recv(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    return
+                received_at = time.time()
+                stats.bytes += len(message)
+                if isinstance(message, bytes):
+                    stats.frames += 1
+                    continue
+                payload = json.loads(message)
+                if payload.get("type") != "sensor_update":
+                    continue
+                stats.messages += 1
+                if payload.get("sampled_at"):
+                    stats.latencies.append(received_at - payload["sampled_at"])
+    except (OSError, websockets.WebSocketException):
+        stats.errors += 1
+
+async def run_level(port: int, clients: int, duration_s: float, frames: str, pids: list) -> dict:
+    url = f"ws://127.0.0.1:{port}/ws/realtime?frames={frames}"
+    stats = [ClientStats() for _ in range(clients)]
+    cpu_before, wall_before = cpu_seconds(pids), time.time()
+    stop_at = wall_before + duration_s
+    await asyncio.gather(*(run_client(url, stop_at, s) for s in stats))
+    elapsed = time.time() - wall_before
+    cpu_used = cpu_seconds(pids) - cpu_before
+
+    latencies = [lat for s in stats for lat in s.latencies]
+    messages = sum(s.messages for s in stats)
+    return {
+        "clients": clients,
+        "duration_s": round(elapsed, 2),
+        "messages": messages,
+        "messages_per_s": round(messages / elapsed, 2),
+        "frames_received": sum(s.frames for s in stats),
+        "bytes_per_client": round(sum(s.bytes for s in stats) / clients),
+        "client_errors": sum(s.errors for s in stats),
+        "latency_ms": percentiles_ms(latencies),
+        "server_cpu_percent": round(100 * cpu_used / elapsed, 1),
+        "server_rss_mb": rss_mb(pids),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the realtime WebSocket pipeline.")
+    parser.add_argument("--clients", default="1,10,50", help="Comma-separated client counts to sweep")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per client level")
+    parser.add_argument("--interval", type=float, default=0.5, help="Fixed telemetry tick interval (seconds)")
+    parser.add_argument("--frames", default="binary", choices=["binary", "base64", "none"])
+    parser.add_argument("--stub-latency-ms", type=float, default=20)
+    parser.add_argument("--output", default="bench_realtime.json")
+    args = parser.parse_args()
+    levels = [int(n) for n in args.clients.split(",")]
+
+    port = free_port()
+    print(f"🚀 Starting server on port {port} (stub model, {args.interval}s ticks)")
+    server = start_server(port, args.interval, args.stub_latency_ms)
+    results = {}
+    try:
+        pids = process_tree(server.pid)
+        for clients in levels:
+            print(f"📡 {clients} client(s) for {args.duration:g}s...")
+            result = asyncio.run(run_level(port, clients, args.duration, args.frames, pids))
+            results[f"clients_{clients}"] = result
+            lat = result["latency_ms"]
+            print(f"   {result['messages_per_s']} msg/s, p50 {lat['p50']} ms, p99 {lat['p99']} ms, "
+                  f"cpu {result['server_cpu_percent']}%, rss {result['server_rss_mb']} MB")
+            pids = process_tree(server.pid) # Pick up pool workers spawned on first use
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    write_report(args.output, "realtime", results, {
+        "clients": levels, "duration_s": args.duration, "interval_s": args.interval,
+        "frames": args.frames, "stub_latency_ms": args.stub_latency_ms,
+    })
+
+if __name__ == "__main__":
+    main()
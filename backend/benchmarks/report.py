@@ -0,0 +1,34 @@
+# backend/benchmarks/report.py
+# Shared helpers so every benchmark writes comparable JSON.
+
+import json
+import platform
+import subprocess
+import time
+
+import numpy as np
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+def percentiles_ms(samples_s) -> dict:
+    if not len(samples_s):
+        return {"p50": None, "p90": None, "p99": None, "max": None, "mean": None}
+    ms = np.asarray(samples_s, dtype=float) * 1000
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+    return {"p50": round(float(p50), 3), "p90": round(float(p90), 3), "p99": round(float(p99), 3),
+            "max": round(float(ms.max()), 3), "mean": round(float(ms.mean()), 3)}
+
+def write_report(path: str, name: str, results: dict, params: dict = None):
+    report = {
+        "benchmark": name, "git_revision": git_revision(), "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(), "machine": platform.machine(), "params": params or {},
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Report written to {path}")
+    return report
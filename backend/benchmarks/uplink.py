@@ -0,0 +1,81 @@
+# backend/benchmarks/uplink.py
+# Rover uplink wire formats: bytes per sample and CPU per message, JSON (today's /api/ingest body) against the
+# packed format of telemetry_codec.py, each with and without zlib, at several batch sizes.
+#
+# Usage (from the repository root):
+#   python -m backend.benchmarks.uplink --batches 1,10,100 --output bench_uplink.json
+#
+# Readings come from the fleet simulator (one greenhouse, 10 s apart), shaped like the rover's aggregator output.
+
+import argparse
+import json
+import time
+import zlib
+from datetime import datetime
+
+from ..app.fleet_simulator import FleetSimulator
+from ..app.telemetry_codec import encode, decode
+from .report import percentiles_ms, write_report
+
+def rover_readings(count: int, seed: int = 0) -> list:
+    simulator = FleetSimulator(1, seed=seed)
+    start = time.time()
+    readings = []
+    for i in range(count):
+        reading = simulator.tick(10.0)[0]
+        reading.pop("irrigating", None)
+        reading["timestamp"] = datetime.fromtimestamp(start + 10 * i).isoformat()
+        reading["motor_statuses"] = {1: 0, 2: 0, 3: 0, 4: 0} if i % 60 > 5 else {1: 60, 2: 60, 3: 60, 4: 60}
+        reading["stale_sensors"] = []
+        readings.append(reading)
+    return readings
+
+def json_encode(readings: list, compress: bool) -> bytes:
+    body = json.dumps({"greenhouse_id": "GH001-RPI", "readings": readings}).encode()
+    return zlib.compress(body, 6) if compress else body
+
+def json_decode(payload: bytes, compress: bool) -> list:
+    return json.loads(zlib.decompress(payload) if compress else payload)["readings"]
+
+FORMATS = {
+    "json": (lambda r: json_encode(r, False), lambda p: json_decode(p, False)),
+    "json_zlib": (lambda r: json_encode(r, True), lambda p: json_decode(p, True)),
+    "packed": (lambda r: encode(r), decode),
+    "packed_zlib": (lambda r: encode(r, compress=True), decode),
+}
+
+def timed(fn, arg, iterations: int) -> dict:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(arg)
+        samples.append(time.perf_counter() - start)
+    return percentiles_ms(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JSON and packed telemetry on the rover uplink.")
+    parser.add_argument("--batches", default="1,10,100", help="Samples per message")
+    parser.add_argument("--messages", type=int, default=50, help="Messages per case (size is averaged over them)")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--output", default="bench_uplink.json")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"\n{'case':<24}{'bytes/sample':>14}{'encode p50 ms':>15}{'decode p50 ms':>15}")
+    for batch in (int(b) for b in args.batches.split(",")):
+        readings = rover_readings(batch * args.messages)
+        messages = [readings[i:i + batch] for i in range(0, len(readings), batch)]
+        for name, (encoder, decoder) in FORMATS.items():
+            payloads = [encoder(m) for m in messages]
+            assert len(decoder(payloads[-1])) == batch
+            result = results[f"{name}_batch_{batch}"] = {
+                "batch": batch, "bytes_per_sample": round(sum(map(len, payloads)) / len(readings), 1),
+                "encode_ms": timed(encoder, messages[-1], args.iterations),
+                "decode_ms": timed(decoder, payloads[-1], args.iterations),
+            }
+            print(f"{name + f'_batch_{batch}':<24}{result['bytes_per_sample']:>14}"
+                  f"{result['encode_ms']['p50']:>15}{result['decode_ms']['p50']:>15}")
+    write_report(args.output, "uplink", results, vars(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# backend/tests/test_alert_engine.py
+# Alert lifecycle: hysteresis bands, minimum durations, detections and acknowledgement
+
+import pytest
+
+from backend.app.alert_engine import AlertEngine, DEFAULT_RULES, compile_rules
+from backend.app.config import ALERT_CLEAR_AFTER
+
+THRESHOLDS = {  # as in main.AdvancedThresholdMonitor, without importing the whole app
+    "temperature_internal": {"min": 18, "max": 28, "yield_stress_point": 32},
+    "humidity": {"disease_risk_point": 85, "stress_point": 40},
+    "soil_moisture": {"critical_min": 30, "critical_max": 90},
+}
+
+@pytest.fixture
+def engine():
+    return AlertEngine(compile_rules(DEFAULT_RULES, THRESHOLDS))
+
+def step(engine, now, source="GH001", **data):
+    active, events = engine.update({source: data}, now)
+    return [a["rule"] for a in active[source]], [(e["event"], e["alert"]["rule"]) for e in events]
+
+def test_threshold_clears_only_past_the_exit_band(engine):
+    assert step(engine, 0, temperature_internal=33.0) == (["yield_threat"], [("open", "yield_threat")])
+    # Back under 32 but within the 1.0 band: still open, tracking the latest value
+    assert step(engine, 10, temperature_internal=31.5) == (["yield_threat"], [])
+    assert engine.active("GH001")[0]["current_value"] == 31.5
+    assert step(engine, 20, temperature_internal=32.5) == (["yield_threat"], [])  # no second open
+    assert step(engine, 30, temperature_internal=31.0) == ([], [("resolved", "yield_threat")])
+
+def test_below_threshold_rule_band_goes_the_other_way(engine):
+    assert step(engine, 0, soil_moisture=25.0)[1] == [("open", "yield_threat_moisture")]
+    assert step(engine, 10, soil_moisture=33.0) == (["yield_threat_moisture"], [])
+    assert step(engine, 20, soil_moisture=35.0) == ([], [("resolved", "yield_threat_moisture")])
+
+def test_min_duration(engine):
+    assert step(engine, 0, humidity=90.0) == ([], [])
+    assert step(engine, 29, humidity=90.0) == ([], [])
+    assert step(engine, 30, humidity=90.0) == (["disease_risk_hum"], [("open", "disease_risk_hum")])
+
+def test_pending_condition_that_lapses_is_never_emitted(engine):
+    step(engine, 0, humidity=90.0)
+    assert step(engine, 10, humidity=70.0) == ([], [])
+    # The duration starts again from scratch
+    assert step(engine, 20, humidity=90.0) == ([], [])
+    assert step(engine, 45, humidity=90.0) == ([], [])
+    assert step(engine, 50, humidity=90.0)[1] == [("open", "disease_risk_hum")]
+
+def test_missing_reading_does_not_resolve(engine):
+    step(engine, 0, temperature_internal=35.0)
+    assert step(engine, 10, humidity=60.0) == (["yield_threat"], [])
+
+def test_zero_reading_never_alerts(engine):
+    assert step(engine, 0, soil_moisture=0.0, humidity=0.0) == ([], [])
+
+def test_sources_are_independent(engine):
+    active, events = engine.update({"GH001": {"temperature_internal": 35.0}, "GH002": {"temperature_internal": 25.0}}, 0)
+    assert [a["greenhouse_id"] for a in active["GH001"]] == ["GH001"] and active["GH002"] == []
+    assert step(engine, 10, source="GH002", temperature_internal=20.0) == ([], [])
+    assert len(engine.active("GH001")) == 1
+
+def disease(*names) -> dict:
+    return {"disease_analysis": {"diseases_detected": [{"name": n, "confidence": 90} for n in names]}}
+
+def test_detections_open_per_item_and_resolve_after_clean_analyses(engine):
+    _, events = step(engine, 0, **disease("blight", "rust"))
+    assert events == [("open", "disease"), ("open", "disease")]
+    for k in range(1, ALERT_CLEAR_AFTER):
+        assert step(engine, 10 * k, **disease("rust"))[1] == []
+    assert step(engine, 10 * ALERT_CLEAR_AFTER, **disease("rust"))[1] == [("resolved", "disease")]
+    assert engine.active("GH001")[0]["title"] == "AI Detected Disease: Rust"
+
+def test_detection_survives_ticks_without_analysis(engine):
+    # Inference skipped (busy, timed out, model loading): the snapshot has no disease_analysis at all
+    step(engine, 0, **disease("blight"))
+    for k in range(1, 2 * ALERT_CLEAR_AFTER):
+        assert step(engine, 10 * k, temperature_internal=24.0) == (["disease"], [])
+    assert step(engine, 100, **disease("blight")) == (["disease"], [])
+
+def test_clean_count_restarts_when_the_detection_returns(engine):
+    step(engine, 0, **disease("blight"))
+    for k in range(1, ALERT_CLEAR_AFTER):
+        step(engine, 10 * k, **disease())
+    step(engine, 100, **disease("blight"))
+    for k in range(1, ALERT_CLEAR_AFTER):
+        assert step(engine, 100 + 10 * k, **disease())[1] == []
+    assert step(engine, 200, **disease())[1] == [("resolved", "disease")]
+
+def test_acknowledge(engine):
+    step(engine, 0, temperature_internal=35.0)
+    alert_id = engine.active("GH001")[0]["id"]
+    assert engine.acknowledge(alert_id, now=5)["event"] == "acknowledged"
+    assert engine.acknowledge(alert_id, now=6) is None
+    assert engine.active("GH001")[0]["state"] == "acknowledged"
+    assert step(engine, 10, temperature_internal=25.0)[1] == [("resolved", "yield_threat")]
+
+def test_quiet_only_rule_waits_for_a_quiet_greenhouse(engine):
+    fruiting = {"growth_metrics": {"growth_stage": "fruiting", "canopy_coverage_percent": 80}}
+    assert step(engine, 0, temperature_internal=35.0, **fruiting)[0] == ["yield_threat"]
+    assert step(engine, 10, temperature_internal=25.0, **fruiting) == (["harvest_window"], [
+        ("open", "harvest_window"), ("resolved", "yield_threat")])
@@ -0,0 +1,131 @@
+# backend/tests/test_frame_store.py
+# The alert-evidence ring file: wraparound, overwrite, reopen and serving from the map
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from backend.app import frame_store
+from backend.app.frame_store import FrameStore
+
+class FakeFrame:
+    """Just what the store reads from a Frame: a JPEG and a model input to fingerprint."""
+    def __init__(self, size: int, seed: int):
+        rng = np.random.default_rng(seed)
+        self.image = rng.integers(0, 256, (64, 64, 3), dtype=np.uint8)
+        self.data = rng.integers(0, 256, size, dtype=np.uint8).tobytes()
+
+    def jpeg(self) -> bytes:
+        return self.data
+
+    def model_input(self) -> np.ndarray:
+        return self.image
+
+@pytest.fixture
+def store(tmp_path):
+    s = FrameStore(tmp_path / "frames.ring", size_mb=1, slots=8, retention_s=3600, min_interval_s=60)
+    s.open()
+    yield s
+    s.close()
+
+def stored_bytes(store, frame_id):
+    found = store.get(frame_id)
+    return None if found is None else bytes(found[0])
+
+def test_store_and_get(store):
+    frames = [FakeFrame(1000 * (i + 1), seed=i) for i in range(3)]
+    ids = [store.store(f) for f in frames]
+    assert ids == [1, 2, 3]
+    assert [stored_bytes(store, i) for i in ids] == [f.data for f in frames]
+    assert [e["frame_id"] for e in store.lookup()] == [3, 2, 1]
+    assert store.get(99) is None and store.get(0) is None
+
+def test_same_frame_reuses_its_id(store):
+    frame = FakeFrame(1000, seed=0)
+    assert store.store(frame) == store.store(frame) == 1
+    twin = FakeFrame(1000, seed=1)
+    twin.image = frame.image.copy()  # looks the same: the newest stored frame is reused
+    assert store.store(twin) == 1
+    assert store.stats()["reused"] == 2 and store.stats()["writes"] == 1
+
+def test_wraparound_overwrites_oldest_and_never_splits_a_frame(store):
+    frames = [FakeFrame(300_000, seed=i) for i in range(7)]
+    ids = [store.store(f) for f in frames]
+    # 3 frames fit in 1 MB; the 4th wraps to the start rather than splitting across the end
+    assert stored_bytes(store, ids[0]) is None
+    assert [stored_bytes(store, i) for i in ids[-3:]] == [f.data for f in frames[-3:]]
+    assert store.stats()["wraps"] >= 1
+    assert {e["frame_id"] for e in store.lookup()} == set(ids[-3:])
+
+def test_index_slots_are_reused(store):
+    ids = [store.store(FakeFrame(100, seed=i)) for i in range(10)]
+    assert stored_bytes(store, ids[0]) is None and stored_bytes(store, ids[1]) is None
+    assert all(stored_bytes(store, i) is not None for i in ids[2:])
+    assert store.stats()["frames"] == 8
+
+def test_frame_is_invalid_while_its_bytes_are_being_overwritten(store):
+    ids = [store.store(FakeFrame(300_000, seed=i)) for i in range(3)]
+    seen_during_write = []
+    data = store.data
+    class Watched:
+        """The data region, noting what a reader would see at the moment the JPEG bytes are copied in."""
+        def __setitem__(self, key, value):
+            seen_during_write.append((store._intact(ids[0]), store.get(ids[0]) is None, store._intact(ids[2])))
+            data[key] = value
+    store.data = Watched()
+    store.store(FakeFrame(300_000, seed=9))  # wraps onto the oldest frame; the header is only advanced afterwards
+    store.data = data
+    assert seen_during_write == [(False, True, True)]
+
+def test_frame_larger_than_store(store):
+    with pytest.raises(ValueError):
+        store.store(FakeFrame(2 * 1024 * 1024, seed=0))
+
+def test_retention(store, monkeypatch):
+    frame_id = store.store(FakeFrame(100, seed=0))
+    later = frame_store.time.time() + 3601
+    monkeypatch.setattr(frame_store.time, "time", lambda: later)
+    assert store.get(frame_id) is None and store.lookup() == []
+
+def test_reopen_keeps_frames_and_layout_change_starts_afresh(tmp_path):
+    path = tmp_path / "frames.ring"
+    first = FrameStore(path, size_mb=1, slots=8)
+    first.open()
+    frame = FakeFrame(5000, seed=0)
+    frame_id = first.store(frame)
+    first.close()
+
+    reopened = FrameStore(path, size_mb=1, slots=8)
+    reopened.open()
+    assert stored_bytes(reopened, frame_id) == frame.data
+    assert reopened.store(FakeFrame(100, seed=1)) == frame_id + 1
+    reopened.close()
+
+    resized = FrameStore(path, size_mb=1, slots=16)
+    resized.open()
+    assert resized.get(frame_id) is None and resized.stats()["next_id"] == 1
+    resized.close()
+
+def send_frame(store, frame_id, during_send=None) -> list:
+    messages = []
+    async def send(message):
+        messages.append(message)
+        if during_send and message.get("more_body"):
+            during_send()
+    asyncio.run(store.response(frame_id)(None, None, send))
+    return messages
+
+def test_response_streams_the_frame(store, monkeypatch):
+    monkeypatch.setattr(frame_store, "CHUNK", 1000)
+    frame = FakeFrame(2500, seed=0)
+    messages = send_frame(store, store.store(frame))
+    assert b"".join(m["body"] for m in messages[1:]) == frame.data
+    assert [m["more_body"] for m in messages[1:]] == [True, True, False]
+
+def test_response_is_cut_short_when_overwritten(store, monkeypatch):
+    monkeypatch.setattr(frame_store, "CHUNK", 150_000)
+    frame_id = store.store(FakeFrame(300_000, seed=0))
+    overwrite = lambda: [store.store(FakeFrame(300_000, seed=i)) for i in range(1, 5)]
+    with pytest.raises(RuntimeError):
+        send_frame(store, frame_id, overwrite)
@@ -0,0 +1,56 @@
+# backend/tests/test_inference_engine.py
+# Micro-batching front end: batches form as configured, and stopping never leaves a caller waiting
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from backend.app import inference_engine as engine_module
+from backend.app.executors import StageBusy
+from backend.app.inference_engine import BatchInferenceEngine
+
+def frames(n: int) -> list:
+    return [np.full((4, 4, 3), i, dtype=np.float32) for i in range(n)]
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    """Stands in for the classifier stage; `gate` holds every forward pass until it is set."""
+    calls, gate = [], asyncio.Event()
+    async def run_inference(fn, batch):
+        calls.append(len(batch))
+        await gate.wait()
+        return [{"disease_analysis": {"overall_health": "Healthy", "value": float(x[0, 0, 0])}} for x in batch]
+    monkeypatch.setattr(engine_module.pipeline, "run_inference", run_inference)
+    return calls, gate
+
+def test_frames_are_batched_and_answered_in_order(fake_model):
+    calls, gate = fake_model
+    async def main():
+        engine = BatchInferenceEngine(max_batch_size=4, max_wait_ms=50, max_in_flight=1)
+        engine.start()
+        gate.set()
+        results = await engine.submit_many(frames(6))
+        await engine.stop()
+        return results
+    results = asyncio.run(main())
+    assert [r["disease_analysis"]["value"] for r in results] == [0, 1, 2, 3, 4, 5]
+    assert calls == [4, 2]
+
+# A batch in flight (held by the gate) with the rest queued, or every frame taken off the queue into a batch still filling
+@pytest.mark.parametrize("max_batch_size, dispatched", [(2, [2]), (10, [])])
+def test_stop_releases_every_waiting_caller(fake_model, max_batch_size, dispatched):
+    calls, gate = fake_model
+    async def main():
+        engine = BatchInferenceEngine(max_batch_size=max_batch_size, max_wait_ms=10_000, max_in_flight=1)
+        engine.start()
+        callers = [asyncio.create_task(engine.submit(f)) for f in frames(7)]
+        await asyncio.sleep(0.05)
+        assert calls == dispatched
+        await asyncio.wait_for(engine.stop(), 1)
+        outcomes = await asyncio.wait_for(asyncio.gather(*callers, return_exceptions=True), 1)
+        with pytest.raises(StageBusy):
+            await engine.submit(frames(1)[0])
+        return outcomes
+    outcomes = asyncio.run(main())
+    assert all(isinstance(o, StageBusy) for o in outcomes)
@@ -0,0 +1,64 @@
+# backend/tests/test_motor_control.py
+# Manual override: the deadman armed by a driving /ws/control client, and control-message validation
+
+import time
+
+from backend.app.motor_control import ControlSession, MotorController
+
+class FakeDriver:
+    def __init__(self):
+        self.motor_speeds = {1: 0, 2: 0, 3: 0, 4: 0}
+
+    def control_motor(self, motor_id: int, direction: str, speed: int):
+        self.motor_speeds[motor_id] = speed if direction != "stop" else 0
+
+    def stop_all_motors(self):
+        self.motor_speeds = {1: 0, 2: 0, 3: 0, 4: 0}
+
+def controller() -> MotorController:
+    return MotorController(FakeDriver(), deadman_s=0.5)
+
+def drive(motors, session, seq, **fields):
+    return motors.handle(session, {"seq": seq, "type": "motor", "motor_id": 1, "direction": "forward", "speed": 80, **fields},
+                         time.perf_counter())
+
+def test_rest_command_does_not_disarm_a_driving_client():
+    motors, session = controller(), ControlSession(None)
+    assert drive(motors, session, 1)["status"] == "ok"
+    armed = motors.deadline
+    motors.command(2, "forward", 50)          # REST, no hold
+    assert motors.deadline == armed
+    motors.command(3, "forward", 50, 0.01)    # REST with a shorter hold: the client's deadline still wins
+    assert motors.deadline == armed
+    motors.command(3, "forward", 50, 60)      # a longer hold extends it
+    assert motors.deadline > armed + 50
+
+def test_deadline_clears_only_when_everything_stops():
+    motors, session = controller(), ControlSession(None)
+    drive(motors, session, 1)
+    drive(motors, session, 2, motor_id=2)
+    drive(motors, session, 3, direction="stop")
+    assert motors.deadline is not None        # motor 2 still runs
+    drive(motors, session, 4, motor_id=2, direction="stop")
+    assert motors.deadline is None
+    drive(motors, session, 5)
+    motors.stop_all()
+    assert motors.deadline is None and not motors.moving()
+
+def test_rest_command_without_hold_runs_until_stopped():
+    motors = controller()
+    motors.command(1, "forward", 50)
+    assert motors.deadline is None and motors.moving()
+
+def test_seq_must_be_an_integer():
+    motors, session = controller(), ControlSession(None)
+    for seq in (True, "1", 1.0, None):
+        ack = drive(motors, session, seq)
+        assert ack["status"] == "error" and not motors.moving()
+    assert drive(motors, session, 1)["status"] == "ok"
+    assert drive(motors, session, 1)["status"] == "stale"
+
+def test_malformed_message_gets_an_error_ack():
+    motors, session = controller(), ControlSession(None)
+    assert motors.handle(session, "not json", time.perf_counter())["status"] == "error"
+    assert motors.handle(session, "[1, 2]", time.perf_counter())["status"] == "error"
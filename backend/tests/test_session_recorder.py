@@ -0,0 +1,48 @@
+# backend/tests/test_session_recorder.py
+# Recording and replay stay safe when a stop from an API handler races the I/O-pool reader/writer
+
+import threading
+
+from backend.app.session_recorder import SessionRecorder, SessionReplay
+
+T0 = 1_760_000_000.0
+
+def record(path, ticks: int) -> SessionRecorder:
+    recorder = SessionRecorder(path)
+    for i in range(ticks):
+        recorder.record({"timestamp": T0 + i, "temperature_internal": 20.0 + i, "greenhouse_id": "GH001"})
+    return recorder
+
+def test_record_after_stop_is_ignored(tmp_path):
+    recorder = record(tmp_path / "s", 5)
+    assert recorder.close()["rows"] == 5
+    recorder.record({"timestamp": T0 + 9, "temperature_internal": 1.0})  # a tick already on the I/O pool
+    assert recorder.status()["rows"] == 5 and not recorder.status()["recording"]
+    assert recorder.close()["rows"] == 5  # stopping twice is harmless
+    assert len(SessionReplay(tmp_path / "s")) == 5
+
+def test_replay_round_trip(tmp_path):
+    record(tmp_path / "s", 3).close()
+    replay = SessionReplay(tmp_path / "s")
+    rows = [replay.get_all_data() for _ in range(4)]
+    assert [r["temperature_internal"] for r in rows[:3]] == [20.0, 21.0, 22.0]
+    assert rows[3] is None and rows[0]["greenhouse_id"] == "GH001"
+
+def test_close_during_reads(tmp_path):
+    record(tmp_path / "s", 50).close()
+    replay = SessionReplay(tmp_path / "s", loop=True)
+    errors, started = [], threading.Event()
+    def reader():
+        try:
+            started.set()
+            while replay.get_all_data() is not None:
+                pass
+        except Exception as e:
+            errors.append(e)
+    thread = threading.Thread(target=reader)
+    thread.start()
+    started.wait()
+    replay.close()
+    thread.join(timeout=5)
+    assert errors == [] and not thread.is_alive()
+    assert replay.get_all_data() is None
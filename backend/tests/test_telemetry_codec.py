@@ -0,0 +1,83 @@
+# backend/tests/test_telemetry_codec.py
+# Round trips through the packed rover uplink format (run from the repository root: python -m pytest backend/tests)
+
+import pytest
+
+from backend.app.telemetry_codec import encode, decode, decode_columns, flatten
+
+T0 = 1_760_000_000.0
+
+def reading(i: int, **fields) -> dict:
+    base = {"timestamp": T0 + 10 * i, "temperature_internal": 24.5, "temperature_external": 18.2,
+            "humidity": 65.0, "soil_moisture": 52.3, "water_level_cm": 41.0, "soil_ph": 6.55,
+            "motion_detected": False, "motor_statuses": {1: 0, 2: 0, 3: 0, 4: 0}, "stale_sensors": []}
+    return {**base, **fields}
+
+def assert_same(decoded: list, readings: list):
+    assert len(decoded) == len(readings)
+    for got, sent in zip(decoded, readings):
+        assert set(got) == {k for k, v in sent.items() if v is not None}
+        for field, value in sent.items():
+            if isinstance(value, float):
+                assert got[field] == pytest.approx(value, abs=1e-6)
+            elif value is not None:
+                assert got[field] == value
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_round_trip(compress):
+    readings = [reading(i, temperature_internal=24.5 + 0.1 * i, humidity=65.0 + (i % 3)) for i in range(50)]
+    assert_same(decode(encode(readings, compress=compress)), readings)
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_missing_values(compress):
+    readings = [reading(i) for i in range(10)]
+    for i in (0, 3, 4, 9):
+        del readings[i]["humidity"]               # some rows: a row mask
+    for r in readings:
+        del r["soil_ph"]                          # no rows: the column is left out
+    readings[5]["motor_statuses"] = {1: 60, 3: 60}
+    readings[7]["temperature_internal"] = None    # sent as missing, not as 0
+    del readings[2]["stale_sensors"]
+    decoded = decode(encode(readings, compress=compress))
+    assert_same(decoded, readings)
+    assert "humidity" not in decoded[0] and "temperature_internal" not in decoded[7]
+    assert "soil_ph" not in decode_columns(encode(readings))[1]
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_negative_values_and_deltas(compress):
+    # Falling, below-zero and back-and-forth values all need the sign of the zigzag delta
+    readings = [reading(i, temperature_internal=30.0 - 1.7 * i, temperature_external=-5.0 - 0.3 * i,
+                        motor_statuses={1: 60 if i % 2 else -60, 2: 0, 3: 0, 4: 0},
+                        stale_sensors=["dht22", "camera"] if i % 2 else [])
+                for i in range(20)]
+    readings.reverse()  # timestamps run backwards too
+    assert_same(decode(encode(readings, compress=compress)), readings)
+
+def test_large_jumps_and_values_rounded_to_scale():
+    readings = [reading(0, co2_level=400.04), reading(1, co2_level=1e7), reading(2, co2_level=0.0)]
+    decoded = decode(encode(readings))
+    assert [r["co2_level"] for r in decoded] == [400.0, 1e7, 0.0]
+    assert decoded[1]["timestamp"] == T0 + 10
+
+def test_compression_and_encoded_rows_agree():
+    readings = [reading(i, temperature_internal=24.5 + 0.1 * (i % 7)) for i in range(200)]
+    plain, packed = encode(readings), encode(readings, compress=True)
+    assert len(packed) < len(plain)
+    assert decode(packed) == decode(plain) == decode(encode([flatten(r) for r in readings]))
+
+def test_empty_messages():
+    assert decode(encode([])) == []
+    assert decode(encode([{}, {}])) == [{}, {}]
+
+def test_rejects_bad_messages():
+    payload = encode([reading(i) for i in range(10)])
+    with pytest.raises(ValueError):
+        decode(b"{\"readings\": []}")
+    with pytest.raises(ValueError):
+        decode(payload[:-3])
+    with pytest.raises(ValueError):
+        decode(payload, max_rows=5)
+    with pytest.raises(ValueError):
+        decode(encode([reading(0)], compress=True)[:-4])
+    with pytest.raises(ValueError):
+        decode(payload[:2] + bytes([99]) + payload[3:])  # unknown version
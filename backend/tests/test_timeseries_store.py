@@ -0,0 +1,84 @@
+# backend/tests/test_timeseries_store.py
+# Sensor history: raw samples from the ring or SQLite, and the incremental 1m/1h/1d rollups
+
+import time
+
+import pytest
+
+from backend.app.timeseries_store import TimeSeriesStore
+
+T0 = 1_760_000_400.0  # on an hour boundary
+
+@pytest.fixture
+def store(tmp_path):
+    return TimeSeriesStore(str(tmp_path / "history.db"), ring_size=1000, flush_every=50)
+
+def ingest_series(store, values, step_s=10.0, source="GH001", start=T0):
+    store.ingest_many([(source, start + i * step_s, {"temperature_internal": v, "motion_detected": True})
+                       for i, v in enumerate(values)])
+
+def test_minute_rollups_match_the_raw_samples(store):
+    values = [20.0 + (i % 7) - 0.5 * (i % 3) for i in range(180)]  # 30 minutes at 10 s
+    ingest_series(store, values)
+    points = store.query("temperature_internal", T0, T0 + 1800, "1m")["points"]
+    assert len(points) == 30
+    for k, point in enumerate(points):
+        chunk = values[6 * k:6 * k + 6]
+        assert point["ts"] == T0 + 60 * k
+        assert (point["count"], point["min"], point["max"]) == (6, min(chunk), max(chunk))
+        assert point["mean"] == pytest.approx(sum(chunk) / 6, abs=1e-3)
+
+def test_coarser_rollups_cover_the_same_samples(store):
+    values = [float(i % 50) for i in range(900)]  # 2.5 hours
+    ingest_series(store, values)
+    hours = store.query("temperature_internal", T0, T0 + 9000, "1h")["points"]
+    assert [p["count"] for p in hours] == [360, 360, 180]
+    assert sum(p["mean"] * p["count"] for p in hours) == pytest.approx(sum(values), abs=1)
+    day = store.query("temperature_internal", T0, T0 + 9000, "1d")["points"]
+    assert sum(p["count"] for p in day) == 900 and day[0]["max"] == 49.0
+
+def test_buckets_split_by_a_restart_are_merged(tmp_path):
+    path = str(tmp_path / "history.db")
+    first = TimeSeriesStore(path)
+    ingest_series(first, [10.0, 30.0])
+    first.flush()  # writes the still-open buckets, as on shutdown
+    second = TimeSeriesStore(path)
+    ingest_series(second, [5.0, 25.0], start=T0 + 20)
+    (point,) = second.query("temperature_internal", T0, T0 + 60, "1m")["points"]
+    assert (point["count"], point["min"], point["max"], point["mean"]) == (4, 5.0, 30.0, 17.5)
+
+def test_raw_samples_from_memory_and_from_sqlite_agree(tmp_path):
+    start = time.time() - 3600  # raw rows older than the retention window are pruned from SQLite
+    values = [float(i) for i in range(100)]
+    in_memory = TimeSeriesStore(str(tmp_path / "history.db"), ring_size=1000)
+    ingest_series(in_memory, values, start=start)
+    from_memory = in_memory.query("temperature_internal", start, start + 990, "raw")["points"]
+    small_ring = TimeSeriesStore(str(tmp_path / "other.db"), ring_size=10)
+    ingest_series(small_ring, values, start=start)
+    from_db = small_ring.query("temperature_internal", start, start + 990, "raw")["points"]
+    assert from_memory == from_db == [{"ts": start + 10 * i, "value": v} for i, v in enumerate(values)]
+
+def test_sources_are_kept_apart(store):
+    ingest_series(store, [1.0] * 6, source="GH001")
+    ingest_series(store, [3.0] * 6, source="GH002")
+    one = store.query("temperature_internal", T0, T0 + 60, "1m", source="GH002")["points"]
+    both = store.query("temperature_internal", T0, T0 + 60, "1m")["points"]
+    assert one[0]["mean"] == 3.0 and one[0]["count"] == 6
+    assert both[0]["mean"] == 2.0 and both[0]["count"] == 12
+
+def test_only_numeric_fields_are_recorded(store):
+    ingest_series(store, [1.0])
+    assert store.query("motion_detected", T0, T0 + 60, "raw")["points"] == []
+
+def test_epoch_zero_is_a_real_bound(store):
+    ingest_series(store, [1.0, 2.0], start=0.0)
+    result = store.query("temperature_internal", 0, 3600, "1m")
+    assert (result["from"], result["to"]) == (0.0, 3600.0)
+    assert result["points"][0]["count"] == 2
+    assert store.query("temperature_internal", "0", 0, "1m")["to"] == 0.0
+
+def test_resolution(store):
+    assert store.query("humidity", T0, T0 + 3600)["resolution"] == "raw"
+    assert store.query("humidity", T0, T0 + 30 * 86400)["resolution"] == "1h"
+    with pytest.raises(ValueError):
+        store.query("humidity", T0, T0 + 60, "5m")
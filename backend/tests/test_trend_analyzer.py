@@ -0,0 +1,102 @@
+# backend/tests/test_trend_analyzer.py
+# Streaming trend statistics: slopes and forecasts on known ramps, spike and stuck-sensor faults, batched feeding
+
+import numpy as np
+import pytest
+
+from backend.app.alert_engine import DEFAULT_RULES, compile_rules
+from backend.app.trend_analyzer import TrendAnalyzer
+
+THRESHOLDS = {  # as in main.AdvancedThresholdMonitor, without importing the whole app
+    "temperature_internal": {"min": 18, "max": 28, "yield_stress_point": 32},
+    "humidity": {"disease_risk_point": 85, "stress_point": 40},
+    "soil_moisture": {"critical_min": 30, "critical_max": 90},
+}
+T0 = 1_760_000_000.0
+
+def analyzer() -> TrendAnalyzer:
+    rules = [r for r in compile_rules(DEFAULT_RULES, THRESHOLDS) if r.kind == "threshold"]
+    return TrendAnalyzer(rules, windows_s=(600, 3600), horizon_s=6 * 3600, spike_z=6,
+                         stuck_metrics=("temperature_internal", "humidity"), stuck_after_s=900)
+
+def feed(trends, times, values, metric="temperature_internal", source="GH001", **extra):
+    analysis = None
+    for t, v in zip(times, values):
+        analysis = trends.update({source: {"timestamp": t, metric: v, **extra}}, t)[source]
+    return analysis
+
+def noise(n, seed=0, scale=0.2):
+    return np.random.default_rng(seed).normal(0, scale, n)
+
+def test_slope_of_a_ramp():
+    times = T0 + 10 * np.arange(720)  # two hours
+    analysis = feed(analyzer(), times, 20 + 0.5 / 3600 * (times - T0) + noise(720))
+    slopes = analysis["metrics"]["temperature_internal"]["slope_per_h"]
+    assert slopes["10m"] == pytest.approx(0.5, abs=0.3)
+    assert slopes["1h"] == pytest.approx(0.5, abs=0.05)
+
+def test_irregular_sampling_gives_the_same_slope():
+    gaps = np.random.default_rng(1).uniform(2, 60, 400)
+    times = T0 + np.cumsum(gaps)
+    analysis = feed(analyzer(), times, 20 + 1.0 / 3600 * (times - T0))
+    assert analysis["metrics"]["temperature_internal"]["slope_per_h"]["1h"] == pytest.approx(1.0, abs=0.01)
+
+def test_flat_series_has_no_slope_or_forecast():
+    times = T0 + 10 * np.arange(720)
+    analysis = feed(analyzer(), times, 24 + noise(720))
+    metric = analysis["metrics"]["temperature_internal"]
+    assert abs(metric["slope_per_h"]["1h"] or 0) < 0.1
+    assert metric["ewma"] == pytest.approx(24, abs=0.2) and metric["std"] == pytest.approx(0.2, abs=0.1)
+    assert analysis["forecasts"] == []
+
+def test_forecast_eta():
+    # +1 °C/h from 26 °C: two hours in, the 32 °C yield stress point is ~4 h away
+    times = T0 + 10 * np.arange(360 * 2)
+    analysis = feed(analyzer(), times, 26 + 1.0 / 3600 * (times - T0) + noise(720, scale=0.05))
+    (forecast,) = analysis["forecasts"]
+    assert (forecast["metric"], forecast["rule"], forecast["threshold"]) == ("temperature_internal", "yield_threat", 32.0)
+    assert forecast["eta_h"] == pytest.approx(4.0, abs=0.3)
+
+def test_spike_fault():
+    trends = analyzer()
+    times = T0 + 10 * np.arange(200)
+    values = 24 + noise(200)
+    values[150] = 40.0  # one wild reading, straight back to normal
+    analysis = feed(trends, times[:152], values[:152])
+    (fault,) = analysis["faults"]
+    assert (fault["kind"], fault["value"], fault["since"]) == ("spike", 40.0, times[151])
+    # A sustained step is a real change, not a spike
+    stepped = feed(analyzer(), times, np.where(np.arange(200) < 150, 24.0, 30.0) + noise(200))
+    assert [f for f in stepped["faults"] if f["kind"] == "spike"] == []
+
+def test_stuck_fault():
+    times = T0 + 10 * np.arange(200)
+    values = np.concatenate([24 + noise(50), np.full(150, 23.7)])
+    analysis = feed(analyzer(), times, values)
+    (fault,) = analysis["faults"]
+    assert (fault["kind"], fault["value"], fault["since"]) == ("stuck", 23.7, times[50])
+    # Soil moisture is not a stuck-checked metric: a steady reading there is normal
+    assert feed(analyzer(), times, np.full(200, 50.0), metric="soil_moisture")["faults"] == []
+
+def test_a_batch_fed_through_earlier_matches_one_by_one():
+    times = T0 + 10 * np.arange(100)
+    values = 20 + 0.01 * (times - T0) + noise(100)
+    readings = [{"timestamp": t, "temperature_internal": v} for t, v in zip(times, values)]
+    one_by_one = feed(analyzer(), times, values)
+
+    trends = analyzer()
+    shuffled = list(np.random.default_rng(2).permutation(readings[:-1]))
+    batched = trends.update({"GH001": readings[-1]}, times[-1], earlier={"GH001": shuffled})["GH001"]
+    assert batched == one_by_one
+    assert trends.count[trends.index["GH001"]][0] == 100
+
+def test_older_and_repeated_readings_are_left_out():
+    trends = analyzer()
+    times = T0 + 10 * np.arange(20)
+    latest = feed(trends, times, 24 + noise(20))
+    row = trends.index["GH001"]
+    # Re-sent without a newer reading: same result, nothing counted again
+    assert trends.update({"GH001": {"timestamp": times[-1], "temperature_internal": 50}})["GH001"] is latest
+    late = [{"timestamp": times[3] + 1, "temperature_internal": 99}]
+    trends.update({"GH001": {"timestamp": times[-1] + 10, "temperature_internal": 24}}, earlier={"GH001": late})
+    assert trends.count[row][0] == 21
@@ -0,0 +1,70 @@
+# backend/tests/test_uplink.py
+# Rover uplink retry policy: transient failures are buffered and retried, refused batches never block the queue
+
+import asyncio
+import io
+import urllib.error
+
+from backend.app.telemetry_codec import decode
+from backend.app.uplink import RoverUplink
+
+T0 = 1_760_000_000.0
+
+def http_error(code: int) -> urllib.error.HTTPError:
+    return urllib.error.HTTPError("http://hub/api", code, "refused", {}, io.BytesIO(b""))
+
+def run(uplink: RoverUplink, readings: int, post):
+    """Queue `readings` readings with `post` standing in for the HTTP call; returns the rows each accepted post carried."""
+    accepted = []
+    def fake_post(payload):
+        post(decode(payload))
+        accepted.append([r["timestamp"] for r in decode(payload)])
+    uplink._post = fake_post
+    async def main():
+        for i in range(readings):
+            uplink.add({"timestamp": T0 + i, "temperature_internal": 24.0, "greenhouse_id": "GH001"})
+            if uplink.task:
+                await uplink.task
+        await uplink.stop()
+    asyncio.run(main())
+    return accepted
+
+def sent_then_waiting(uplink: RoverUplink, sent: list) -> list:
+    # Fewer than batch_size readings stay queued for the next send
+    return [t for batch in sent for t in batch] + [row[0] for row in uplink.backlog]
+
+def test_connection_errors_and_5xx_are_retried_in_order():
+    failures = [ConnectionRefusedError(), http_error(503)]
+    def post(rows):
+        if failures:
+            raise failures.pop(0)
+    uplink = RoverUplink("http://hub", batch_size=2, compress="never")
+    sent = run(uplink, 6, post)
+    assert sent_then_waiting(uplink, sent) == [T0 + i for i in range(6)]
+    assert uplink.failures == 2 and uplink.rejected == 0
+
+def test_batch_larger_than_the_server_takes_is_split():
+    def post(rows):
+        if len(rows) > 3:
+            raise http_error(400)
+    uplink = RoverUplink("http://hub", batch_size=10, compress="never")
+    sent = run(uplink, 20, post)
+    assert sent_then_waiting(uplink, sent) == [T0 + i for i in range(20)]
+    assert max(map(len, sent)) <= 3 and uplink.rejected == 0
+
+def test_refused_reading_is_dropped_not_retried_forever():
+    def post(rows):
+        if any(r["timestamp"] == T0 + 1 for r in rows):
+            raise http_error(400)
+    uplink = RoverUplink("http://hub", batch_size=4, compress="never")
+    sent = run(uplink, 8, post)
+    assert sent_then_waiting(uplink, sent) == [T0 + i for i in range(8) if i != 1]
+    assert uplink.rejected == 1 and uplink.failures == 0
+
+def test_other_4xx_drops_the_batch():
+    def post(rows):
+        if rows[0]["timestamp"] == T0:
+            raise http_error(404)
+    uplink = RoverUplink("http://hub", batch_size=2, compress="never")
+    sent = run(uplink, 4, post)
+    assert sent == [[T0 + 2, T0 + 3]] and uplink.rejected == 2
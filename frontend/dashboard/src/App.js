@@ -65,9 +65,16 @@ const PolyhouseDashboard = () => {
     const connectWebSocket = React.useCallback(() => {
         if (!mountedRef.current) return;
         try {
-            const ws = new WebSocket('ws://localhost:8000/ws/realtime');
+            const ws = new WebSocket('ws://localhost:8000/ws/realtime?frames=binary');
+            ws.binaryType = 'blob';
             ws.onopen = () => { setIsConnected(true); setConnectionStatus('Connected'); };
             ws.onmessage = (event) => {
+                // Camera frames arrive as raw JPEG binary messages right after each JSON update
+                if (event.data instanceof Blob) {
+                    const url = URL.createObjectURL(event.data);
+                    setCameraFrame(prev => { if (prev && prev.startsWith('blob:')) URL.revokeObjectURL(prev); return url; });
+                    return;
+                }
                 try {
                     const message = JSON.parse(event.data);
                     if (message.type === 'sensor_update') {
@@ -81,7 +88,7 @@ const PolyhouseDashboard = () => {
                             moisture: data.soil_moisture,
                             water_level: data.water_level_cm
                         }].slice(-30));
-                        if (data.camera_frame_base64) setCameraFrame(data.camera_frame_base64);
+                        if (data.camera_frame_base64) setCameraFrame(`data:image/jpeg;base64,${data.camera_frame_base64}`);
                         if (data.disease_analysis) setDiseaseData(data.disease_analysis);
                         if (data.pest_analysis) setPestData(data.pest_analysis);
                         if (data.growth_metrics) setGrowthData(data.growth_metrics);
@@ -246,7 +253,7 @@ const PolyhouseDashboard = () => {
                             <>
                                 <div style={{ ...styles.cameraContainer, position: 'relative' }}>
                                     <div style={{ position: 'absolute', top: 0, left: 0, width: '100%', padding: '0.5rem', background: 'rgba(0, 0, 0, 0.5)', color: 'white', textAlign: 'center', fontWeight: 'bold', fontSize: '1rem', borderTopLeftRadius: '0.25rem', borderTopRightRadius: '0.25rem' }}>LIVE SIMULATED FEED</div>
-                                    <img src={`data:image/jpeg;base64,${cameraFrame}`} alt="Live feed" style={styles.cameraImage} />
+                                    <img src={cameraFrame} alt="Live feed" style={styles.cameraImage} />
                                 </div>
                                 <p style={{ color: '#94a3b8', marginTop: '1rem', textAlign: 'center' }}>
                                     This is a simulated feed for demonstration. On a Raspberry Pi, this will show the live video from the camera module.
@@ -16,7 +16,7 @@ const PolyhouseDashboard = () => {
 
     try {
       console.log('🔌 Connecting to WebSocket...');
-      const ws = new WebSocket('ws://localhost:8000/ws/realtime');
+      const ws = new WebSocket('ws://localhost:8000/ws/realtime?frames=none');
 
       ws.onopen = () => {
         console.log('✅ WebSocket Connected Successfully');